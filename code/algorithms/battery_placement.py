@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import csv
+import math
+import random
+from typing import List, Tuple, Dict, Optional
+from code.classes.grid import Grid
+from code.classes.battery import Battery
+from code.algorithms.capacitated_k_medians import CapacitatedKMedians
+
+
+class BatteryPlacement():
+    """ Class that chooses the amount, the types and the positions of the
+    batteries with Simulated Annealing. Every battery type has a capacity
+    and a price (data/battery_types.csv). A move places, removes, moves or
+    changes the type of a battery and is scored with a PlacementEvaluator,
+    which estimates the cables without laying them. """
+
+    def __init__(self, grid: Grid, cable_cost: int = 9) -> None:
+        """ Initializes the battery placement algorithm.
+
+        - grid as Grid object.
+
+        Optional parameters:
+        - cable_cost as an int for the cost of a cable (Default = 9). """
+
+        self.grid = grid
+        self.battery_type_list = self.import_battery_types("data/battery_types.csv")
+        self.cable_cost = cable_cost
+
+        self.initial_temperature = 500
+        self.max_iterations = 20000
+
+        # the chances of the moves, the rest of the moves move a battery
+        self.add_rate = 0.05
+        self.remove_rate = 0.05
+        self.type_rate = 0.1
+        self.median_rate = 0.1
+
+        # a part of the moves goes to a uniform random cell, the rest is drawn
+        # around the houses of the battery with a spread (in cells)
+        self.random_proposal_rate = 0.1
+        self.proposal_spread = 5
+
+    def import_battery_types(self, file_name: str) -> List[Tuple[str, float, float]]:
+        """ Imports the battery types from a csv file with the name, the
+        capacity and the price of every type.
+
+        - file_name as a str.
+
+        Returns: a list of tuples of the name, capacity and price. """
+
+        with open(file_name) as file:
+            csv_type_list = csv.reader(file)
+
+            # skip the header
+            next(csv_type_list)
+
+            return [(name, float(capacity), float(price))
+                    for name, capacity, price in csv_type_list]
+
+    def calculate_solution(self) -> Grid:
+        """ Executes the Simulated Annealing algorithm over the battery
+        layouts. A layout is a list with the type index and the position of
+        every battery. The grid has to be without cables.
+
+        Returns: the grid with the new batteries. """
+
+        evaluator = PlacementEvaluator(self.grid, self.battery_type_list, self.cable_cost)
+        self.median_algorithm = CapacitatedKMedians(self.grid)
+        self.house_position_set = set(evaluator.house_position_list)
+
+        layout = self.get_start_layout(evaluator)
+        cost, assignment_list = evaluator.evaluate(layout)
+        best_cost, best_layout = cost, layout
+
+        # the same exponential cooling as 0.99 ** iterations over 500 iterations
+        cooling_factor = 0.99 ** (500 / self.max_iterations)
+
+        for iteration in range(1, self.max_iterations + 1):
+            temperature = self.initial_temperature * cooling_factor ** iteration
+
+            new_layout = self.get_neighbour(layout, assignment_list, evaluator)
+            if new_layout is None:
+                continue
+
+            new_cost, new_assignment_list = evaluator.evaluate(new_layout)
+            if new_assignment_list is None:
+                continue
+
+            if new_cost <= cost or random.random() < math.exp((cost - new_cost) / temperature):
+                layout, cost, assignment_list = new_layout, new_cost, new_assignment_list
+
+                if cost < best_cost:
+                    best_cost, best_layout = cost, layout
+                    print(iteration, round(best_cost), self.get_layout_summary(best_layout))
+
+        print(f"Battery placement: estimated cost {round(best_cost)} with " +
+              f"{self.get_layout_summary(best_layout)} ({evaluator.evaluations} layouts scored)")
+
+        self.set_batteries(best_layout)
+
+        return self.grid
+
+    def get_start_layout(self, evaluator: PlacementEvaluator) -> List[Tuple[int, Tuple[int, int]]]:
+        """ Gets a valid start layout: the batteries of the district get the
+        type with the lowest price per capacity, and batteries of that type
+        are added near random houses until all houses fit.
+
+        - evaluator as a PlacementEvaluator object.
+
+        Returns: the layout as a list of the type index and position. """
+
+        type_index = min(range(len(self.battery_type_list)),
+                         key=lambda index: (self.battery_type_list[index][2] /
+                                            self.battery_type_list[index][1]))
+        layout = [(type_index, battery.cell.get_index()) for battery in self.grid.battery_list]
+
+        while evaluator.evaluate(layout)[1] is None:
+            position = self.get_free_position(random.choice(evaluator.house_position_list), layout)
+            layout.append((type_index, position))
+
+        return layout
+
+    def get_neighbour(self, layout: List[Tuple[int, Tuple[int, int]]],
+                      assignment_list: List[int], evaluator: PlacementEvaluator
+                      ) -> Optional[List[Tuple[int, Tuple[int, int]]]]:
+        """ Gets a random neighbour of a layout.
+
+        - layout as a list of the type index and position of every battery.
+        - assignment_list as a list with the battery index of every house.
+        - evaluator as a PlacementEvaluator object.
+
+        Returns: the new layout, or None if the move is not possible. """
+
+        new_layout = list(layout)
+        battery_index = random.randrange(len(layout))
+        type_index, position = layout[battery_index]
+        chance = random.random()
+
+        if chance < self.add_rate:
+            new_type_index = random.randrange(len(self.battery_type_list))
+            house_position = random.choice(evaluator.house_position_list)
+            new_layout.append((new_type_index, self.get_free_position(house_position, layout)))
+
+        elif chance < self.add_rate + self.remove_rate:
+            if len(layout) == 1:
+                return None
+            del new_layout[battery_index]
+
+        elif chance < self.add_rate + self.remove_rate + self.type_rate:
+            new_type_index = random.randrange(len(self.battery_type_list))
+            if new_type_index == type_index:
+                return None
+            new_layout[battery_index] = (new_type_index, position)
+
+        elif chance < self.add_rate + self.remove_rate + self.type_rate + self.median_rate:
+            cluster_list = [house_position for house_position, house_battery_index
+                            in zip(evaluator.house_position_list, assignment_list)
+                            if house_battery_index == battery_index]
+            taken_set = self.house_position_set | {other_position for _, other_position in layout}
+            taken_set.discard(position)
+            new_position = self.median_algorithm.get_median_position(cluster_list, position,
+                                                                     taken_set)
+            if new_position == position:
+                return None
+            new_layout[battery_index] = (type_index, new_position)
+
+        else:
+            if random.random() < self.random_proposal_rate:
+                grid_size = self.grid.grid_size
+                target = (random.randrange(grid_size), random.randrange(grid_size))
+            else:
+                house_index_list = [house_index for house_index, house_battery_index
+                                    in enumerate(assignment_list)
+                                    if house_battery_index == battery_index]
+                if not house_index_list:
+                    return None
+                house_x, house_y = evaluator.house_position_list[random.choice(house_index_list)]
+                target = (round(random.gauss(house_x, self.proposal_spread)),
+                          round(random.gauss(house_y, self.proposal_spread)))
+
+            new_layout[battery_index] = (type_index, self.get_free_position(target, layout))
+
+        return new_layout
+
+    def get_free_position(self, target: Tuple[int, int],
+                          layout: List[Tuple[int, Tuple[int, int]]]) -> Tuple[int, int]:
+        """ Gets the free cell (without house or battery) closest to a target.
+
+        - target as a tuple of the x and y index, can be outside the grid.
+        - layout as a list of the type index and position of every battery.
+
+        Returns: the position as a tuple of the x and y index. """
+
+        grid_size = self.grid.grid_size
+        taken_set = self.house_position_set | {position for _, position in layout}
+        x = min(max(target[0], 0), grid_size - 1)
+        y = min(max(target[1], 0), grid_size - 1)
+
+        for radius in range(2 * grid_size):
+            for x_offset in range(-radius, radius + 1):
+                y_offset = radius - abs(x_offset)
+                for position in ((x + x_offset, y + y_offset), (x + x_offset, y - y_offset)):
+                    if (0 <= position[0] < grid_size and 0 <= position[1] < grid_size and
+                        position not in taken_set):
+                        return position
+
+        raise Exception("The grid has no free cell for a battery.")
+
+    def get_layout_summary(self, layout: List[Tuple[int, Tuple[int, int]]]) -> str:
+        """ Gets a readable summary of the battery types of a layout.
+
+        - layout as a list of the type index and position of every battery.
+
+        Returns: a str with the amount of every battery type. """
+
+        return ", ".join(f"{sum(type_index == index for type_index, _ in layout)}x {name}"
+                         for index, (name, _, _) in enumerate(self.battery_type_list)
+                         if any(type_index == index for type_index, _ in layout))
+
+    def set_batteries(self, layout: List[Tuple[int, Tuple[int, int]]]) -> None:
+        """ Replaces the batteries of the grid by the batteries of a layout.
+
+        - layout as a list of the type index and position of every battery. """
+
+        for battery in self.grid.battery_list:
+            battery.cell.battery = None
+
+        self.grid.battery_list = []
+        for type_index, (x_index, y_index) in layout:
+            _, capacity, price = self.battery_type_list[type_index]
+            cell = self.grid.get_cell_by_index(x_index, y_index)
+            battery = Battery(cell, capacity, price)
+            cell.battery = battery
+            self.grid.battery_list.append(battery)
+
+
+class PlacementEvaluator():
+    """ Class that scores battery layouts fast. The houses are assigned to
+    the closest battery with room (the largest houses first) and the network
+    of every battery is estimated with a spanning tree from the battery. The
+    distances of every battery position and the networks of every cluster
+    are cached, so a move only computes what changed. """
+
+    def __init__(self, grid: Grid, battery_type_list: List[Tuple[str, float, float]],
+                 cable_cost: int, cache_size: int = 100000) -> None:
+        """ Initializes the evaluator.
+
+        - grid as Grid object.
+        - battery_type_list as a list of tuples of the name, capacity and price.
+        - cable_cost as an int.
+        - cache_size as the amount of networks that are remembered. """
+
+        self.battery_type_list = battery_type_list
+        self.cable_cost = cable_cost
+        self.cache_size = cache_size
+
+        self.house_position_list = [house.cell.get_index() for house in grid.house_list]
+        self.output_list = [house.max_output for house in grid.house_list]
+        self.house_order_list = sorted(range(len(self.output_list)),
+                                       key=lambda index: -self.output_list[index])
+
+        self.distance_cache: Dict[Tuple[int, int], List[int]] = {}
+        self.network_cache: Dict[Tuple, int] = {}
+        self.evaluations = 0
+
+    def get_distance_list(self, position: Tuple[int, int]) -> List[int]:
+        """ Gets the distance of every house to a position.
+
+        - position as a tuple of the x and y index.
+
+        Returns: a list with the distance of every house. """
+
+        distance_list = self.distance_cache.get(position)
+        if distance_list is None:
+            x, y = position
+            distance_list = [abs(house_x - x) + abs(house_y - y)
+                             for house_x, house_y in self.house_position_list]
+            self.distance_cache[position] = distance_list
+
+        return distance_list
+
+    def evaluate(self, layout: List[Tuple[int, Tuple[int, int]]]
+                 ) -> Tuple[float, Optional[List[int]]]:
+        """ Scores a battery layout.
+
+        - layout as a list of the type index and position of every battery.
+
+        Returns: a tuple of the estimated cost and the battery index of every
+        house, or infinity and None if the houses don't fit. """
+
+        self.evaluations += 1
+
+        distance_matrix = [self.get_distance_list(position) for _, position in layout]
+        room_list = [self.battery_type_list[type_index][1] for type_index, _ in layout]
+        battery_range = range(len(layout))
+        assignment_list = [0] * len(self.output_list)
+
+        for house_index in self.house_order_list:
+            output = self.output_list[house_index]
+            best_battery_index = -1
+            best_distance = 0
+            for battery_index in battery_range:
+                distance = distance_matrix[battery_index][house_index]
+                if room_list[battery_index] >= output and (best_battery_index < 0 or
+                                                           distance < best_distance):
+                    best_battery_index = battery_index
+                    best_distance = distance
+
+            if best_battery_index < 0:
+                return float("inf"), None
+
+            room_list[best_battery_index] -= output
+            assignment_list[house_index] = best_battery_index
+
+        cluster_list: List[List[int]] = [[] for _ in layout]
+        for house_index, battery_index in enumerate(assignment_list):
+            cluster_list[battery_index].append(house_index)
+
+        total_cables = 0
+        for (_, position), house_index_list in zip(layout, cluster_list):
+            key = (position, tuple(house_index_list))
+            cables = self.network_cache.get(key)
+            if cables is None:
+                cables = self.estimate_network(position, house_index_list)
+                if len(self.network_cache) >= self.cache_size:
+                    self.network_cache.clear()
+                self.network_cache[key] = cables
+            total_cables += cables
+
+        total_price = sum(self.battery_type_list[type_index][2] for type_index, _ in layout)
+
+        return total_price + total_cables * self.cable_cost, assignment_list
+
+    def estimate_network(self, position: Tuple[int, int], house_index_list: List[int]) -> int:
+        """ Estimates the cables of the network of a battery. The houses are
+        connected from the closest to the battery outwards, every house to
+        the closest of the battery and the houses before it (like the
+        PrimNetwork algorithm without the shared cells of the paths).
+
+        - position as the position of the battery.
+        - house_index_list as a list with the indices of the houses.
+
+        Returns: the estimated amount of cables as an int. """
+
+        battery_x, battery_y = position
+        distance_list = self.get_distance_list(position)
+        connected_list = [position]
+        total_cables = 0
+
+        for house_index in sorted(house_index_list, key=lambda index: distance_list[index]):
+            house_x, house_y = self.house_position_list[house_index]
+            total_cables += min(abs(house_x - x) + abs(house_y - y) for x, y in connected_list)
+            connected_list.append((house_x, house_y))
+
+        # every house path has a cable on the house cell
+        return total_cables + len(house_index_list)
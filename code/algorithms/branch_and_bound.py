@@ -0,0 +1,438 @@
+import time
+import multiprocessing
+import multiprocessing.pool
+from typing import List, Tuple, Dict, Set, Optional
+from code.algorithms.algorithm import Algorithm
+from code.algorithms.prim_network import PrimNetwork
+from code.classes.grid import Grid
+from code.classes.cell import Cell
+from code.classes.battery import Battery
+from code.classes.house import House
+from code.classes.cable_router import connect_house, get_path
+
+# a connection: house index, battery index, end position and orientation
+Connection = Tuple[int, int, Tuple[int, int], bool]
+
+
+class BranchAndBound(Algorithm):
+    """ Class that polishes a solution with an exact branch and bound on small
+    windows of houses. The houses of a window are taken out of the grid while
+    the cables of all other houses stay, and the branch and bound finds the
+    cheapest way to connect them again: the battery, the order and the
+    orientation of every path, where every path goes to the closest cell of
+    the network. Windows are only replaced when they need less cables. """
+
+    def __init__(self, grid: Grid) -> None:
+        """ Initializes the branch and bound.
+
+        - grid as Grid object. """
+
+        self.grid: Grid = grid
+
+        # algorithm that creates the start solution when the grid is empty
+        self.start_algorithm = PrimNetwork
+        self.window_size = 8
+        # a window search stops after this amount of nodes and is then not exact
+        self.max_nodes = 5000
+        self.time_budget = 10.0
+
+        # windows that are solved at the same time in separate processes
+        self.processes = 1
+
+    def calculate_solution(self) -> None:
+        """ Executes the branch and bound on a window around every house. When
+        not every house has a battery, the start algorithm creates a solution
+        first. """
+
+        if any(house.battery is None for house in self.grid.house_list):
+            self.start_algorithm(self.grid).calculate_solution()
+
+        start_cables = len(self.grid.cable_list)
+
+        if self.processes > 1:
+            with multiprocessing.Pool(self.processes) as pool:
+                total_windows, exact_windows, improved_windows = self.polish(pool)
+        else:
+            total_windows, exact_windows, improved_windows = self.polish()
+
+        print(f"Branch and bound: {total_windows} windows ({exact_windows} exact), " +
+              f"{improved_windows} improved, {start_cables} -> {len(self.grid.cable_list)} cables")
+
+    def polish(self, pool: Optional[multiprocessing.pool.Pool]=None) -> Tuple[int, int, int]:
+        """ Solves a window around every house, and starts another pass when a
+        window improved, until the time budget is used. With a pool a batch of
+        windows without shared houses is solved at once, a window is then only
+        replaced when its batteries didn't change for an earlier window of the
+        batch.
+
+        Optional parameters:
+        - pool as a multiprocessing Pool (Default = None).
+
+        Returns: a tuple of the amount of windows, exact windows and improved
+        windows. """
+
+        start_time = time.time()
+        seed_list = list(self.grid.house_list)
+        total_windows = 0
+        exact_windows = 0
+        improved_windows = 0
+
+        improved_pass = False
+
+        while time.time() - start_time < self.time_budget:
+            # start another pass over all houses while the last pass improved
+            if not seed_list:
+                if not improved_pass:
+                    break
+                seed_list = list(self.grid.house_list)
+                improved_pass = False
+
+            window_list: List[List[House]] = []
+            used_house_set: Set[House] = set()
+            while seed_list and len(window_list) < self.processes:
+                window = self.get_window(seed_list.pop(0))
+                if not used_house_set.intersection(window):
+                    window_list.append(window)
+                    used_house_set.update(window)
+
+            argument_list = [self.get_subproblem(window) for window in window_list]
+            if pool is not None:
+                result_list = pool.starmap(solve_window, argument_list)
+            else:
+                result_list = [solve_window(*arguments) for arguments in argument_list]
+
+            changed_battery_set: Set[int] = set()
+            for window, (cost, connection_list, exact) in zip(window_list, result_list):
+                total_windows += 1
+                exact_windows += exact
+
+                battery_set = ({self.grid.battery_list.index(house.battery) for house in window} |
+                               {battery_index for _, battery_index, _, _ in connection_list})
+                if cost is None or changed_battery_set.intersection(battery_set):
+                    continue
+
+                self.draw_window(window, connection_list)
+                changed_battery_set.update(battery_set)
+                improved_windows += 1
+                improved_pass = True
+
+        return total_windows, exact_windows, improved_windows
+
+    def get_window(self, seed_house: House) -> List[House]:
+        """ Gets the closest houses around a house. A house can only be taken
+        out when the houses that connect to its cable are taken out as well,
+        so houses are only added together with these houses.
+
+        - seed_house as a House object.
+
+        Returns: a list of at most window_size House objects. """
+
+        dependent_dict: Dict[House, List[House]] = {house: [] for house in self.grid.house_list}
+        for house in self.grid.house_list:
+            owner = self.get_owner(house)
+            if owner is not None:
+                dependent_dict[owner].append(house)
+
+        seed_x, seed_y = seed_house.cell.get_index()
+        window: List[House] = []
+        for house in sorted(self.grid.house_list,
+                            key=lambda house: abs(house.cell.x_index - seed_x) +
+                            abs(house.cell.y_index - seed_y)):
+            if house in window:
+                continue
+
+            group = [house]
+            for group_house in group:
+                group += [dependent for dependent in dependent_dict[group_house]
+                          if dependent not in group and dependent not in window]
+
+            if len(window) + len(group) <= self.window_size:
+                window += group
+            if len(window) == self.window_size:
+                break
+
+        return window
+
+    def get_owner(self, house: House) -> Optional[House]:
+        """ Gets the house that laid the cable at the end of the path of a
+        house.
+
+        - house as a House object.
+
+        Returns: the House object or None when the path ends at the battery. """
+
+        end_cell = house.cable_list[-1].cell
+        if end_cell is house.battery.cell:
+            return None
+
+        for cable in end_cell.cable_list:
+            if cable.battery is house.battery and cable.house is not house:
+                return cable.house
+
+        return None
+
+    def get_subproblem(self, window: List[House]
+                       ) -> Tuple[List[Tuple[int, int]], List[float], List[float],
+                                  List[Set[Tuple[int, int]]], int, int]:
+        """ Gets the data of a window for solve_window, the cables of the other
+        houses are the fixed networks.
+
+        - window as a list of House objects.
+
+        Returns: a tuple with the arguments of solve_window. """
+
+        window_set = set(window)
+        house_position_list = [house.cell.get_index() for house in window]
+        output_list = [house.max_output for house in window]
+        capacity_list = [battery.capacity + sum(house.max_output for house in window
+                                                if house.battery is battery)
+                         for battery in self.grid.battery_list]
+        network_list = [{battery.cell.get_index()} |
+                        {cable.cell.get_index() for cable in battery.cable_list
+                         if cable.house not in window_set}
+                        for battery in self.grid.battery_list]
+        upper_bound = sum(len(house.cable_list) for house in window)
+
+        return (house_position_list, output_list, capacity_list, network_list,
+                upper_bound, self.max_nodes)
+
+    def draw_window(self, window: List[House], connection_list: List[Connection]) -> None:
+        """ Removes the cables of the houses of a window and connects them
+        again.
+
+        - window as a list of House objects.
+        - connection_list as a list of connections in the order they have to
+        be drawn. """
+
+        window_set = set(window)
+        cable_set = {cable for house in window for cable in house.cable_list}
+        for cable in cable_set:
+            cable.cell.cable_list.remove(cable)
+        self.grid.cable_list = [cable for cable in self.grid.cable_list if cable not in cable_set]
+
+        for battery in self.grid.battery_list:
+            battery.cable_list = [cable for cable in battery.cable_list if cable not in cable_set]
+            battery.capacity += sum(house.max_output for house in battery.house_list
+                                    if house in window_set)
+            battery.house_list = [house for house in battery.house_list if house not in window_set]
+
+        for house in window:
+            house.cable_list = []
+            house.shared_cable_list = []
+            house.battery = None
+
+        for house_index, battery_index, end_position, vertical_first in connection_list:
+            house = window[house_index]
+            battery = self.grid.battery_list[battery_index]
+
+            battery.capacity -= house.max_output
+            battery.house_list.append(house)
+            house.battery = battery
+
+            end_cell = self.grid.get_cell_by_index(end_position[0], end_position[1])
+            self.draw_path(house.cell, end_cell, battery, house, vertical_first)
+
+    def draw_path(self, start_cell: Cell, end_cell: Cell, battery: Battery,
+                  house: House, vertical_first: bool=False) -> None:
+        """ Method that draws a path between a start cell and end cell.
+        Can connect to other cables and stores the rest of the cable between
+        the connection and the battery in the house shared_cable_list.
+
+        - start_cell as a Cell object as start of the cable
+        - end_cell as a Cell object as end of the cable
+        - battery as a battery object for the battery connection
+        - house as the house connection for the house connection.
+
+        Optional parameters:
+        - vertical_first as a bool, draws the path towards the y position of
+        the end_cell first (Default = False). """
+
+        connect_house(self.grid, house, battery, end_cell, vertical_first)
+
+
+def solve_window(house_position_list: List[Tuple[int, int]], output_list: List[float],
+                 capacity_list: List[float], network_list: List[Set[Tuple[int, int]]],
+                 upper_bound: int, max_nodes: int
+                 ) -> Tuple[Optional[int], List[Connection], bool]:
+    """ Finds the cheapest way to connect the houses of a window to the fixed
+    networks with a depth first branch and bound. Every step connects a house
+    to the closest cell of the network of a battery with room. Runs in a
+    worker process when the windows are solved in parallel.
+
+    The bound of a node: every house that isn't connected yet needs a cable
+    on its end cell and the cells of its path that are closer to the house
+    than the closest network and than half the distance to another house,
+    these cells can't be shared. States that were reached before with less
+    cables are skipped (memoisation on the houses left and the new cells).
+
+    - house_position_list as a list of house positions.
+    - output_list as a list of the output of every house.
+    - capacity_list as a list of the room of every battery.
+    - network_list as a list of sets with the fixed positions of every battery.
+    - upper_bound as an int, only solutions with less cables are returned.
+    - max_nodes as an int, the maximum amount of nodes of the search.
+
+    Returns: a tuple of the cables of the best solution (None if no better
+    solution was found), the connections of the best solution in drawing
+    order and a bool that is True when the search was complete. """
+
+    total_houses = len(house_position_list)
+    total_batteries = len(network_list)
+    capacity_list = list(capacity_list)
+
+    # the closest network cell of every battery for every house
+    distance_matrix: List[List[int]] = []
+    end_matrix: List[List[Tuple[int, int]]] = []
+    for house_x, house_y in house_position_list:
+        distance_list = []
+        end_list = []
+        for network in network_list:
+            end_position = min(network, key=lambda position: (abs(position[0] - house_x) +
+                                                              abs(position[1] - house_y), position))
+            distance_list.append(abs(end_position[0] - house_x) + abs(end_position[1] - house_y))
+            end_list.append(end_position)
+        distance_matrix.append(distance_list)
+        end_matrix.append(end_list)
+
+    house_distance_matrix = [[abs(x - other_x) + abs(y - other_y)
+                              for other_x, other_y in house_position_list]
+                             for x, y in house_position_list]
+
+    best_cost = upper_bound
+    best_connection_list: List[Connection] = []
+    connection_list: List[Connection] = []
+    memo_dict: Dict[Tuple[int, int], int] = {}
+    nodes = 0
+
+    def get_bound(remaining_list: List[int]) -> Optional[int]:
+        network_distance_list = []
+        for house_index in remaining_list:
+            network_distance = min((distance_matrix[house_index][battery_index]
+                                    for battery_index in range(total_batteries)
+                                    if capacity_list[battery_index] >= output_list[house_index]),
+                                   default=None)
+            if network_distance is None:
+                return None
+            network_distance_list.append(network_distance)
+
+        # the new cells closer to a house than the network and than half the
+        # distance to another house belong to the path of that house only
+        radius_bound = 0
+        for house_index, network_distance in zip(remaining_list, network_distance_list):
+            radius_bound += min([network_distance] +
+                                [(house_distance_matrix[house_index][other_index] + 1) // 2
+                                 for other_index in remaining_list if other_index != house_index])
+
+        # the new cells form a tree between the houses and the networks, which
+        # is at least half of the spanning tree with the networks as one node
+        key_list = list(network_distance_list)
+        tree_length = 0
+        for _ in range(len(remaining_list)):
+            index = min(range(len(key_list)), key=key_list.__getitem__)
+            tree_length += key_list[index]
+            key_list[index] = float("inf")
+            distance_list = house_distance_matrix[remaining_list[index]]
+            for other_index, other_house_index in enumerate(remaining_list):
+                if key_list[other_index] != float("inf"):
+                    key_list[other_index] = min(key_list[other_index], distance_list[other_house_index])
+
+        return len(remaining_list) + max(radius_bound, (tree_length + 1) // 2)
+
+    def search(remaining: int, cost: int, network_hash: int,
+               last_step: Optional[Tuple[int, int, int, Set[Tuple[int, int]]]]) -> None:
+        nonlocal best_cost, best_connection_list, nodes
+
+        if remaining == 0:
+            best_cost = cost
+            best_connection_list = list(connection_list)
+            return
+
+        nodes += 1
+        if nodes > max_nodes:
+            return
+
+        key = (remaining, network_hash)
+        if memo_dict.get(key, best_cost) <= cost:
+            return
+        memo_dict[key] = cost
+
+        remaining_list = [house_index for house_index in range(total_houses)
+                          if remaining >> house_index & 1]
+        bound = get_bound(remaining_list)
+        if bound is None or cost + bound >= best_cost:
+            return
+
+        # the cheapest steps first, so good solutions are found early
+        step_list = []
+        for house_index in remaining_list:
+            house_x, house_y = house_position_list[house_index]
+            for battery_index in range(total_batteries):
+                if capacity_list[battery_index] < output_list[house_index]:
+                    continue
+
+                end_position = end_matrix[house_index][battery_index]
+                step_list.append((distance_matrix[house_index][battery_index],
+                                  house_index, battery_index, end_position, False))
+                if house_x != end_position[0] and house_y != end_position[1]:
+                    step_list.append((distance_matrix[house_index][battery_index],
+                                      house_index, battery_index, end_position, True))
+        step_list.sort()
+
+        for distance, house_index, battery_index, end_position, vertical_first in step_list:
+            if cost + distance + 1 >= best_cost:
+                break
+
+            # the path ends at the closest network cell, the other cells are new
+            new_position_list = get_path(house_position_list[house_index], end_position,
+                                         vertical_first)[:-1]
+
+            # two steps that don't change each other give the same network in
+            # both orders, only the order with the lowest house first is searched
+            if last_step is not None and house_index < last_step[0]:
+                last_house_index, last_battery_index, last_distance, changed_set = last_step
+                last_x, last_y = house_position_list[last_house_index]
+                if ((house_index, battery_index) not in changed_set and
+                    (battery_index != last_battery_index or
+                     all(abs(position[0] - last_x) + abs(position[1] - last_y) >= last_distance
+                         for position in new_position_list))):
+                    continue
+
+            new_hash = network_hash ^ hash((house_index, battery_index))
+            for position in new_position_list:
+                new_hash ^= hash((battery_index, position))
+
+            # the houses left can get closer to the network that grew
+            undo_list = []
+            for other_index in remaining_list:
+                if other_index == house_index:
+                    continue
+
+                other_x, other_y = house_position_list[other_index]
+                for position in new_position_list:
+                    other_distance = abs(position[0] - other_x) + abs(position[1] - other_y)
+                    if other_distance < distance_matrix[other_index][battery_index]:
+                        if not undo_list or undo_list[-1][0] != other_index:
+                            undo_list.append((other_index, distance_matrix[other_index][battery_index],
+                                              end_matrix[other_index][battery_index]))
+                        distance_matrix[other_index][battery_index] = other_distance
+                        end_matrix[other_index][battery_index] = position
+
+            capacity_list[battery_index] -= output_list[house_index]
+            connection_list.append((house_index, battery_index, end_position, vertical_first))
+
+            search(remaining & ~(1 << house_index), cost + distance + 1, new_hash,
+                   (house_index, battery_index, distance,
+                    {(other_index, battery_index) for other_index, _, _ in undo_list}))
+
+            connection_list.pop()
+            capacity_list[battery_index] += output_list[house_index]
+            for other_index, other_distance, other_end_position in undo_list:
+                distance_matrix[other_index][battery_index] = other_distance
+                end_matrix[other_index][battery_index] = other_end_position
+
+    search((1 << total_houses) - 1, 0, 0, None)
+
+    if not best_connection_list:
+        return None, [], nodes <= max_nodes
+
+    return best_cost, best_connection_list, nodes <= max_nodes
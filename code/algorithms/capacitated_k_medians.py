@@ -0,0 +1,164 @@
+import random
+from typing import List, Tuple, Set
+from code.algorithms.min_cost_flow import MinCostFlow
+from code.classes.grid import Grid
+
+
+class CapacitatedKMedians():
+    """ Class that places the batteries with capacitated k-medians. The
+    houses get assigned to the batteries with the least total distance that
+    fits the capacities (min cost flow), after which every battery moves to
+    the empty cell with the least distance to its houses (the median of the
+    x and y positions). Both steps repeat until the layout is stable. The
+    first run starts at the current layout, the other runs start with
+    batteries on houses that are spread like k-medians++. """
+
+    def __init__(self, grid: Grid) -> None:
+        """ Initializes the capacitated k-medians algorithm.
+
+        - grid as Grid object. """
+
+        self.grid = grid
+        self.max_iterations = 20
+        self.restarts = 5
+
+    def calculate_solution(self) -> Grid:
+        """ Executes capacitated k-medians and moves the batteries to the
+        layout with the least total distance between the houses and their
+        batteries. The grid has to be without cables.
+
+        Returns: the grid with the batteries at their new locations. """
+
+        battery_list = self.grid.battery_list
+        start_position_list = [battery.cell.get_index() for battery in battery_list]
+
+        best_distance, best_position_list = self.calculate_layout(start_position_list)
+        print(f"K-medians run 1: total distance {best_distance}")
+
+        for restart in range(1, self.restarts):
+            total_distance, position_list = self.calculate_layout(self.get_seed_positions())
+            print(f"K-medians run {restart + 1}: total distance {total_distance}")
+
+            if total_distance < best_distance:
+                best_distance = total_distance
+                best_position_list = position_list
+
+        self.set_positions(best_position_list)
+
+        return self.grid
+
+    def calculate_layout(self, position_list: List[Tuple[int, int]]
+                         ) -> Tuple[int, List[Tuple[int, int]]]:
+        """ Alternates the capacitated assignment and the median update from
+        a starting layout.
+
+        - position_list as a list with the start position of every battery.
+
+        Returns: a tuple of the total distance and the positions of the best
+        layout that was found. """
+
+        house_position_list = [house.cell.get_index() for house in self.grid.house_list]
+        house_position_set = set(house_position_list)
+
+        best_distance = None
+        best_position_list = position_list
+
+        for _ in range(self.max_iterations):
+            self.set_positions(position_list)
+            algorithm = MinCostFlow(self.grid)
+            assignment_list = algorithm.get_assignment()
+            total_distance = sum(algorithm.distance_matrix[house_index][battery_index]
+                                 for house_index, battery_index in enumerate(assignment_list))
+
+            if best_distance is None or total_distance < best_distance:
+                best_distance = total_distance
+                best_position_list = position_list
+
+            # every battery moves to the best empty cell for its houses
+            new_position_list: List[Tuple[int, int]] = []
+            for battery_index, position in enumerate(position_list):
+                cluster_list = [house_position for house_position, house_battery_index
+                                in zip(house_position_list, assignment_list)
+                                if house_battery_index == battery_index]
+                taken_set = (house_position_set | set(new_position_list) |
+                             set(position_list[battery_index + 1:]))
+                new_position_list.append(self.get_median_position(cluster_list, position,
+                                                                  taken_set))
+
+            if new_position_list == position_list:
+                break
+            position_list = new_position_list
+
+        return best_distance, best_position_list
+
+    def get_median_position(self, cluster_list: List[Tuple[int, int]],
+                            position: Tuple[int, int],
+                            taken_set: Set[Tuple[int, int]]) -> Tuple[int, int]:
+        """ Gets the empty cell with the least total distance to a cluster of
+        houses. The distance splits in an x and a y part, so the distance of
+        every cell follows from two lists. The current position wins a tie.
+
+        - cluster_list as a list of house positions.
+        - position as the current position of the battery.
+        - taken_set as a set of the positions of houses and other batteries.
+
+        Returns: the position of the cell as a tuple of the x and y index. """
+
+        grid_size = self.grid.grid_size
+        x_surface = [sum(abs(index - x) for x, _ in cluster_list) for index in range(grid_size)]
+        y_surface = [sum(abs(index - y) for _, y in cluster_list) for index in range(grid_size)]
+
+        best_position = position
+        best_distance = float("inf")
+        if position not in taken_set:
+            best_distance = x_surface[position[0]] + y_surface[position[1]]
+        for x_index in sorted(range(grid_size), key=lambda index: x_surface[index]):
+            if x_surface[x_index] + min(y_surface) >= best_distance:
+                break
+
+            for y_index in range(grid_size):
+                distance = x_surface[x_index] + y_surface[y_index]
+                if distance < best_distance and (x_index, y_index) not in taken_set:
+                    best_distance = distance
+                    best_position = (x_index, y_index)
+
+        return best_position
+
+    def get_seed_positions(self) -> List[Tuple[int, int]]:
+        """ Gets a random start layout like k-medians++. Every battery starts
+        next to a house, a house is picked with a chance by its distance to
+        the batteries placed before.
+
+        Returns: a list with the start position of every battery. """
+
+        house_position_list = [house.cell.get_index() for house in self.grid.house_list]
+        taken_set = set(house_position_list)
+        position_list: List[Tuple[int, int]] = []
+
+        for _ in self.grid.battery_list:
+            if position_list:
+                weight_list = [min(abs(x - battery_x) + abs(y - battery_y)
+                                   for battery_x, battery_y in position_list)
+                               for x, y in house_position_list]
+                house_position = random.choices(house_position_list, weight_list)[0]
+            else:
+                house_position = random.choice(house_position_list)
+
+            position = self.get_median_position([house_position], house_position, taken_set)
+            taken_set.add(position)
+            position_list.append(position)
+
+        return position_list
+
+    def set_positions(self, position_list: List[Tuple[int, int]]) -> None:
+        """ Moves every battery to its position in a list.
+
+        - position_list as a list with the position of every battery. """
+
+        for battery in self.grid.battery_list:
+            battery.cell.battery = None
+
+        for battery, (x_index, y_index) in zip(self.grid.battery_list, position_list):
+            cell = self.grid.get_cell_by_index(x_index, y_index)
+            cell.battery = battery
+            battery.cell = cell
@@ -1,24 +1,50 @@
+from __future__ import annotations
+
 import random
-from copy import deepcopy
-from typing import List, Tuple, Dict
+import time
+import multiprocessing
+from array import array
+from typing import List, Tuple, Optional
 from copy import copy
 from code.algorithms.algorithm import Algorithm
+from code.algorithms.multi_start import GreedyConstructor
 from code.classes.grid import Grid
 from code.classes.cell import Cell
 from code.classes.battery import Battery
 from code.classes.house import House
-from code.classes.cable import Cable
+from code.classes.cable_router import (connect_house, route_network, get_closest_position,
+                                       extend_network)
+from code.classes.steiner_tree import optimise_networks
+from code.classes.lower_bound import calculate_lower_bound, calculate_gap
 
 
 class Evolution(Algorithm):
-    """ 
-    Class that implements the Evolution algorithm for the smart grid problem. 
-    
+    """
+    Class that implements the Evolution algorithm for the smart grid problem.
+
     Attributes:
     grid: Instance of the Grid class representing the grid for the algorithm.
     fitness_threshold: An integer value which serves as a threshold for fitness of solutions.
-    population: A list of tuples where each tuple contains a Grid instance representing a solution and its corresponding fitness score.
+    population: A list of tuples where each tuple contains the fitness score of a solution and its Genome.
     max_population: An integer that represents the maximum size of the population.
+    elite_size: An integer that represents the amount of best solutions that survive every generation.
+    random_solutions: An integer that represents the amount of new random solutions added every generation.
+    tournament_size: An integer that represents the amount of solutions that compete to become a parent.
+    mutation_rate: A float that represents the chance that a house gets mutated.
+    base_mutation_rate: A float that represents the mutation rate after an improvement.
+    min_mutation_rate: A float that represents the lowest mutation rate.
+    mutation_decay: A float that the mutation rate gets multiplied with every generation without improvement.
+    stall_generations: An integer that represents the amount of generations without improvement after which the algorithm stops.
+    statistics_list: A list of tuples with the best fitness, mean fitness and diversity of every generation.
+    island_statistics_list: A list with the statistics_list of every island after the island model.
+    islands: An integer that represents the amount of populations that evolve in separate processes (1 disables the island model).
+    migration_interval: An integer that represents the amount of generations between migrations of the island model.
+    migration_size: An integer that represents the amount of best solutions that migrate to the next island.
+    stall_migrations: An integer that represents the amount of migrations without improvement after which the island model stops.
+    time_budget: An optional float that represents the maximum amount of seconds the algorithm runs.
+    target_gap: A float, the algorithm stops when the gap between the best solution and the lower bound is at most this gap.
+    lower_bound: An integer that represents the lower bound of the amount of cables.
+    constructor: A GreedyConstructor that builds the random solutions with the precomputed district lists.
     total_houses: An integer that represents the total number of houses.
     """
 
@@ -26,286 +52,564 @@ class Evolution(Algorithm):
         """
         Initializes the Evolution class with a grid.
         """
-        
+
         self.grid: Grid = grid
 
         self.fitness_threshold = 900
-        self.population: List[Tuple[int, Grid]] = [] # population of solutions with corresponding fitness
-        self.max_population: int = 10 # Population size
-        self.total_houses = len(self.grid.non_allocated_house_list)
-        
-    def generate_solution(self) -> Grid:
-        """ 
-        Generates a solution for the problem using the greedy algorithm. 
-        Returns a deep copy of the grid.
+        self.population: List[Tuple[int, Genome]] = [] # population of solutions with corresponding fitness
+        self.max_population: int = 50 # Population size
+        self.elite_size: int = 2
+        self.random_solutions: int = 2
+        self.tournament_size: int = 3
+        self.mutation_rate: float = 0.02
+
+        # convergence settings, the mutation rate shrinks while the best
+        # solution doesn't improve to search closer around it
+        self.base_mutation_rate: float = self.mutation_rate
+        self.min_mutation_rate: float = 1 / max(1, len(self.grid.house_list))
+        self.mutation_decay: float = 0.95
+        self.stall_generations: int = 50
+        self.stall_counter: int = 0
+        self.best_fitness: Optional[int] = None
+        self.statistics_list: List[Tuple[int, float, float]] = []
+        self.island_statistics_list: List[List[Tuple[int, float, float]]] = []
+
+        # island model settings (set islands to os.cpu_count() to use all cores)
+        self.islands: int = 1
+        self.migration_interval: int = 10
+        self.migration_size: int = 2
+        self.stall_migrations: int = 10
+        self.time_budget: Optional[float] = None
+        self.target_gap: float = 0.05
+        self.lower_bound: int = 0
+
+        self.total_houses = len(self.grid.house_list)
+
+        # the indices of a genome refer to these lists
+        self.house_list: List[House] = copy(self.grid.house_list)
+        self.battery_list: List[Battery] = copy(self.grid.battery_list)
+        self.house_position_list: List[Tuple[int, int]] = [house.cell.get_index() for house in self.house_list]
+        self.house_output_list: List[float] = [house.max_output for house in self.house_list]
+        self.battery_position_list: List[Tuple[int, int]] = [battery.cell.get_index() for battery in self.battery_list]
+        self.battery_capacity_list: List[float] = [battery.max_capacity for battery in self.battery_list]
+        self.constructor: GreedyConstructor = GreedyConstructor(self.grid)
+
+    def generate_solution(self) -> Genome:
+        """
+        Generates a solution for the problem using the greedy shared algorithm
+        in a random order of houses. The constructions share the precomputed
+        lists of one GreedyConstructor.
+        Returns the solution as a Genome.
         """
 
-        self.grid.clean_grid()
-        self.grid.allocated_house_list = []
-        self.generate_greedy_solution(self.grid)
-        return deepcopy(self.grid)
-    
+        while True:
+            solution = self.constructor.construct()
+            if solution is not None:
+                _, battery_array, connection_list = solution
+                return Genome(battery_array, array("h", [house_index for house_index, _
+                                                         in connection_list]))
 
     def generate_population(self) -> None:
-        """ 
-        Generates a population of solutions. If the population already exists, 
-        keeps the best solution, mutates it 8 times and adds 2 new random solutions.
+        """
+        Generates a population of solutions. If the population already exists,
+        keeps the best solutions, adds new random solutions and fills the rest
+        of the population with mutated children of parents that are chosen by
+        tournament selection.
         """
 
         # Check if population exists
         if not self.population:
-            # Generate 10 solutions
             for _ in range(self.max_population):
                 solution = self.generate_solution()
-                # print(solution)
-                fitness = self.fitness(solution)
-                print(fitness)
-                self.population.append((fitness, solution))
+                self.population.append((self.fitness(solution), solution))
 
         else:
-            # Keep the best solution
-            # Sort by fitness, high to low
-            self.population.sort(key=lambda x: x[0], reverse=False)
-            best_solution = self.population[0]
-            self.population = [best_solution]
-
-            # Mutate best solution 8 times and add new solutions to the population
-            for _ in range(8):
-                mutated_solution = self.mutate(deepcopy(best_solution[1]))
-                fitness = self.fitness(mutated_solution)
-                print(fitness)
-                self.population.append((fitness, mutated_solution))
-                if fitness < self.fitness_threshold:
-                    break
+            # Keep the best solutions
+            # Sort by fitness, low to high
+            self.population.sort(key=lambda x: x[0])
+            next_population = self.population[:self.elite_size]
 
-            # Generate 2 new random solutions
-            for _ in range(2):
+            # Generate new random solutions for diversity
+            for _ in range(self.random_solutions):
                 solution = self.generate_solution()
-                fitness = self.fitness(solution)
-                print(fitness)
-                self.population.append((fitness, solution))
-                if fitness < self.fitness_threshold:
-                    break
+                next_population.append((self.fitness(solution), solution))
+
+            # Fill the population with children of the current population
+            while len(next_population) < self.max_population:
+                child = self.crossover(self.select_parent(), self.select_parent())
+                self.mutate(child)
+                next_population.append((self.fitness(child), child))
+
+            self.population = next_population
+
+    def next_generation(self) -> None:
+        """
+        Generates the next generation of the population and stores its
+        statistics. Keeps track of the generations without improvement and
+        adapts the mutation rate: it is reset after an improvement and shrinks
+        with every generation without improvement.
+        """
 
+        self.generate_population()
+        self.population.sort(key=lambda x: x[0]) # Sort by fitness, low to high
 
-    def fitness(self, grid: Grid) -> int:
-        """ 
-        Calculates the fitness of a solution. The fitness is determined by the number of cables in the grid.
+        best_fitness = self.population[0][0]
+        mean_fitness = sum(fitness for fitness, _ in self.population) / len(self.population)
+        self.statistics_list.append((best_fitness, mean_fitness, self.diversity()))
+
+        if self.best_fitness is None or best_fitness < self.best_fitness:
+            self.best_fitness = best_fitness
+            self.stall_counter = 0
+            self.mutation_rate = self.base_mutation_rate
+        else:
+            self.stall_counter += 1
+            self.mutation_rate = max(self.min_mutation_rate,
+                                     self.mutation_rate * self.mutation_decay)
+
+    def diversity(self) -> float:
+        """
+        Calculates the diversity of the population as the average fraction of
+        houses that have another battery than in the best solution, over the
+        other solutions of the population.
+        The population needs to be sorted by fitness, low to high.
+        Returns the diversity as a float between 0 and 1.
+        """
+
+        # a single solution has nothing to differ from
+        if len(self.population) < 2:
+            return 0.0
+
+        best_battery_array = self.population[0][1].battery_array
+        total_differences = 0
+
+        for _, genome in self.population[1:]:
+            total_differences += sum(1 for battery_index, best_battery_index
+                                     in zip(genome.battery_array, best_battery_array)
+                                     if battery_index != best_battery_index)
+
+        return total_differences / ((len(self.population) - 1) * self.total_houses)
+
+    def fitness(self, genome: Genome) -> int:
+        """
+        Calculates the fitness of a solution. The fitness is determined by the number of cables
+        the solution needs when it is decoded.
         Returns the fitness score.
         """
 
-        # The fitness is determined by the number of cables
-        return len(grid.cable_list)
-    
-    
-    def mutate(self, grid: Grid) -> Grid:
-        """ 
-        Mutates a solution by altering its grid. 
-        Returns the mutated grid.
-        """
-
-        # Select half of houses
-        houses = random.sample(grid.house_list, len(grid.house_list) // 2) 
-
-        for house in houses:
-            # Remove the house-battery connection
-            for cable in house.cable_list:
-                self.remove_cable(cable)
-            # keep reference to the old battery to update its capacity
-            old_battery = house.battery
-            house.cell.battery = None
-            old_battery.capacity += house.max_output  # update capacity of old battery
-            house.battery = None
-
-        # Connect these houses to a random available battery and make new cables
-        for house in houses:
-            possible_batteries = [battery for battery in grid.battery_list if battery.capacity >= house.max_output]
-            if possible_batteries:
-                new_battery = random.choice(possible_batteries)
-                new_battery.capacity -= house.max_output
-                new_battery.house_list.append(house)
-                house.battery = new_battery
-                self.draw_path(house.cell, new_battery.cell, new_battery, house)
-
-        return grid
-
-
-    def calculate_solution(self) -> None:
-        """ 
-        Runs the algorithm until a solution with a fitness score 
+        return self.decode(genome)
+
+    def select_parent(self) -> Genome:
+        """
+        Selects a parent from the population with tournament selection.
+        Returns the Genome of the fittest solution of the tournament.
+        """
+
+        tournament = random.sample(self.population, self.tournament_size)
+        return min(tournament, key=lambda x: x[0])[1]
+
+    def crossover(self, parent: Genome, other_parent: Genome) -> Genome:
+        """
+        Creates a child of two parents. Every house takes the battery of the
+        other parent with a 50% chance if that battery has enough capacity
+        left, the routing order is combined with an order crossover.
+        Returns the child Genome.
+        """
+
+        child = parent.copy()
+        load_list = self.get_load_list(child)
+
+        # uniform crossover of the batteries that keeps the capacities valid
+        for house_index in range(self.total_houses):
+            old_battery_index = child.battery_array[house_index]
+            new_battery_index = other_parent.battery_array[house_index]
+            output = self.house_output_list[house_index]
+
+            if (new_battery_index != old_battery_index and random.random() < 0.5 and
+                load_list[new_battery_index] + output <= self.battery_capacity_list[new_battery_index]):
+                load_list[old_battery_index] -= output
+                load_list[new_battery_index] += output
+                child.battery_array[house_index] = new_battery_index
+
+        # order crossover: keep a slice of the parent, fill the rest in the
+        # order of the other parent
+        start, end = sorted(random.sample(range(self.total_houses + 1), 2))
+        segment = parent.order_array[start:end]
+        segment_set = set(segment)
+        rest = array("h", [house_index for house_index in other_parent.order_array
+                           if house_index not in segment_set])
+        child.order_array = rest[:start] + segment + rest[start:]
+
+        return child
+
+    def mutate(self, genome: Genome) -> Genome:
+        """
+        Mutates a solution by moving houses to a random other battery (or
+        swapping them with a house of that battery when it lacks capacity)
+        and by swapping houses in the routing order.
+        Returns the mutated Genome.
+        """
+
+        load_list = self.get_load_list(genome)
+
+        for house_index in range(self.total_houses):
+            if random.random() >= self.mutation_rate:
+                continue
+
+            old_battery_index = genome.battery_array[house_index]
+            new_battery_index = random.randrange(len(self.battery_position_list))
+            output = self.house_output_list[house_index]
+
+            if new_battery_index == old_battery_index:
+                continue
+
+            # move the house if the battery has enough capacity
+            if load_list[new_battery_index] + output <= self.battery_capacity_list[new_battery_index]:
+                load_list[old_battery_index] -= output
+                load_list[new_battery_index] += output
+                genome.battery_array[house_index] = new_battery_index
+                continue
+
+            # else try to swap it with a house of the new battery
+            other_house_index = random.choice([index for index, battery_index
+                                               in enumerate(genome.battery_array)
+                                               if battery_index == new_battery_index])
+            other_output = self.house_output_list[other_house_index]
+            difference = output - other_output
+
+            if (load_list[new_battery_index] + difference <= self.battery_capacity_list[new_battery_index] and
+                load_list[old_battery_index] - difference <= self.battery_capacity_list[old_battery_index]):
+                load_list[old_battery_index] -= difference
+                load_list[new_battery_index] += difference
+                genome.battery_array[house_index] = new_battery_index
+                genome.battery_array[other_house_index] = old_battery_index
+
+        # swap houses in the routing order
+        for index in range(self.total_houses):
+            if random.random() < self.mutation_rate:
+                other_index = random.randrange(self.total_houses)
+                genome.order_array[index], genome.order_array[other_index] = (
+                    genome.order_array[other_index], genome.order_array[index])
+
+        return genome
+
+    def calculate_solution(self) -> Grid:
+        """
+        Runs the algorithm until a solution with a fitness score
         less than the defined threshold is found.
+        The best solution gets drawn on the grid.
         """
 
-        # Define a threshold for fitness level
-        while True:
-            self.generate_population()
-            # Check if we have a solution with high enough fitness
-            self.population.sort(key=lambda x: x[0], reverse=False) # Sort by fitness, high to low
-            # print(self.population[0][0])
-            if self.population[0][0] < self.fitness_threshold:
-                break
-        return self.population[0][1]
+        self.lower_bound = calculate_lower_bound(self.grid)
+
+        # a solution on the grid (from a JSON output file) starts the population
+        # together with mutated copies of it and random solutions
+        if not self.population and all(house.battery is not None for house in self.house_list):
+            genome = self.get_grid_genome()
+            self.population.append((self.fitness(genome), genome))
+            while len(self.population) < self.max_population:
+                if len(self.population) < self.max_population // 2:
+                    solution = self.mutate(genome.copy())
+                else:
+                    solution = self.generate_solution()
+                self.population.append((self.fitness(solution), solution))
+
+        if self.islands > 1:
+            self.calculate_island_solution()
+        else:
+            start_time = time.time()
+
+            while True:
+                self.next_generation()
+                best_fitness, mean_fitness, diversity = self.statistics_list[-1]
+                print(f"Generation {len(self.statistics_list)}: best {best_fitness}, " +
+                      f"mean {mean_fitness:.1f}, diversity {diversity:.3f}, " +
+                      f"mutation rate {self.mutation_rate:.3f}")
+
+                # Check if we have a solution with high enough fitness or if
+                # the search stopped paying off
+                if (best_fitness < self.fitness_threshold or
+                    calculate_gap(best_fitness, self.lower_bound) <= self.target_gap or
+                    self.stall_counter >= self.stall_generations or
+                    (self.time_budget is not None and
+                     time.time() - start_time >= self.time_budget)):
+                    break
+
+        self.draw_solution(self.population[0][1])
+        return self.grid
+
+    def calculate_island_solution(self) -> None:
+        """
+        Runs the island model: every island evolves its own population in a
+        worker process for migration_interval generations, after which the
+        best solutions migrate to the next island. Stops when a solution is
+        below the fitness threshold or close enough to the lower bound, when
+        the best solution didn't improve for stall_migrations migrations or
+        when the time budget is used.
+        The population of all islands together is stored in the population.
+        """
+
+        start_time = time.time()
+
+        # a population from a warm start gets split over the islands, an
+        # island needs enough solutions for a tournament
+        population_list: List[List[Tuple[int, Genome]]] = [self.population[index::self.islands]
+                                                           for index in range(self.islands)]
+        for population in population_list:
+            while population and len(population) < self.tournament_size:
+                solution = self.generate_solution()
+                population.append((self.fitness(solution), solution))
+
+        best_fitness: Optional[int] = None
+        stall_counter = 0
+        migration = 0
+
+        # the state of every island goes to its worker process and back
+        island_state_list = [dict(self.get_island_state(), population=population)
+                             for population in population_list]
+
+        with multiprocessing.Pool(self.islands) as pool:
+            while True:
+                # every island gets its own seed, forked processes share the random state
+                arguments = [(self, island_state, self.migration_interval,
+                              random.randrange(2 ** 32))
+                             for island_state in island_state_list]
+                island_state_list = pool.starmap(evolve_island, arguments)
+                population_list = [island_state["population"]
+                                   for island_state in island_state_list]
+                migration += 1
+
+                island_best_fitness = min(population[0][0] for population in population_list)
+                mutation_rate_list = [round(island_state["mutation_rate"], 3)
+                                      for island_state in island_state_list]
+                print(f"Migration {migration}: {island_best_fitness}, " +
+                      f"mutation rates {mutation_rate_list}")
+
+                if best_fitness is None or island_best_fitness < best_fitness:
+                    best_fitness = island_best_fitness
+                    stall_counter = 0
+                else:
+                    stall_counter += 1
+
+                if (best_fitness < self.fitness_threshold or
+                    calculate_gap(best_fitness, self.lower_bound) <= self.target_gap or
+                    stall_counter >= self.stall_migrations or
+                    (self.time_budget is not None and
+                     time.time() - start_time >= self.time_budget)):
+                    break
 
+                self.migrate(population_list)
+
+        self.population = [solution for population in population_list
+                           for solution in population]
+        self.population.sort(key=lambda x: x[0])
+        self.island_statistics_list = [island_state["statistics_list"]
+                                       for island_state in island_state_list]
+
+    def get_island_state(self) -> dict:
+        """
+        Gets the part of the state that every island keeps for itself: its
+        population and the convergence state of its generations.
+        Returns the island state as a dict.
+        """
+
+        return {"population": self.population, "best_fitness": self.best_fitness,
+                "mutation_rate": self.mutation_rate, "stall_counter": self.stall_counter,
+                "statistics_list": self.statistics_list}
+
+    def migrate(self, population_list: List[List[Tuple[int, Genome]]]) -> None:
+        """
+        Migrates the best solutions of every island to the next island (in a
+        ring), where they replace the worst solutions.
+        Every population needs to be sorted by fitness, low to high.
+        """
+
+        if self.migration_size < 1:
+            return
+
+        emigrant_list = [population[:self.migration_size] for population in population_list]
+
+        for index, population in enumerate(population_list):
+            immigrants = [(fitness, genome.copy()) for fitness, genome in emigrant_list[index - 1]]
+            population[-len(immigrants):] = immigrants
+
+    def decode(self, genome: Genome,
+               connection_list: Optional[List[Tuple[int, Tuple[int, int]]]]=None) -> int:
+        """
+        Routes the houses of a genome in their routing order to the closest
+        position of the network of their battery without creating cables.
+        When a connection_list is given it gets filled with the house index
+        and the position of the end of the cable of every connection.
+        Returns the amount of cables of the solution.
+        """
+
+        network_list = self.get_empty_network_list()
+        total_cables = 0
+
+        for house_index in genome.order_array:
+            network = network_list[genome.battery_array[house_index]]
+            house_position = self.house_position_list[house_index]
+            distance, end_position = get_closest_position(house_position, network[0])
+            extend_network(network, house_position, end_position)
+
+            # a path has a cable on the start and end cell
+            total_cables += distance + 1
+
+            if connection_list is not None:
+                connection_list.append((house_index, end_position))
+
+        return total_cables
+
+    def draw_solution(self, genome: Genome) -> None:
+        """
+        Decodes a genome and draws the cables of the solution on the grid.
+        The networks are also routed with a chosen orientation for every path
+        (see route_network), the cheaper of both gets drawn. Afterwards the
+        networks are routed as Steiner trees when that saves cables.
+        """
+
+        self.grid.clean_grid()
+
+        connection_list: List[Tuple[int, Tuple[int, int], bool]] = []
+        total_cables = 0
+        for battery_index, battery_position in enumerate(self.battery_position_list):
+            house_index_list = [house_index for house_index in genome.order_array
+                                if genome.battery_array[house_index] == battery_index]
+            battery_cables, battery_connection_list = route_network(
+                battery_position, [self.house_position_list[house_index]
+                                   for house_index in house_index_list])
+            total_cables += battery_cables
+            connection_list += [(house_index, end_position, vertical_first)
+                                for house_index, (end_position, vertical_first)
+                                in zip(house_index_list, battery_connection_list)]
+
+        decoded_connection_list: List[Tuple[int, Tuple[int, int]]] = []
+        if self.decode(genome, decoded_connection_list) <= total_cables:
+            connection_list = [(house_index, end_position, False)
+                               for house_index, end_position in decoded_connection_list]
+
+        for house_index, end_position, vertical_first in connection_list:
+            house = self.house_list[house_index]
+            battery = self.battery_list[genome.battery_array[house_index]]
+
+            battery.capacity -= house.max_output
+            battery.house_list.append(house)
+            house.battery = battery
+            self.grid.allocated_house_list.append(house)
+
+            end_cell = self.grid.get_cell_by_index(end_position[0], end_position[1])
+            self.draw_path(house.cell, end_cell, battery, house, vertical_first)
+
+        self.grid.non_allocated_house_list = []
+
+        saved_cables = optimise_networks(self.grid)
+        print(f"Steiner trees saved {saved_cables} cable(s).")
+
+    def get_grid_genome(self) -> Genome:
+        """
+        Gets the genome of the solution on the grid, the houses are routed in
+        the order they were connected.
+        Returns the solution as a Genome.
+        """
+
+        house_index_dict = {house: house_index for house_index, house in enumerate(self.house_list)}
+        battery_array = array("b", [self.battery_list.index(house.battery)
+                                    for house in self.house_list])
+        order_array = array("h", [house_index_dict[house]
+                                  for house in self.grid.allocated_house_list])
+
+        return Genome(battery_array, order_array)
+
+    def get_empty_network_list(self) -> List[Tuple[List[Tuple[int, int]], set]]:
+        """
+        Gets a network for every battery that only contains the position of the battery.
+        A network is a tuple of a list of positions and a set of the same positions.
+        Returns a list with a network for every battery.
+        """
+
+        return [([position], {position}) for position in self.battery_position_list]
+
+    def get_load_list(self, genome: Genome) -> List[float]:
+        """
+        Calculates the total output of the houses of every battery.
+        Returns a list with the load of every battery.
+        """
+
+        load_list = [0.0] * len(self.battery_position_list)
+        for house_index, battery_index in enumerate(genome.battery_array):
+            load_list[battery_index] += self.house_output_list[house_index]
+
+        return load_list
 
     def draw_path(self, start_cell: Cell, end_cell: Cell, battery: Battery,
-                  house: House) -> None:
-        """ 
-        Draws a path between a house and a battery. 
+                  house: House, vertical_first: bool=False) -> None:
+        """
+        Draws a path between a house and a battery, horizontally first
+        unless vertical_first is True.
         Throws an exception if the house doesn't have a battery connection.
         """
 
-        if house.cell.battery is None:
-            Exception("House misses a battery connection.")
+        connect_house(self.grid, house, battery, end_cell, vertical_first)
 
-        # if the cable doesn't connect directly to the battery, get the rest of
-        # the cable as a connected cable
-        if end_cell.battery != battery:
-            house.shared_cable_list = self.get_shared_cable(end_cell, battery)
+    def __getstate__(self) -> dict:
+        """
+        Gets the state of the algorithm to send it to the worker processes of
+        the island model. The grid and its objects are left out, the genome
+        operators only need the position, output and capacity lists.
+        Returns the state as a dict.
+        """
+
+        state = copy(self.__dict__)
+        for key in ("grid", "house_list", "battery_list", "population"):
+            state.pop(key, None)
+
+        return state
 
-        start_index = start_cell.get_index()
-        end_index = end_cell.get_index()
-
-        delta = (end_index[0] - start_index[0], end_index[1] - start_index[1])
-        incerement_x = 1 if delta[0] > 0 else -1
-        incerement_y = 1 if delta[1] > 0 else -1
-
-        # draw a cable towards the x position of the end_cell
-        for x in range(start_index[0], end_index[0] + incerement_x,
-                       incerement_x):
-            cell = self.grid.grid[x][start_index[1]]
-            cable = Cable(cell, battery, house)
-
-            # creates refrences to multiple lists
-            cell.cable_list.append(cable)
-            house.cable_list.append(cable)
-            battery.cable_list.append(cable)
-            self.grid.cable_list.append(cable)
-
-        # draw a cable towards the y position of the end_cell
-        for y in range(start_index[1] + incerement_y,
-                       end_index[1] + incerement_y, incerement_y):
-            cell = self.grid.grid[end_index[0]][y]
-            cable = Cable(cell, battery, house)
-
-            # creates refrences to multiple lists
-            cell.cable_list.append(cable)
-            house.cable_list.append(cable)
-            battery.cable_list.append(cable)
-            self.grid.cable_list.append(cable)
-
-        if (end_index[0] != house.cable_list[-1].cell.x_index or
-            end_index[1] != house.cable_list[-1].cell.y_index):
-            Exception("Cables are not connected to the" + 
-                      " battery or an other cable") 
-
-
-    def calculate_distance(self, start_cell: Cell, end_cell: Cell) -> int:
-        """ 
-        Calculates the distance between two cells. 
-        Returns the distance.
-        """
-
-        x_distance = abs(start_cell.x_index - end_cell.x_index)
-        y_distance = abs(start_cell.y_index - end_cell.y_index)
-
-        return x_distance + y_distance
-
-
-    def get_shared_cable(self, connected_cable_cell: Cell,
-                         battery: Battery) -> List[Cable]:
-        """ Gets the rest of the cable between the shared connection and the
-        battery. Needs a cell of the connected cable location and the battery
-        to connect to. """
-
-        for cable in connected_cable_cell.cable_list:
-            if cable.battery is battery:
-                cable_index = cable.house.cable_list.index(cable)
-                return cable.house.cable_list[cable_index + 1:]
-            
-        Exception("Could not find a valid connection")
-
-    
-    def generate_greedy_solution(self, grid: Grid) -> None:
-        """ 
-        Generates a random solution based on the Greedy algorithm.
-        """
-        
-        cycle_counter = 1
-
-        while(self.total_houses != len(grid.allocated_house_list)):
-
-            # randomize the order of houses
-            random.shuffle(grid.non_allocated_house_list)
-
-            for house in grid.non_allocated_house_list:
-
-                battery_dict: Dict[Battery, int] = {}
-                cable_dict: Dict[Cable, int] = {}
-
-                # fill the dicts with possible connections and their distance
-                for battery in grid.battery_list:
-                    if battery.capacity >= house.max_output:
-                        distance = self.calculate_distance(house.cell,
-                                                           battery.cell)
-                        battery_dict[battery] = distance
-
-                        for cable in battery.cable_list:
-                            distance = self.calculate_distance(house.cell,
-                                                               cable.cell)
-                            cable_dict[cable] = distance
-                
-                # if there are valid batteries and cables, get the shortest
-                # connection of both
-                if battery_dict and cable_dict:
-                    battery_min_distance = min(battery_dict.values())
-                    cable_min_dinstance = min(cable_dict.values())
-
-                # connect the cable based on the shortest distance to a cable
-                # or directly to a battery
-                if (cable_dict and battery_dict and
-                   cable_min_dinstance < battery_min_distance):
-                    cable: Cable = min(cable_dict, key=cable_dict.get)
-                    cable.battery.capacity -= house.max_output
-                    cable.battery.house_list.append(house)
-                    house.battery = cable.battery
-                    grid.allocated_house_list.append(house)
-                    self.draw_path(house.cell, cable.cell, cable.battery, house)
-                elif battery_dict:
-                    battery: Battery = min(battery_dict, key=battery_dict.get)
-                    battery.capacity -= house.max_output
-                    battery.house_list.append(house)
-                    house.battery = battery
-                    grid.allocated_house_list.append(house)
-                    self.draw_path(battery.cell, house.cell, battery, house)
-                else:
-                    cycle_counter += 1
-                    grid.clean_grid()
-                    grid.allocated_house_list = []                    
-                    break
 
-        print(f"Solution found in {cycle_counter} cycle(s).")
+def evolve_island(evolution: Evolution, island_state: dict,
+                  generations: int, seed: int) -> dict:
+    """
+    Evolves the population of an island for a number of generations. Runs in
+    a worker process of the island model, an empty population gets generated.
+    The island state (see Evolution.get_island_state) continues where the
+    island stopped at the previous migration.
+    Returns the new island state with the population sorted by fitness, low to high.
+    """
+
+    random.seed(seed)
+    evolution.__dict__.update(island_state)
+
+    for _ in range(generations):
+        evolution.next_generation()
+
+    evolution.population.sort(key=lambda x: x[0])
+    return evolution.get_island_state()
+
+
+class Genome():
+    """
+    Class that holds a compact encoding of a solution for the Evolution algorithm.
+    The cables are only created when the genome gets decoded.
 
+    Attributes:
+    battery_array: An array with the index of the battery of every house.
+    order_array: An array with the indices of the houses in the order they get routed.
+    """
 
-    def remove_cable(self, cable: Cable) -> None:
-        """ 
-        Removes a given cable from all related lists.
+    def __init__(self, battery_array: array, order_array: array) -> None:
+        """
+        Initializes a Genome with a battery array and an order array.
         """
 
-        try:
-            cable.cell.cable_list.remove(cable)
-        except ValueError:
-            pass
-        try:
-            cable.house.cable_list.remove(cable)
-        except ValueError:
-            pass
-        try:
-            cable.battery.cable_list.remove(cable)
-        except ValueError:
-            pass
-        try:
-            self.grid.cable_list.remove(cable)
-        except ValueError:
-            pass
+        self.battery_array: array = battery_array
+        self.order_array: array = order_array
+
+    def copy(self) -> Genome:
+        """
+        Copies the genome.
+        Returns a new Genome with copies of the arrays.
+        """
 
+        return Genome(self.battery_array[:], self.order_array[:])
 
+    def __repr__(self) -> str:
+        return f"Genome with {len(self.battery_array)} house(s)"
@@ -1,15 +1,19 @@
 import random
-from typing import List
+import heapq
+import bisect
+from typing import List, Dict, Tuple, Optional
 from copy import copy
 from code.algorithms.algorithm import Algorithm
 from code.classes.grid import Grid
 from code.classes.battery import Battery
 from code.classes.house import House
-from code.classes.cable import Cable
+from code.classes.cable_router import connect_house, calculate_distance
 
 class Greediest(Algorithm):
     """ Class that implements the greediest algorithm
-    for the smart grid problem."""
+    for the smart grid problem. Houses are connected with regret-k
+    insertion: the house that loses the most when it can't get its closest
+    battery is connected first."""
 
     def __init__(self, grid: Grid) -> None:
         """ Initializes the greediest algorithm.
@@ -17,118 +21,185 @@ class Greediest(Algorithm):
         - grid as Grid object. """
 
         self.grid: Grid = grid
-        total_houses = len(self.grid.non_allocated_house_list)   
-        self.threshold = total_houses * 0.90 # 90% self.threshold
+        # the amount of batteries a house compares to its closest battery
+        self.regret_k = 2
+        # random noise on the distances when a previous cycle got stuck
+        self.noise = 2.0
 
     def calculate_solution(self) -> None:
-        """ Executes the greedy algorithm in combination with the random
-        algorithm to create a grid with valid battery and house connections
-        by connecting houses to the closest available batteries and randomly.
+        """ Executes the regret-k insertion to create a grid with valid
+        battery and house connections. Assigns the houses from a priority
+        queue, ordered on the difference between the distance to the closest
+        battery and the next batteries that still have room.
         All paths are directly connected to the battery. """
 
         cycle_counter = 1
+        house_list = copy(self.grid.non_allocated_house_list)
 
-        total_houses = len(self.grid.non_allocated_house_list)   
-
-        distance_list = []
-        for house in self.grid.non_allocated_house_list:
-            for battery in self.grid.battery_list:
-                distance = self.calculate_distance(battery, house)
-                distance_list.append((distance, house, battery))
-        
-        # Sort the list by distance
-        distance_list.sort(key=lambda x: x[0])
-
-        while len(self.grid.allocated_house_list) != total_houses:
-
-            non_allocated_houses = copy(self.grid.non_allocated_house_list)
-            # Iterate over sorted list and make connections
-            for distance, house, battery in distance_list:
-                if (battery.capacity >= house.max_output and house
-                    not in self.grid.allocated_house_list and
-                    len(self.grid.allocated_house_list) < self.threshold):
-                    battery.capacity -= house.max_output
-                    battery.house_list.append(house)
-                    house.battery = battery
-                    self.grid.allocated_house_list.append(house)
-                    non_allocated_houses.remove(house)
-
-            random.shuffle(non_allocated_houses)
-
-            for house in non_allocated_houses:
-                
-                tmp_battery_list: List[Battery] = copy(self.grid.battery_list)
-
-                while len(tmp_battery_list) > 0:
-                    random.shuffle(tmp_battery_list)
-                    battery = tmp_battery_list.pop()
-
-                    if battery.capacity >= house.max_output:
-                        battery.capacity -= house.max_output
-                        battery.house_list.append(house)
-                        house.battery = battery
-                        self.grid.allocated_house_list.append(house)
-                        break
-
-                if len(tmp_battery_list) == 0 and house.battery is None:
-                    cycle_counter += 1
-                    self.grid.clean_grid()
-                    self.grid.allocated_house_list = []
-                    break
+        while not self.assign_houses(house_list, cycle_counter > 1):
+            cycle_counter += 1
+            self.grid.clean_grid()
 
         for house in self.grid.allocated_house_list:
             self.draw_path(house.battery, house)
 
         print(f"Solution found in {cycle_counter} cycle(s).")
 
+    def assign_houses(self, house_list: List[House], use_noise: bool) -> bool:
+        """ Assigns every house to a battery with regret-k insertion.
+        The queue is lazy: when a battery gets too full for a house, only
+        that house gets a new entry, older entries are skipped.
+
+        - house_list as a list of House objects.
+        - use_noise as a bool, adds random noise to the distances.
+
+        Returns: True if every house got a battery. """
+
+        battery_list = self.grid.battery_list
+        distance_dict: Dict[House, List[Tuple[float, int]]] = {}
+        for house in house_list:
+            distance_dict[house] = sorted(
+                (calculate_distance(house.cell, battery.cell) +
+                 (random.uniform(0, self.noise) if use_noise else 0), battery_index)
+                for battery_index, battery in enumerate(battery_list))
+
+        # the houses sorted on output, to find the houses that don't fit
+        # anymore when the capacity of a battery drops
+        output_list = sorted((house.max_output, index) for index, house in enumerate(house_list))
+        output_key_list = [output for output, _ in output_list]
+
+        capacity_dict = {battery: battery.capacity for battery in battery_list}
+        unassigned_set = set(range(len(house_list)))
+        version_list = [0] * len(house_list)
+        queue = []
+        for index, house in enumerate(house_list):
+            heapq.heappush(queue, self.get_queue_entry(house, index, distance_dict[house], 0))
+
+        while unassigned_set:
+            if not queue:
+                return False
+
+            _, _, _, version, index = heapq.heappop(queue)
+            if index not in unassigned_set or version != version_list[index]:
+                continue
+
+            house = house_list[index]
+            option_list = [battery_index for _, battery_index in distance_dict[house]
+                           if battery_list[battery_index].capacity >= house.max_output]
+            if option_list:
+                battery = battery_list[option_list[0]]
+            else:
+                battery = self.make_room(house)
+                if battery is None:
+                    return False
+
+            battery.capacity -= house.max_output
+            battery.house_list.append(house)
+            house.battery = battery
+            self.grid.allocated_house_list.append(house)
+            unassigned_set.remove(index)
+
+            # houses that don't fit in a battery anymore get a new regret
+            for other_battery in battery_list:
+                start = bisect.bisect_right(output_key_list, other_battery.capacity)
+                end = bisect.bisect_right(output_key_list, capacity_dict[other_battery])
+                capacity_dict[other_battery] = other_battery.capacity
+                for _, other_index in output_list[start:end]:
+                    if other_index in unassigned_set:
+                        version_list[other_index] += 1
+                        other_house = house_list[other_index]
+                        heapq.heappush(queue, self.get_queue_entry(other_house, other_index,
+                                                                   distance_dict[other_house],
+                                                                   version_list[other_index]))
+
+        return True
+
+    def make_room(self, house: House) -> Optional[Battery]:
+        """ Makes room for a house that doesn't fit in any battery by moving
+        an assigned house to another battery or swapping it with a smaller
+        house of another battery. Picks the move with the least extra
+        distance.
+
+        - house as a House object.
+
+        Returns: the battery that has room for the house or None if no move
+        was found. """
+
+        best_move = None
+        for battery in self.grid.battery_list:
+            for other_house in battery.house_list:
+                for new_battery in self.grid.battery_list:
+                    if new_battery is battery:
+                        continue
+
+                    # move the other house, or swap it with a smaller house
+                    for swap_house in [None] + new_battery.house_list:
+                        swap_output = 0 if swap_house is None else swap_house.max_output
+                        difference = other_house.max_output - swap_output
+                        if (battery.capacity + difference < house.max_output or
+                            new_battery.capacity < difference):
+                            continue
+
+                        cost = (calculate_distance(house.cell, battery.cell) +
+                                calculate_distance(other_house.cell, new_battery.cell) -
+                                calculate_distance(other_house.cell, battery.cell))
+                        if swap_house is not None:
+                            cost += (calculate_distance(swap_house.cell, battery.cell) -
+                                     calculate_distance(swap_house.cell, new_battery.cell))
+
+                        if best_move is None or cost < best_move[0]:
+                            best_move = (cost, battery, other_house, new_battery, swap_house)
+
+        if best_move is None:
+            return None
+
+        _, battery, other_house, new_battery, swap_house = best_move
+        battery.capacity += other_house.max_output
+        battery.house_list.remove(other_house)
+        new_battery.capacity -= other_house.max_output
+        new_battery.house_list.append(other_house)
+        other_house.battery = new_battery
+
+        if swap_house is not None:
+            new_battery.capacity += swap_house.max_output
+            new_battery.house_list.remove(swap_house)
+            battery.capacity -= swap_house.max_output
+            battery.house_list.append(swap_house)
+            swap_house.battery = battery
+
+        return battery
+
+    def get_queue_entry(self, house: House, index: int, distance_list: List[Tuple[float, int]],
+                        version: int) -> Tuple[float, float, float, int, int]:
+        """ Calculates the priority queue entry of a house. The regret is the
+        sum of the differences between the closest battery and the next k - 1
+        batteries that still have room. A house with only one battery left
+        goes first, a house without a battery makes the queue fail.
+
+        - house as a House object.
+        - index as an int for the index of the house.
+        - distance_list as a sorted list of the distance and index of every
+        battery.
+        - version as an int, only the newest entry of a house is used.
+
+        Returns: a tuple that sorts the house with the highest regret first. """
+
+        option_list = [distance for distance, battery_index in distance_list
+                       if self.grid.battery_list[battery_index].capacity >= house.max_output]
+
+        if len(option_list) <= 1:
+            regret = float("inf")
+        else:
+            regret = sum(distance - option_list[0] for distance in option_list[1:self.regret_k])
+
+        closest_distance = option_list[0] if option_list else 0
+
+        return (-regret, closest_distance, random.random(), version, index)
+
     def draw_path(self, battery: Battery, house: House) -> None:
         """ Method that draws a path between the house and battery.
 
         - battery as a battery object for the battery connection
         - house as the house connection for the house connection. """
 
-        if battery is None:
-            Exception("House misses a battery connection.")
-
-        house_index = house.cell.get_index()
-        battery_index = battery.cell.get_index()
-
-        delta = (battery_index[0] - house_index[0],
-                 battery_index[1] - house_index[1])
-        incerement_x = 1 if delta[0] > 0 else -1
-        incerement_y = 1 if delta[1] > 0 else -1
-
-        for x in range(house_index[0], battery_index[0] + incerement_x,
-                       incerement_x):
-            cell = self.grid.grid[x][house_index[1]]
-            cable = Cable(cell, battery, house)
-            cell.cable_list.append(cable)
-            house.cable_list.append(cable)
-            self.grid.cable_list.append(cable)
-
-        for y in range(house_index[1] + incerement_y,
-                       battery_index[1] + incerement_y, incerement_y):
-            cell = self.grid.grid[battery_index[0]][y]
-            cable = Cable(cell, battery, house)
-            cell.cable_list.append(cable)
-            house.cable_list.append(cable)
-            self.grid.cable_list.append(cable)
-
-        if (battery_index[0] != house.cable_list[-1].cell.x_index or
-            battery_index[1] != house.cable_list[-1].cell.y_index):
-            Exception("Cables are not connected to the battery") 
-
-    def calculate_distance(self, battery: Battery, house: House) -> int:
-        """ Calculates the distance between a house and a battery. 
-        Distance is in cells.
-
-        - battery as Battery object.
-        - house as House object.
-
-        Returns: the distance between the the house and battery in grid cells
-        as an int. """
-
-        x_distance = abs(battery.cell.x_index - house.cell.x_index)
-        y_distance = abs(battery.cell.y_index - house.cell.y_index)
-
-        return x_distance + y_distance
+        connect_house(self.grid, house, battery)
@@ -1,5 +1,7 @@
+from __future__ import annotations
+
 import random
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from copy import copy, deepcopy
 from code.algorithms.algorithm import Algorithm
 from code.algorithms.greedy_shared import GreedyShared
@@ -8,6 +10,8 @@ from code.classes.cell import Cell
 from code.classes.battery import Battery
 from code.classes.house import House
 from code.classes.cable import Cable
+from code.classes.cable_router import connect_house, get_closest_cell
+from code.classes.steiner_tree import optimise_networks
 
 
 class GreedyBeamSearch(Algorithm):
@@ -28,7 +32,7 @@ class GreedyBeamSearch(Algorithm):
         # decide how may houses (out of 150) that are being run by this algorithm
         # all houses up to this point will be allocated with a greedy algorithm
         self.total_house_algorithm = 25
-        self.beam_width = 5
+        self.beam_width = 3
         self.lookahead_depth = 10
 
     def calculate_solution(self) -> None:
@@ -49,74 +53,169 @@ class GreedyBeamSearch(Algorithm):
             random.shuffle(extra_house_list)
             self.grid.non_allocated_house_list = copy(extra_house_list)
 
+            # states of the lookahead tree that are kept between houses
+            states: List[State] = []
+
             for house in extra_house_list:
                 print(f"House: {extra_house_list.index(house) + 1}")
 
-                states: List[State] = [State(deepcopy(self.grid))]
                 if self.lookahead_depth > len(self.grid.non_allocated_house_list):
                     self.lookahead_depth = len(self.grid.non_allocated_house_list)
 
-                for depth in range(self.lookahead_depth):
-                    
-                    next_gen_states: List[State] = []
-
-                    for state in states:
-                        if not state.grid.non_allocated_house_list:
-                            break
-                        
-                        lookahead_house = state.grid.non_allocated_house_list[0]
-                        for battery in state.grid.battery_list:
-                            if battery.capacity > lookahead_house.max_output:
-                                child_state = State(deepcopy(state.grid), depth + 1,
-                                                    copy(state.battery_history_dict),
-                                                    copy(state.end_cell_history_dict))
-
-                                child_battery = child_state.grid.get_battery_by_object(battery)
-                                child_house = child_state.grid.get_house_by_object(lookahead_house)
-
-                                # get the shortest cable connection (use battery as base distance)
-                                shortest_distance = self.calculate_distance(child_house.cell,
-                                                                            child_battery.cell)
-                                shortest_distance_cell = child_battery.cell
-                                for cable in child_battery.cable_list:
-                                    distance = self.calculate_distance(child_house.cell,
-                                                                       cable.cell)
-                                    if distance < shortest_distance:
-                                        shortest_distance = distance
-                                        shortest_distance_cell = cable.cell
-
-                                self.create_connection(child_state.grid,
-                                                       child_battery,
-                                                       child_house,
-                                                       shortest_distance_cell)
-
-                                # add battery to the state history and append
-                                # the state the the next gen state list
-                                child_state.add_battery(depth + 1, battery)
-                                child_state.add_cell(depth + 1, shortest_distance_cell)
-                                child_state.update()
-                                next_gen_states.append(child_state)
-
-                    # prune the results to match the beam size
-                    if len(next_gen_states) > self.beam_width:
-                        next_gen_states.sort(key=lambda x: x.total_cables)
-                        next_gen_states = next_gen_states[:self.beam_width]
-
-                    states = next_gen_states
+                # build the full lookahead tree for the first house, after
+                # that only the deepest level of the kept subtree is extended
+                if not states:
+                    root_state = State(deepcopy(self.grid), distance_dict=
+                                       self.get_distance_dict(self.grid))
+                    states = self.expand_states([root_state], 1,
+                                                self.lookahead_depth)
+                else:
+                    states = self.expand_states(states, self.lookahead_depth,
+                                                self.lookahead_depth)
 
                 # choose the battery with the best future outlook
                 if len(states) > 0:
-                    best_state = min(states, key=lambda x: x.total_cables)
+                    best_state = min(states, key=lambda x: x.estimated_total_cables)
                     battery = self.grid.get_battery_by_object(best_state.battery_history_dict[1])
                     end_cell = self.grid.get_cell_by_object(best_state.end_cell_history_dict[1])
                     house.cable_list = []
                     self.create_connection(self.grid, battery, house, end_cell)
+                    states = self.get_surviving_states(states, best_state)
                 else:
                     cycle_counter += 1
                     self.grid.clean_grid()
                     break
 
+        # choose the orientation of the paths of the finished networks
+        GreedyShared(self.grid).reroute_networks()
+        saved_cables = optimise_networks(self.grid)
+
         print(f"Solution found in {cycle_counter} cycle(s).")
+        print(f"Steiner trees saved {saved_cables} cable(s).")
+
+    def expand_states(self, states: List[State], start_depth: int,
+                      end_depth: int) -> List[State]:
+        """ Expands the lookahead tree from start_depth up to and including
+        end_depth. Every level connects the next non allocated house to every
+        battery with enough capacity and prunes the children to the beam
+        width.
+
+        - states as a list of State objects to expand.
+        - start_depth as an int for the depth of the first new level.
+        - end_depth as an int for the depth of the last new level.
+
+        The states are pruned on their cables so far plus an estimate of the
+        cables the remaining houses still need.
+
+        Returns: a list of State objects of the deepest level. """
+
+        for depth in range(start_depth - 1, end_depth):
+
+            next_gen_states: List[State] = []
+
+            for state in states:
+                # states that allocated every house can't be extended
+                if not state.grid.non_allocated_house_list:
+                    next_gen_states.append(state)
+                    continue
+
+                lookahead_house = state.grid.non_allocated_house_list[0]
+                for battery in state.grid.battery_list:
+                    # the batteries in the cells hold the capacity of the state
+                    state_battery = state.grid.get_battery_by_object(battery)
+                    if state_battery.capacity > lookahead_house.max_output:
+                        child_state = State(deepcopy(state.grid), depth + 1,
+                                            copy(state.battery_history_dict),
+                                            copy(state.end_cell_history_dict),
+                                            state.copy_distance_dict())
+
+                        child_battery = child_state.grid.get_battery_by_object(battery)
+                        child_house = child_state.grid.get_house_by_object(lookahead_house)
+
+                        # get the shortest cable connection (use battery as base distance)
+                        _, shortest_distance_cell = get_closest_cell(child_house.cell,
+                                                                     child_battery)
+
+                        total_cables = len(child_state.grid.cable_list)
+                        self.create_connection(child_state.grid,
+                                               child_battery,
+                                               child_house,
+                                               shortest_distance_cell)
+
+                        # add battery to the state history and append
+                        # the state the the next gen state list
+                        child_state.add_battery(depth + 1, battery)
+                        child_state.add_cell(depth + 1, shortest_distance_cell)
+                        child_state.update_distance_dict(child_house, child_battery,
+                                                         child_state.grid.cable_list[total_cables:])
+                        child_state.update()
+                        next_gen_states.append(child_state)
+
+            # prune the results to match the beam size
+            if len(next_gen_states) > self.beam_width:
+                next_gen_states.sort(key=lambda x: x.estimated_total_cables)
+                next_gen_states = next_gen_states[:self.beam_width]
+
+            states = next_gen_states
+
+        return states
+
+    def get_surviving_states(self, states: List[State],
+                             best_state: State) -> List[State]:
+        """ Gets the subtree of states below the committed choice of the best
+        state. The history of the surviving states is shifted one generation
+        so their first choice becomes the choice for the next house.
+
+        - states as a list of State objects of the deepest level.
+        - best_state as the State object the committed choice was taken from.
+
+        Returns: a list of State objects that can be reused for the next
+        house. """
+
+        battery_index = best_state.battery_history_dict[1].cell.get_index()
+        end_cell_index = best_state.end_cell_history_dict[1].get_index()
+
+        surviving_states: List[State] = []
+        for state in states:
+            if (state.battery_history_dict[1].cell.get_index() != battery_index or
+                state.end_cell_history_dict[1].get_index() != end_cell_index):
+                continue
+
+            battery_dict = {depth - 1: battery for depth, battery
+                            in state.battery_history_dict.items() if depth > 1}
+            end_cell_dict = {depth - 1: cell for depth, cell
+                             in state.end_cell_history_dict.items() if depth > 1}
+
+            surviving_states.append(State(state.grid, state.grid_gen - 1,
+                                          battery_dict, end_cell_dict,
+                                          state.distance_dict))
+
+        return surviving_states
+
+    def get_distance_dict(self, grid: Grid) -> Dict[Tuple[int, int],
+                                                     Dict[Tuple[int, int], int]]:
+        """ Gets the distance of every non allocated house to the closest
+        cable or cell of every battery. Used as the base of the estimate of
+        the remaining cables of a state.
+
+        - grid as Grid object.
+
+        Returns: a dict with the index of the house as key and a dict with
+        the index of the battery as key and the distance as value. """
+
+        distance_dict: Dict[Tuple[int, int], Dict[Tuple[int, int], int]] = {}
+
+        for house in grid.non_allocated_house_list:
+            battery_distance_dict: Dict[Tuple[int, int], int] = {}
+
+            for battery in grid.battery_list:
+                grid_battery = grid.get_battery_by_object(battery)
+                shortest_distance, _ = get_closest_cell(house.cell, grid_battery)
+                battery_distance_dict[grid_battery.cell.get_index()] = shortest_distance
+
+            distance_dict[house.cell.get_index()] = battery_distance_dict
+
+        return distance_dict
 
     def create_connection(self, grid: Grid, battery: Battery, house: House,
                           end_cell: Cell) -> None:
@@ -135,7 +234,8 @@ class GreedyBeamSearch(Algorithm):
         self.draw_path(grid, house.cell, end_cell, battery, house)
 
     def draw_path(self, grid: Grid, start_cell: Cell, end_cell: Cell,
-                  battery: Battery, house: House) -> None:
+                  battery: Battery, house: House,
+                  vertical_first: bool=False) -> None:
         """ Method that draws a path between a start cell and end cell.
         Can connect to other cables and stores the rest of the cable between
         the connection and the battery in the house shared_cable_list.
@@ -143,86 +243,13 @@ class GreedyBeamSearch(Algorithm):
         - start_cell as a Cell object as start of the cable
         - end_cell as a Cell object as end of the cable
         - battery as a battery object for the battery connection
-        - house as the house connection for the house connection. """
-
-        if house.cell.battery is None:
-            Exception("House misses a battery connection.")
-
-        # if the cable doesn't connect directly to the battery, get the rest of
-        # the cable as a connected cable
-        if end_cell.battery != battery:
-            house.shared_cable_list = self.get_shared_cable(end_cell, battery)
-
-        start_index = start_cell.get_index()
-        end_index = end_cell.get_index()
-
-        delta = (end_index[0] - start_index[0], end_index[1] - start_index[1])
-        incerement_x = 1 if delta[0] > 0 else -1
-        incerement_y = 1 if delta[1] > 0 else -1
-
-        # draw a cable towards the x position of the end_cell
-        for x in range(start_index[0], end_index[0] + incerement_x,
-                       incerement_x):
-            cell = grid.grid[x][start_index[1]]
-            cable = Cable(cell, battery, house)
-
-            # creates refrences to multiple lists
-            cell.cable_list.append(cable)
-            house.cable_list.append(cable)
-            battery.cable_list.append(cable)
-            grid.cable_list.append(cable)
-
-        # draw a cable towards the y position of the end_cell
-        for y in range(start_index[1] + incerement_y,
-                       end_index[1] + incerement_y, incerement_y):
-            cell = grid.grid[end_index[0]][y]
-            cable = Cable(cell, battery, house)
-
-            # creates refrences to multiple lists
-            cell.cable_list.append(cable)
-            house.cable_list.append(cable)
-            battery.cable_list.append(cable)
-            grid.cable_list.append(cable)
-
-        if (end_index[0] != house.cable_list[-1].cell.x_index or
-            end_index[1] != house.cable_list[-1].cell.y_index):
-            Exception("Cables are not connected to the" + 
-                      " battery or an other cable") 
-
-    def calculate_distance(self, start_cell: Cell, end_cell: Cell) -> int:
-        """ Calculates the distance between two cells. 
-        Distance is in cells.
-
-        - start_cell as Cell object.
-        - end_cell as Cell object.
-
-        Returns: the distance between the two cells in grid cells
-        as an int. """
-
-        x_distance = abs(start_cell.x_index - end_cell.x_index)
-        y_distance = abs(start_cell.y_index - end_cell.y_index)
-
-        return x_distance + y_distance
-    
-    def get_shared_cable(self, connected_cable_cell: Cell,
-                         battery: Battery) -> List[Cable]:
-        """ Gets the rest of the cable between the shared connection and the
-        battery. Needs a cell of the connected cable location and the battery
-        to connect to.
-        
-        - connected_cable_cell as a Cell object
-        - battery as a Battery object
-        
-        Returns: a list of Cable objects that are shared with
-        another house. """
+        - house as the house connection for the house connection.
 
-        for cable in connected_cable_cell.cable_list:
-            if cable.battery is battery:
-                cable_index = cable.house.cable_list.index(cable)
-                return cable.house.cable_list[cable_index + 1:]
-            
-        Exception("Could not find a valid connection")
+        Optional parameters:
+        - vertical_first as a bool, draws the path towards the y position of
+        the end_cell first (Default = False). """
 
+        connect_house(grid, house, battery, end_cell, vertical_first)
 
 class State():
     """ Class used for the storage of a grid state and extra info about
@@ -230,7 +257,9 @@ class State():
 
     def __init__(self, grid: Grid, grid_gen=0,
                  battery_dict: Dict[int, Battery]={},
-                 end_cell_dict: Dict[int, Cell]={}) -> None:
+                 end_cell_dict: Dict[int, Cell]={},
+                 distance_dict: Dict[Tuple[int, int],
+                                     Dict[Tuple[int, int], int]]={}) -> None:
         """ Initializes a State object used to store the state of a grid.
         
         - grid as Grid object
@@ -242,16 +271,23 @@ class State():
         previous battery choices.
         end_cell_dict as a lsit of Cell objects used to track the cable
         connection points or battery connection points of previous generation
-        choices. """
+        choices.
+        - distance_dict as a dict with the distance of every non allocated
+        house to every battery network (see
+        GreedyBeamSearch.get_distance_dict()). """
         
         self.grid: Grid = grid
 
         self.grid_gen = grid_gen
         self.battery_history_dict: Dict[int, Battery] = battery_dict
         self.end_cell_history_dict: Dict[int, Battery] = end_cell_dict
+        self.distance_dict: Dict[Tuple[int, int],
+                                 Dict[Tuple[int, int], int]] = distance_dict
         self.total_cables = len(grid.cable_list)
         self.total_assigned_houses = len(grid.allocated_house_list)
         self.total_non_assigned_houses = len(grid.non_allocated_house_list)
+        self.estimated_total_cables = (self.total_cables +
+                                       self.calculate_remaining_cables())
 
     def update(self) -> None:
         """ Update the stats of the instance acording to the grid. """
@@ -259,6 +295,65 @@ class State():
         self.total_cables = len(self.grid.cable_list)
         self.total_assigned_houses = len(self.grid.allocated_house_list)
         self.total_non_assigned_houses = len(self.grid.non_allocated_house_list)
+        self.estimated_total_cables = (self.total_cables +
+                                       self.calculate_remaining_cables())
+
+    def calculate_remaining_cables(self) -> int:
+        """ Estimates the amount of cables the non allocated houses still
+        need. Every house needs at least the cables to the closest network of
+        a battery with enough capacity (the path itself and the cell of the
+        house).
+
+        Returns: the estimated amount of cables as an int. """
+
+        remaining_cables = 0
+
+        for house_index, battery_distance_dict in self.distance_dict.items():
+            house = self.grid.grid[house_index[0]][house_index[1]].house
+            shortest_distance = None
+
+            for battery_index, distance in battery_distance_dict.items():
+                battery = self.grid.grid[battery_index[0]][battery_index[1]].battery
+                if (battery.capacity > house.max_output and
+                    (shortest_distance is None or distance < shortest_distance)):
+                    shortest_distance = distance
+
+            if shortest_distance is not None:
+                remaining_cables += shortest_distance + 1
+
+        return remaining_cables
+
+    def copy_distance_dict(self) -> Dict[Tuple[int, int],
+                                         Dict[Tuple[int, int], int]]:
+        """ Copies the distance dict so it can be changed by a child state.
+
+        Returns: a copy of the distance dict. """
+
+        return {house_index: copy(battery_distance_dict) for house_index,
+                battery_distance_dict in self.distance_dict.items()}
+
+    def update_distance_dict(self, house: House, battery: Battery,
+                             cable_list: List[Cable]) -> None:
+        """ Removes the allocated house from the distance dict and lowers
+        the distances of the other houses to the network of the battery with
+        the new cables.
+
+        - house as the House object that has been allocated.
+        - battery as the Battery object the house is connected to.
+        - cable_list as a list of the new Cable objects. """
+
+        self.distance_dict.pop(house.cell.get_index(), None)
+        battery_index = battery.cell.get_index()
+
+        for house_index, battery_distance_dict in self.distance_dict.items():
+            shortest_distance = battery_distance_dict[battery_index]
+            for cable in cable_list:
+                distance = (abs(house_index[0] - cable.cell.x_index) +
+                            abs(house_index[1] - cable.cell.y_index))
+                if distance < shortest_distance:
+                    shortest_distance = distance
+
+            battery_distance_dict[battery_index] = shortest_distance
 
     def add_battery(self, depth: int, battery: Battery) -> None:
         """ Adds a battery to the battery history dict.
@@ -282,5 +377,6 @@ class State():
                 f"Battery dict:            {self.battery_history_dict}\n" + 
                 f"End Cell dict:           {self.end_cell_history_dict}\n" +
                 f"Total cables:            {self.total_cables}\n" +
+                f"Estimated total cables:  {self.estimated_total_cables}\n" +
                 f"Total assigned houses:   {self.total_assigned_houses}\n" +
                 f"Total unassigned houses: {self.total_non_assigned_houses}\n")
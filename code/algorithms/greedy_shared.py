@@ -1,11 +1,13 @@
 import random
-from typing import List, Dict
+from typing import Tuple, Optional
 from code.algorithms.algorithm import Algorithm
 from code.classes.grid import Grid
 from code.classes.cell import Cell
 from code.classes.battery import Battery
 from code.classes.house import House
-from code.classes.cable import Cable
+from code.classes.cable_router import (connect_house, route_network, remove_network,
+                                       get_closest_cell)
+from code.classes.steiner_tree import optimise_networks
 
 
 class GreedyShared(Algorithm):
@@ -45,46 +47,26 @@ class GreedyShared(Algorithm):
 
             for house in house_list:
 
-                battery_dict: Dict[Battery, int] = {}
-                cable_dict: Dict[Cable, int] = {}
+                best_connection: Optional[Tuple[Tuple[int, bool], Battery, Cell]] = None
 
-                # fill the dicts with possible connections and their distance
+                # get the shortest connection of the batteries with room, a
+                # cable is only used when it is strictly closer than a battery
                 for battery in self.grid.battery_list:
                     if battery.capacity >= house.max_output:
-                        distance = self.calculate_distance(house.cell,
-                                                           battery.cell)
-                        battery_dict[battery] = distance
-
-                        for cable in battery.cable_list:
-                            distance = self.calculate_distance(house.cell,
-                                                               cable.cell)
-                            cable_dict[cable] = distance
-
-                # if there are valid batteries and cables, get the shortest
-                # connection of both
-                if battery_dict and cable_dict:
-                    battery_min_distance = min(battery_dict.values())
-                    cable_min_dinstance = min(cable_dict.values())
-
-                # connect the cable based on the shortest distance to a cable
-                # or directly to a battery
-                if (cable_dict and battery_dict and
-                   cable_min_dinstance < battery_min_distance):
-                    cable: Cable = min(cable_dict, key=cable_dict.get)
-                    cable.battery.capacity -= house.max_output
-                    cable.battery.house_list.append(house)
-                    house.battery = cable.battery
-                    self.grid.allocated_house_list.append(house)
-                    self.grid.non_allocated_house_list.pop(0)
-                    self.draw_path(house.cell, cable.cell, cable.battery, house)
-                elif battery_dict:
-                    battery: Battery = min(battery_dict, key=battery_dict.get)
+                        distance, end_cell = get_closest_cell(house.cell, battery)
+                        key = (distance, end_cell is not battery.cell)
+
+                        if best_connection is None or key < best_connection[0]:
+                            best_connection = (key, battery, end_cell)
+
+                if best_connection is not None:
+                    _, battery, end_cell = best_connection
                     battery.capacity -= house.max_output
                     battery.house_list.append(house)
                     house.battery = battery
                     self.grid.allocated_house_list.append(house)
                     self.grid.non_allocated_house_list.pop(0)
-                    self.draw_path(house.cell, battery.cell, battery, house)
+                    self.draw_path(house.cell, end_cell, battery, house)
                 else:
                     cycle_counter += 1
                     self.grid.clean_grid()
@@ -94,8 +76,41 @@ class GreedyShared(Algorithm):
         if use_print_statements:
             print(f"Solution found in {cycle_counter} cycle(s).")
 
+        if subtract_total_houses == 0:
+            self.reroute_networks()
+            saved_cables = optimise_networks(self.grid)
+            if use_print_statements:
+                print(f"Steiner trees saved {saved_cables} cable(s).")
+
+    def reroute_networks(self) -> None:
+        """ Routes the network of every battery again in the same connection
+        order, but chooses the orientation of every path so that the network
+        gets closer to the houses that are connected later. A network only
+        gets replaced when it needs less cables. """
+
+        for battery in self.grid.battery_list:
+            house_list = battery.house_list
+            total_cables, connection_list = route_network(
+                battery.cell.get_index(), [house.cell.get_index() for house in house_list])
+
+            if total_cables >= len(battery.cable_list):
+                continue
+
+            remove_network(self.grid, battery)
+
+            for house, (end_position, vertical_first) in zip(house_list, connection_list):
+                house.cable_list = []
+                house.shared_cable_list = []
+
+                if end_position == battery.cell.get_index():
+                    end_cell = battery.cell
+                else:
+                    end_cell = self.grid.get_cell_by_index(end_position[0], end_position[1])
+
+                self.draw_path(house.cell, end_cell, battery, house, vertical_first)
+
     def draw_path(self, start_cell: Cell, end_cell: Cell, battery: Battery,
-                  house: House) -> None:
+                  house: House, vertical_first: bool=False) -> None:
         """ Method that draws a path between a start cell and end cell.
         Can connect to other cables and stores the rest of the cable between
         the connection and the battery in the house shared_cable_list.
@@ -103,82 +118,10 @@ class GreedyShared(Algorithm):
         - start_cell as a Cell object as start of the cable
         - end_cell as a Cell object as end of the cable
         - battery as a battery object for the battery connection
-        - house as the house connection for the house connection. """
-
-        if house.cell.battery is None:
-            Exception("House misses a battery connection.")
-
-        # if the cable doesn't connect directly to the battery, get the rest of
-        # the cable as a connected cable
-        if end_cell.battery != battery:
-            house.shared_cable_list = self.get_shared_cable(end_cell, battery)
-
-        start_index = start_cell.get_index()
-        end_index = end_cell.get_index()
-
-        delta = (end_index[0] - start_index[0], end_index[1] - start_index[1])
-        incerement_x = 1 if delta[0] > 0 else -1
-        incerement_y = 1 if delta[1] > 0 else -1
-
-        # draw a cable towards the x position of the end_cell
-        for x in range(start_index[0], end_index[0] + incerement_x,
-                       incerement_x):
-            cell = self.grid.grid[x][start_index[1]]
-            cable = Cable(cell, battery, house)
-
-            # creates refrences to multiple lists
-            cell.cable_list.append(cable)
-            house.cable_list.append(cable)
-            battery.cable_list.append(cable)
-            self.grid.cable_list.append(cable)
-
-        # draw a cable towards the y position of the end_cell
-        for y in range(start_index[1] + incerement_y,
-                       end_index[1] + incerement_y, incerement_y):
-            cell = self.grid.grid[end_index[0]][y]
-            cable = Cable(cell, battery, house)
-
-            # creates refrences to multiple lists
-            cell.cable_list.append(cable)
-            house.cable_list.append(cable)
-            battery.cable_list.append(cable)
-            self.grid.cable_list.append(cable)
-
-        if (end_index[0] != house.cable_list[-1].cell.x_index or
-            end_index[1] != house.cable_list[-1].cell.y_index):
-            Exception("Cables are not connected to the" + 
-                      " battery or an other cable") 
-
-    def calculate_distance(self, start_cell: Cell, end_cell: Cell) -> int:
-        """ Calculates the distance between two cells. 
-        Distance is in cells.
-
-        - start_cell as Cell object.
-        - end_cell as Cell object.
-
-        Returns: the distance between the two cells in grid cells
-        as an int. """
-
-        x_distance = abs(start_cell.x_index - end_cell.x_index)
-        y_distance = abs(start_cell.y_index - end_cell.y_index)
-
-        return x_distance + y_distance
-
-    def get_shared_cable(self, connected_cable_cell: Cell,
-                         battery: Battery) -> List[Cable]:
-        """ Gets the rest of the cable between the shared connection and the
-        battery. Needs a cell of the connected cable location and the battery
-        to connect to.
-        
-        - connected_cable_cell as a Cell object
-        - battery as a Battery object
-        
-        Returns: a list of Cable objects that are shared with
-        another house. """
-
-        for cable in connected_cable_cell.cable_list:
-            if cable.battery is battery:
-                cable_index = cable.house.cable_list.index(cable)
-                return cable.house.cable_list[cable_index + 1:]
-            
-        Exception("Could not find a valid connection")
+        - house as the house connection for the house connection.
+
+        Optional parameters:
+        - vertical_first as a bool, draws the path towards the y position of
+        the end_cell first (Default = False). """
+
+        connect_house(self.grid, house, battery, end_cell, vertical_first)
@@ -0,0 +1,464 @@
+import random
+import time
+from typing import List, Tuple, Dict, Callable, Optional
+from code.algorithms.algorithm import Algorithm
+from code.algorithms.min_cost_flow import MinCostFlow
+from code.classes.grid import Grid
+from code.classes.cell import Cell
+from code.classes.battery import Battery
+from code.classes.house import House
+from code.classes.cable_router import connect_house, get_closest_position, extend_network
+from code.classes.lower_bound import calculate_lower_bound, calculate_gap
+
+
+class LargeNeighbourhoodSearch(Algorithm):
+    """ Class that improves a solution with adaptive large neighbourhood
+    search. Every iteration a destroy operator removes a part of the houses
+    from their networks and a repair operator connects them again, sharing the
+    cables of the networks. Operators that lead to good solutions are picked
+    more often. Only the networks of the batteries that change are routed
+    again and a rejected solution only restores these networks. """
+
+    def __init__(self, grid: Grid) -> None:
+        """ Initializes the large neighbourhood search.
+
+        - grid as Grid object. """
+
+        self.grid: Grid = grid
+
+        # algorithm that creates the start solution when the grid is empty
+        self.start_algorithm = MinCostFlow
+        self.time_budget = 10.0
+        self.max_iterations = 100000
+        # stops early when the best solution is this close to the lower bound
+        self.target_gap = 0.05
+
+        # amount of houses that get removed every iteration
+        self.min_removal = 5
+        self.max_removal = 20
+        # randomness of the worst removal, a higher value picks worse houses
+        self.worst_removal_power = 3
+        self.regret_k = 2
+
+        # acceptance of worse solutions, the temperature drops from the initial
+        # to the final temperature during the run
+        self.initial_temperature = 5.0
+        self.final_temperature = 0.1
+
+        # adaptive operator selection, scores for a new best solution, a better
+        # solution and an accepted solution
+        self.score_list = (33, 9, 13)
+        self.reaction_factor = 0.1
+        self.segment_length = 100
+
+        self.destroy_operator_list: List[Callable[[int], List[int]]] = [
+            self.random_removal, self.worst_removal, self.cluster_removal]
+        self.repair_operator_list: List[Callable[[List[int]], bool]] = [
+            self.greedy_insertion, self.regret_insertion]
+
+    def calculate_solution(self) -> None:
+        """ Executes the large neighbourhood search on the solution of the
+        grid. When not every house has a battery, the start algorithm creates a
+        solution first. The new solution only replaces the old one when it has
+        less cables. """
+
+        if any(house.battery is None for house in self.grid.house_list):
+            self.start_algorithm(self.grid).calculate_solution()
+
+        self.load_solution()
+        lower_bound = calculate_lower_bound(self.grid)
+
+        current_cost = sum(self.network_cost_list)
+        best_cost = current_cost
+        best_solution = self.get_solution()
+
+        destroy_weight_list = [1.0] * len(self.destroy_operator_list)
+        repair_weight_list = [1.0] * len(self.repair_operator_list)
+        destroy_score_list = [0.0] * len(self.destroy_operator_list)
+        repair_score_list = [0.0] * len(self.repair_operator_list)
+        destroy_use_list = [0] * len(self.destroy_operator_list)
+        repair_use_list = [0] * len(self.repair_operator_list)
+
+        start_time = time.time()
+        iterations = 0
+
+        while iterations < self.max_iterations:
+            progress = max(iterations / self.max_iterations,
+                           (time.time() - start_time) / self.time_budget)
+            if progress >= 1 or calculate_gap(best_cost, lower_bound) <= self.target_gap:
+                break
+
+            temperature = (self.initial_temperature *
+                           (self.final_temperature / self.initial_temperature) ** progress)
+
+            destroy_index = random.choices(range(len(destroy_weight_list)), destroy_weight_list)[0]
+            repair_index = random.choices(range(len(repair_weight_list)), repair_weight_list)[0]
+
+            self.undo_dict: Dict[int, Tuple[List[int], List[Tuple[int, int]], int, float,
+                                            List[Tuple[int, int]]]] = {}
+            removal = random.randint(self.min_removal, self.max_removal)
+            removed_house_list = self.destroy_operator_list[destroy_index](removal)
+            repaired = self.repair_operator_list[repair_index](removed_house_list)
+
+            new_cost = sum(self.network_cost_list)
+            score = 0
+
+            if (repaired and (new_cost <= current_cost or random.random() <
+                              2 ** ((current_cost - new_cost) / temperature))):
+                if new_cost < best_cost:
+                    best_cost = new_cost
+                    best_solution = self.get_solution()
+                    score = self.score_list[0]
+                elif new_cost < current_cost:
+                    score = self.score_list[1]
+                else:
+                    score = self.score_list[2]
+                current_cost = new_cost
+            else:
+                self.restore()
+
+            destroy_score_list[destroy_index] += score
+            repair_score_list[repair_index] += score
+            destroy_use_list[destroy_index] += 1
+            repair_use_list[repair_index] += 1
+            iterations += 1
+
+            # update the weights of the operators at the end of every segment
+            if iterations % self.segment_length == 0:
+                self.update_weight_list(destroy_weight_list, destroy_score_list, destroy_use_list)
+                self.update_weight_list(repair_weight_list, repair_score_list, repair_use_list)
+
+        print(f"Large neighbourhood search: {iterations} iterations, " +
+              f"{len(self.grid.cable_list)} -> {best_cost} cables, " +
+              f"gap {calculate_gap(best_cost, lower_bound):.1%} to lower bound {lower_bound}")
+        print("Destroy weights: " + ", ".join(f"{operator.__name__} {weight:.2f}" for operator, weight
+                                              in zip(self.destroy_operator_list, destroy_weight_list)))
+        print("Repair weights: " + ", ".join(f"{operator.__name__} {weight:.2f}" for operator, weight
+                                             in zip(self.repair_operator_list, repair_weight_list)))
+
+        if best_cost < len(self.grid.cable_list):
+            self.draw_solution(best_solution)
+
+    def update_weight_list(self, weight_list: List[float], score_list: List[float],
+                           use_list: List[int]) -> None:
+        """ Updates the weights of the operators with the scores of the last
+        segment and resets the scores.
+
+        - weight_list as a list with the weight of every operator.
+        - score_list as a list with the total score of every operator.
+        - use_list as a list with the amount of uses of every operator. """
+
+        for index in range(len(weight_list)):
+            if use_list[index]:
+                weight_list[index] = ((1 - self.reaction_factor) * weight_list[index] +
+                                      self.reaction_factor * score_list[index] / use_list[index])
+                # keep every operator in the game
+                weight_list[index] = max(weight_list[index], 0.1)
+            score_list[index] = 0
+            use_list[index] = 0
+
+    def load_solution(self) -> None:
+        """ Loads the battery of every house from the grid and routes the
+        network of every battery. """
+
+        self.house_list: List[House] = list(self.grid.house_list)
+        self.battery_list: List[Battery] = list(self.grid.battery_list)
+        battery_index_dict = {battery: index for index, battery in enumerate(self.battery_list)}
+
+        self.house_position_list: List[Tuple[int, int]] = [house.cell.get_index()
+                                                           for house in self.house_list]
+        self.house_output_list: List[float] = [house.max_output for house in self.house_list]
+        self.battery_position_list: List[Tuple[int, int]] = [battery.cell.get_index()
+                                                             for battery in self.battery_list]
+        self.battery_capacity_list: List[float] = [battery.max_capacity
+                                                   for battery in self.battery_list]
+
+        self.battery_index_list: List[int] = [battery_index_dict[house.battery]
+                                              for house in self.house_list]
+        self.end_position_list: List[Tuple[int, int]] = list(self.house_position_list)
+        self.battery_house_list: List[List[int]] = [[] for _ in self.battery_list]
+        self.load_list: List[float] = [0.0] * len(self.battery_list)
+        self.network_list: List[Tuple[List[Tuple[int, int]], set]] = []
+        self.network_cost_list: List[int] = [0] * len(self.battery_list)
+
+        for house_index, battery_index in enumerate(self.battery_index_list):
+            self.battery_house_list[battery_index].append(house_index)
+            self.load_list[battery_index] += self.house_output_list[house_index]
+
+        for battery_index in range(len(self.battery_list)):
+            self.network_list.append(([], set()))
+            self.route_battery(battery_index)
+
+    def get_solution(self) -> Tuple[List[List[int]], List[Tuple[int, int]]]:
+        """ Returns: a copy of the houses of every battery in the order they
+        are connected and the position of the end of the cable of every
+        house. """
+
+        return ([list(house_index_list) for house_index_list in self.battery_house_list],
+                list(self.end_position_list))
+
+    def save_battery(self, battery_index: int) -> None:
+        """ Saves the network of a battery before it changes so that it can be
+        restored when the solution gets rejected.
+
+        - battery_index as an int. """
+
+        if battery_index in self.undo_dict:
+            return
+
+        house_index_list = self.battery_house_list[battery_index]
+        self.undo_dict[battery_index] = (list(house_index_list),
+                                         list(self.network_list[battery_index][0]),
+                                         self.network_cost_list[battery_index],
+                                         self.load_list[battery_index],
+                                         [self.end_position_list[house_index]
+                                          for house_index in house_index_list])
+
+    def restore(self) -> None:
+        """ Restores the networks of the batteries that were changed since the
+        last save. """
+
+        for battery_index, (house_index_list, position_list, network_cost, load,
+                            end_position_list) in self.undo_dict.items():
+            self.battery_house_list[battery_index] = house_index_list
+            self.network_list[battery_index] = (position_list, set(position_list))
+            self.network_cost_list[battery_index] = network_cost
+            self.load_list[battery_index] = load
+
+            for house_index, end_position in zip(house_index_list, end_position_list):
+                self.battery_index_list[house_index] = battery_index
+                self.end_position_list[house_index] = end_position
+
+    def route_battery(self, battery_index: int) -> None:
+        """ Routes the network of a battery again from the closest to the
+        furthest house.
+
+        - battery_index as an int. """
+
+        battery_position = self.battery_position_list[battery_index]
+        house_index_list = self.battery_house_list[battery_index]
+        house_index_list.sort(key=lambda house_index:
+                              self.get_distance(self.house_position_list[house_index], battery_position))
+
+        network = ([battery_position], {battery_position})
+        network_cost = 0
+        for house_index in house_index_list:
+            house_position = self.house_position_list[house_index]
+            distance, end_position = get_closest_position(house_position, network[0])
+            extend_network(network, house_position, end_position)
+            self.end_position_list[house_index] = end_position
+
+            # a path has a cable on the start and end cell
+            network_cost += distance + 1
+
+        self.network_list[battery_index] = network
+        self.network_cost_list[battery_index] = network_cost
+
+    def remove_houses(self, house_index_list: List[int]) -> None:
+        """ Removes houses from their networks and routes the networks of
+        these batteries again.
+
+        - house_index_list as a list of house indices. """
+
+        battery_index_set = set()
+        for house_index in house_index_list:
+            battery_index = self.battery_index_list[house_index]
+            self.save_battery(battery_index)
+            self.battery_house_list[battery_index].remove(house_index)
+            self.load_list[battery_index] -= self.house_output_list[house_index]
+            self.battery_index_list[house_index] = -1
+            battery_index_set.add(battery_index)
+
+        for battery_index in battery_index_set:
+            self.route_battery(battery_index)
+
+    def random_removal(self, removal: int) -> List[int]:
+        """ Removes random houses.
+
+        - removal as an int for the amount of houses.
+
+        Returns: a list with the indices of the removed houses. """
+
+        house_index_list = random.sample(range(len(self.house_list)), removal)
+        self.remove_houses(house_index_list)
+
+        return house_index_list
+
+    def worst_removal(self, removal: int) -> List[int]:
+        """ Removes houses with long cables, with some randomness so the same
+        houses don't get removed every time.
+
+        - removal as an int for the amount of houses.
+
+        Returns: a list with the indices of the removed houses. """
+
+        house_index_list = sorted(range(len(self.house_list)), reverse=True, key=lambda house_index:
+                                  self.get_distance(self.house_position_list[house_index],
+                                                    self.end_position_list[house_index]))
+
+        removed_house_list = []
+        for _ in range(removal):
+            index = int(len(house_index_list) * random.random() ** self.worst_removal_power)
+            removed_house_list.append(house_index_list.pop(index))
+
+        self.remove_houses(removed_house_list)
+
+        return removed_house_list
+
+    def cluster_removal(self, removal: int) -> List[int]:
+        """ Removes a random house and the houses closest to it, so houses in
+        the same area can swap networks.
+
+        - removal as an int for the amount of houses.
+
+        Returns: a list with the indices of the removed houses. """
+
+        position = random.choice(self.house_position_list)
+        house_index_list = sorted(range(len(self.house_list)), key=lambda house_index:
+                                  self.get_distance(self.house_position_list[house_index], position))
+
+        removed_house_list = house_index_list[:removal]
+        self.remove_houses(removed_house_list)
+
+        return removed_house_list
+
+    def greedy_insertion(self, house_index_list: List[int]) -> bool:
+        """ Connects the houses one by one, every time the house that can be
+        connected with the least cables.
+
+        - house_index_list as a list of house indices.
+
+        Returns: True if all houses could be connected. """
+
+        return self.insert_houses(house_index_list, 1)
+
+    def regret_insertion(self, house_index_list: List[int]) -> bool:
+        """ Connects the houses one by one, every time the house that loses
+        the most when it can't be connected to its best battery (regret-k).
+
+        - house_index_list as a list of house indices.
+
+        Returns: True if all houses could be connected. """
+
+        return self.insert_houses(house_index_list, self.regret_k)
+
+    def insert_houses(self, house_index_list: List[int], regret_k: int) -> bool:
+        """ Connects houses to the closest position of the networks. The
+        connection options are updated with the new cables after every
+        connection.
+
+        - house_index_list as a list of house indices.
+        - regret_k as an int, 1 connects the cheapest house first, a higher
+        value the house with the highest regret over its k best batteries.
+
+        Returns: True if all houses could be connected. """
+
+        # the closest distance and position of every network for every house
+        option_dict = {house_index: [get_closest_position(self.house_position_list[house_index],
+                                                          network[0])
+                                     for network in self.network_list]
+                       for house_index in house_index_list}
+
+        while option_dict:
+            best_house_index = -1
+            best_key = None
+
+            for house_index, option_list in option_dict.items():
+                output = self.house_output_list[house_index]
+                distance_list = sorted(option_list[battery_index][0] for battery_index
+                                       in range(len(option_list))
+                                       if self.load_list[battery_index] + output <=
+                                       self.battery_capacity_list[battery_index])
+                if not distance_list:
+                    return False
+
+                if regret_k == 1:
+                    key = (-distance_list[0], 0)
+                elif len(distance_list) == 1:
+                    # only one battery left, connect this house first
+                    key = (float("inf"), -distance_list[0])
+                else:
+                    regret = sum(distance - distance_list[0]
+                                 for distance in distance_list[1:regret_k])
+                    key = (regret, -distance_list[0])
+
+                if best_key is None or key > best_key:
+                    best_key = key
+                    best_house_index = house_index
+
+            option_list = option_dict.pop(best_house_index)
+            output = self.house_output_list[best_house_index]
+            battery_index = min((battery_index for battery_index in range(len(option_list))
+                                 if self.load_list[battery_index] + output <=
+                                 self.battery_capacity_list[battery_index]),
+                                key=lambda battery_index: option_list[battery_index][0])
+            distance, end_position = option_list[battery_index]
+
+            self.save_battery(battery_index)
+            network = self.network_list[battery_index]
+            start = len(network[0])
+            extend_network(network, self.house_position_list[best_house_index], end_position)
+            self.battery_house_list[battery_index].append(best_house_index)
+            self.battery_index_list[best_house_index] = battery_index
+            self.end_position_list[best_house_index] = end_position
+            self.load_list[battery_index] += output
+            self.network_cost_list[battery_index] += distance + 1
+
+            # only the new cables of the network can give a closer connection
+            new_position_list = network[0][start:]
+            if not new_position_list:
+                continue
+
+            for house_index, option_list in option_dict.items():
+                new_distance, new_position = get_closest_position(
+                    self.house_position_list[house_index], new_position_list)
+                if new_distance < option_list[battery_index][0]:
+                    option_list[battery_index] = (new_distance, new_position)
+
+        return True
+
+    def get_distance(self, position: Tuple[int, int], other_position: Tuple[int, int]) -> int:
+        """ Returns: the manhattan distance between two positions. """
+
+        return abs(position[0] - other_position[0]) + abs(position[1] - other_position[1])
+
+    def draw_solution(self, solution: Tuple[List[List[int]], List[Tuple[int, int]]]) -> None:
+        """ Replaces the solution on the grid with the cables of a solution.
+
+        - solution as a tuple of the houses of every battery in the order they
+        are connected and the end position of the cable of every house. """
+
+        self.grid.clean_grid()
+        battery_house_list, end_position_list = solution
+
+        for battery, house_index_list in zip(self.battery_list, battery_house_list):
+            for house_index in house_index_list:
+                house = self.house_list[house_index]
+
+                battery.capacity -= house.max_output
+                battery.house_list.append(house)
+                house.battery = battery
+                self.grid.allocated_house_list.append(house)
+
+                end_position = end_position_list[house_index]
+                end_cell = self.grid.get_cell_by_index(end_position[0], end_position[1])
+                self.draw_path(house.cell, end_cell, battery, house)
+
+        self.grid.non_allocated_house_list = []
+
+    def draw_path(self, start_cell: Cell, end_cell: Cell, battery: Battery,
+                  house: House, vertical_first: bool=False) -> None:
+        """ Method that draws a path between a start cell and end cell.
+        Can connect to other cables and stores the rest of the cable between
+        the connection and the battery in the house shared_cable_list.
+
+        - start_cell as a Cell object as start of the cable
+        - end_cell as a Cell object as end of the cable
+        - battery as a battery object for the battery connection
+        - house as the house connection for the house connection.
+
+        Optional parameters:
+        - vertical_first as a bool, draws the path towards the y position of
+        the end_cell first (Default = False). """
+
+        connect_house(self.grid, house, battery, end_cell, vertical_first)
@@ -0,0 +1,375 @@
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import List, Tuple, Dict, Optional
+from code.algorithms.algorithm import Algorithm
+from code.algorithms.greedy_shared import GreedyShared
+from code.classes.grid import Grid
+from code.classes.cell import Cell
+from code.classes.battery import Battery
+from code.classes.house import House
+from code.classes.cable_router import connect_house, calculate_distance, route_network
+from code.classes.lower_bound import calculate_lower_bound, calculate_gap
+
+
+class Acceptance(ABC):
+    """ Abstract class used as base class for the acceptance criteria of the
+    local search. A move is a list of tuples with the index of the house, the
+    index of its old battery and the index of its new battery. """
+
+    def __init__(self, candidate_size=1) -> None:
+        """ Initializes an acceptance criterion.
+
+        Optional parameters:
+        - candidate_size as an int for the amount of moves that are drawn
+        every iteration, the moves are offered from the best to the worst
+        (Default = 1). """
+
+        self.candidate_size = candidate_size
+
+    @abstractmethod
+    def accept(self, cost_delta: int, move: List[Tuple[int, int, int]],
+               current_cost: int, best_cost: int) -> bool:
+        pass
+
+    def update(self, move: List[Tuple[int, int, int]]) -> None:
+        """ Called after a move has been applied. """
+
+        pass
+
+    def next_iteration(self) -> None:
+        """ Called at the end of every iteration. """
+
+        pass
+
+    @classmethod
+    def get_class_name(self):
+        return self.__name__
+
+
+class HillClimbing(Acceptance):
+    """ Class that accepts every move that doesn't make the solution worse. """
+
+    def accept(self, cost_delta: int, move: List[Tuple[int, int, int]],
+               current_cost: int, best_cost: int) -> bool:
+        """ Returns: True if the move doesn't increase the cost. """
+
+        return cost_delta <= 0
+
+
+class SimulatedAnnealingAcceptance(Acceptance):
+    """ Class that accepts worse moves with a chance that shrinks with the
+    temperature (same acceptance probability as the battery annealer). """
+
+    def __init__(self, initial_temperature=10, cooling_rate=0.9999) -> None:
+        """ Initializes the simulated annealing acceptance.
+
+        Optional parameters:
+        - initial_temperature as a float (Default = 10).
+        - cooling_rate as a float the temperature gets multiplied with every
+        iteration (Default = 0.9999). """
+
+        super().__init__()
+        self.temperature = initial_temperature
+        self.cooling_rate = cooling_rate
+
+    def accept(self, cost_delta: int, move: List[Tuple[int, int, int]],
+               current_cost: int, best_cost: int) -> bool:
+        """ Returns: True if the move gets accepted. """
+
+        if cost_delta <= 0:
+            return True
+
+        return random.random() < 2 ** (-cost_delta / self.temperature)
+
+    def next_iteration(self) -> None:
+        """ Cools down the temperature. """
+
+        self.temperature = max(1e-9, self.temperature * self.cooling_rate)
+
+
+class TabuAcceptance(Acceptance):
+    """ Class that accepts the best move of the candidates that doesn't move a
+    house back to a battery it recently left. A tabu move is still accepted
+    when it leads to a new best solution. """
+
+    def __init__(self, tenure=20, candidate_size=20) -> None:
+        """ Initializes the tabu acceptance.
+
+        Optional parameters:
+        - tenure as an int for the amount of iterations a move stays tabu
+        (Default = 20).
+        - candidate_size as an int for the amount of moves that are drawn
+        every iteration (Default = 20). """
+
+        super().__init__(candidate_size)
+        self.tenure = tenure
+        self.iteration = 0
+        self.tabu_dict: Dict[Tuple[int, int], int] = {}
+
+    def accept(self, cost_delta: int, move: List[Tuple[int, int, int]],
+               current_cost: int, best_cost: int) -> bool:
+        """ Returns: True if the move isn't tabu or improves the best
+        solution. """
+
+        if current_cost + cost_delta < best_cost:
+            return True
+
+        return all(self.tabu_dict.get((house_index, new_battery_index), -1) < self.iteration
+                   for house_index, _, new_battery_index in move)
+
+    def update(self, move: List[Tuple[int, int, int]]) -> None:
+        """ Makes the way back of the move tabu. """
+
+        for house_index, old_battery_index, _ in move:
+            self.tabu_dict[(house_index, old_battery_index)] = self.iteration + self.tenure
+
+    def next_iteration(self) -> None:
+        """ Counts the iterations. """
+
+        self.iteration += 1
+
+
+class LocalSearch(Algorithm):
+    """ Class that improves the battery assignments of a finished solution by
+    moving houses to another battery (relocate) or exchanging the batteries of
+    two houses (swap). The moves are scored with the distance between the
+    houses and batteries, after the search the cables are routed again.
+    Can be used as a post-processor on the grid of any algorithm. """
+
+    def __init__(self, grid: Grid, acceptance: Optional[Acceptance]=None) -> None:
+        """ Initializes the local search.
+
+        - grid as Grid object.
+
+        Optional parameters:
+        - acceptance as an Acceptance object (Default = HillClimbing()). """
+
+        self.grid: Grid = grid
+        self.acceptance: Acceptance = acceptance if acceptance is not None else HillClimbing()
+
+        # algorithm that creates the start solution when the grid is empty
+        self.start_algorithm = GreedyShared
+        self.shared_cables = True
+        self.time_budget = 5.0
+        self.max_iterations = 200000
+        self.swap_rate = 0.5
+        # the search only starts when the start solution is further from the
+        # lower bound than this gap
+        self.target_gap = 0.05
+
+    def calculate_solution(self) -> None:
+        """ Executes the local search on the solution of the grid. When not
+        every house has a battery, the start algorithm creates a solution
+        first. The new solution only replaces the old one when it has less
+        cables. """
+
+        if any(house.battery is None for house in self.grid.house_list):
+            self.start_algorithm(self.grid).calculate_solution()
+
+        self.load_solution()
+        lower_bound = calculate_lower_bound(self.grid)
+        start_gap = calculate_gap(len(self.grid.cable_list), lower_bound)
+
+        current_cost = sum(self.distance_matrix[house_index][battery_index]
+                           for house_index, battery_index in enumerate(self.battery_index_list))
+        best_cost = current_cost
+        best_battery_index_list = list(self.battery_index_list)
+
+        start_time = time.time()
+        iterations = 0
+
+        # the moves are judged on distance, so only the cables of the start
+        # solution can be compared with the lower bound
+        while (iterations < self.max_iterations and start_gap > self.target_gap and
+               time.time() - start_time < self.time_budget):
+
+            candidate_list = [self.get_random_move()
+                              for _ in range(self.acceptance.candidate_size)]
+            candidate_list = [candidate for candidate in candidate_list
+                              if candidate is not None]
+            candidate_list.sort(key=lambda x: x[0])
+
+            for cost_delta, move in candidate_list:
+                if self.acceptance.accept(cost_delta, move, current_cost, best_cost):
+                    self.apply_move(move)
+                    self.acceptance.update(move)
+                    current_cost += cost_delta
+                    break
+
+            if current_cost < best_cost:
+                best_cost = current_cost
+                best_battery_index_list = list(self.battery_index_list)
+
+            self.acceptance.next_iteration()
+            iterations += 1
+
+        # only replace the solution on the grid when it needs less cables
+        connection_list, total_cables = self.route_solution(best_battery_index_list)
+        start_cables = len(self.grid.cable_list)
+        if total_cables < start_cables:
+            self.draw_solution(best_battery_index_list, connection_list)
+            result = f"{start_cables} -> {total_cables} cables"
+        else:
+            result = (f"{start_cables} cables kept, the search result of " +
+                      f"{total_cables} cables was discarded")
+
+        print(f"Local search ({self.acceptance.get_class_name()}): {iterations} iterations, " +
+              f"{result}, gap {calculate_gap(len(self.grid.cable_list), lower_bound):.1%} " +
+              f"to lower bound {lower_bound}")
+
+    def load_solution(self) -> None:
+        """ Loads the solution of the grid: the distance of every house to
+        every battery, the battery of every house and the load of every
+        battery. """
+
+        self.house_list: List[House] = list(self.grid.house_list)
+        self.battery_list: List[Battery] = list(self.grid.battery_list)
+        battery_index_dict = {battery: index for index, battery in enumerate(self.battery_list)}
+
+        self.distance_matrix: List[List[int]] = [[calculate_distance(house.cell, battery.cell)
+                                                  for battery in self.battery_list]
+                                                 for house in self.house_list]
+        self.battery_index_list: List[int] = [battery_index_dict[house.battery]
+                                              for house in self.house_list]
+        self.load_list: List[float] = [battery.max_capacity - battery.capacity
+                                       for battery in self.battery_list]
+        self.battery_house_list: List[List[int]] = [[] for _ in self.battery_list]
+        for house_index, battery_index in enumerate(self.battery_index_list):
+            self.battery_house_list[battery_index].append(house_index)
+
+    def get_random_move(self) -> Optional[Tuple[int, List[Tuple[int, int, int]]]]:
+        """ Draws a random relocate or swap move that keeps the capacities of
+        the batteries valid.
+
+        Returns: a tuple of the cost delta and the move, or None when the
+        drawn move isn't valid. """
+
+        house_index = random.randrange(len(self.house_list))
+        old_battery_index = self.battery_index_list[house_index]
+        new_battery_index = random.randrange(len(self.battery_list))
+        if new_battery_index == old_battery_index:
+            return None
+
+        output = self.house_list[house_index].max_output
+        distance_list = self.distance_matrix[house_index]
+
+        # relocate the house to the other battery
+        if random.random() >= self.swap_rate:
+            if (self.load_list[new_battery_index] + output >
+                self.battery_list[new_battery_index].max_capacity):
+                return None
+
+            cost_delta = distance_list[new_battery_index] - distance_list[old_battery_index]
+            return cost_delta, [(house_index, old_battery_index, new_battery_index)]
+
+        # swap the house with a house of the other battery
+        if not self.battery_house_list[new_battery_index]:
+            return None
+
+        other_house_index = random.choice(self.battery_house_list[new_battery_index])
+        difference = output - self.house_list[other_house_index].max_output
+        if (self.load_list[new_battery_index] + difference >
+            self.battery_list[new_battery_index].max_capacity or
+            self.load_list[old_battery_index] - difference >
+            self.battery_list[old_battery_index].max_capacity):
+            return None
+
+        other_distance_list = self.distance_matrix[other_house_index]
+        cost_delta = (distance_list[new_battery_index] + other_distance_list[old_battery_index] -
+                      distance_list[old_battery_index] - other_distance_list[new_battery_index])
+        return cost_delta, [(house_index, old_battery_index, new_battery_index),
+                            (other_house_index, new_battery_index, old_battery_index)]
+
+    def apply_move(self, move: List[Tuple[int, int, int]]) -> None:
+        """ Applies a move to the battery of every house and the loads.
+
+        - move as a list of tuples of the house index, old battery index and
+        new battery index. """
+
+        for house_index, old_battery_index, new_battery_index in move:
+            output = self.house_list[house_index].max_output
+            self.battery_index_list[house_index] = new_battery_index
+            self.battery_house_list[old_battery_index].remove(house_index)
+            self.battery_house_list[new_battery_index].append(house_index)
+            self.load_list[old_battery_index] -= output
+            self.load_list[new_battery_index] += output
+
+    def route_solution(self, battery_index_list: List[int]
+                       ) -> Tuple[List[Tuple[int, Tuple[int, int]]], int]:
+        """ Routes the houses of every battery from the closest to the
+        furthest house. With shared cables a house connects to the closest
+        cell of the network of its battery, else directly to the battery.
+
+        - battery_index_list as a list with the battery index of every house.
+
+        Returns: a tuple of the list of connections (house index and the
+        position of the end of the cable) and the amount of cables. """
+
+        connection_list: List[Tuple[int, Tuple[int, int]]] = []
+        total_cables = 0
+
+        for battery_index, battery in enumerate(self.battery_list):
+            battery_position = battery.cell.get_index()
+
+            house_index_list = [house_index for house_index, index
+                                in enumerate(battery_index_list) if index == battery_index]
+            house_index_list.sort(key=lambda house_index: self.distance_matrix[house_index][battery_index])
+
+            if not self.shared_cables:
+                for house_index in house_index_list:
+                    # a path has a cable on the start and end cell
+                    total_cables += self.distance_matrix[house_index][battery_index] + 1
+                    connection_list.append((house_index, battery_position))
+                continue
+
+            battery_cables, battery_connection_list = route_network(
+                battery_position, [self.house_list[house_index].cell.get_index()
+                                   for house_index in house_index_list],
+                choose_orientation=False)
+            total_cables += battery_cables
+            connection_list += [(house_index, end_position) for house_index, (end_position, _)
+                                in zip(house_index_list, battery_connection_list)]
+
+        return connection_list, total_cables
+
+    def draw_solution(self, battery_index_list: List[int],
+                      connection_list: List[Tuple[int, Tuple[int, int]]]) -> None:
+        """ Replaces the solution on the grid with the routed connections.
+
+        - battery_index_list as a list with the battery index of every house.
+        - connection_list as a list of the house index and the position of
+        the end of the cable of every connection. """
+
+        self.grid.clean_grid()
+
+        for house_index, end_position in connection_list:
+            house = self.house_list[house_index]
+            battery = self.battery_list[battery_index_list[house_index]]
+
+            battery.capacity -= house.max_output
+            battery.house_list.append(house)
+            house.battery = battery
+            self.grid.allocated_house_list.append(house)
+
+            end_cell = self.grid.get_cell_by_index(end_position[0], end_position[1])
+            self.draw_path(house.cell, end_cell, battery, house)
+
+        self.grid.non_allocated_house_list = []
+
+    def draw_path(self, start_cell: Cell, end_cell: Cell, battery: Battery,
+                  house: House, vertical_first: bool=False) -> None:
+        """ Method that draws a path between a start cell and end cell.
+        Can connect to other cables and stores the rest of the cable between
+        the connection and the battery in the house shared_cable_list.
+
+        - start_cell as a Cell object as start of the cable
+        - end_cell as a Cell object as end of the cable
+        - battery as a battery object for the battery connection
+        - house as the house connection for the house connection.
+
+        Optional parameters:
+        - vertical_first as a bool, draws the path towards the y position of
+        the end_cell first (Default = False). """
+
+        connect_house(self.grid, house, battery, end_cell, vertical_first)
@@ -0,0 +1,303 @@
+import heapq
+from typing import List, Tuple, Optional
+from code.algorithms.algorithm import Algorithm
+from code.classes.grid import Grid
+from code.classes.battery import Battery
+from code.classes.house import House
+from code.classes.cable_router import connect_house, calculate_distance
+
+# margin for rounding errors of the flow
+EPSILON = 1e-9
+
+
+class MinCostFlow(Algorithm):
+    """ Class that assigns the houses to the batteries with a min cost flow
+    (transportation problem) and connects every house directly to its
+    battery. A house can't be split over batteries, so the flow gives a lower
+    bound and the few split houses are assigned afterwards and improved with
+    relocate and swap moves. Can be used as a fast baseline and as start
+    solution for the algorithms with shared cables. """
+
+    def __init__(self, grid: Grid) -> None:
+        """ Initializes the min cost flow algorithm.
+
+        - grid as Grid object. """
+
+        self.grid: Grid = grid
+        self.lower_bound: float = 0.0
+
+    def calculate_solution(self) -> None:
+        """ Executes the min cost flow algorithm to create a grid with valid
+        battery and house connections. All paths are directly connected to
+        the battery. """
+
+        battery_index_list = self.get_assignment()
+
+        self.grid.clean_grid()
+        for house, battery_index in zip(self.grid.house_list, battery_index_list):
+            battery = self.grid.battery_list[battery_index]
+            battery.capacity -= house.max_output
+            battery.house_list.append(house)
+            house.battery = battery
+            self.grid.allocated_house_list.append(house)
+            self.draw_path(battery, house)
+
+        self.grid.non_allocated_house_list = []
+
+        total_cables = len(self.grid.cable_list)
+        print(f"Min cost flow: {total_cables} cables, lower bound {self.lower_bound:.1f} " +
+              f"(gap {total_cables - self.lower_bound:.1f})")
+
+    def get_assignment(self) -> List[int]:
+        """ Calculates the battery of every house with the least total
+        distance between the houses and their batteries.
+
+        Returns: a list with the battery index of every house. """
+
+        house_list = self.grid.house_list
+        battery_list = self.grid.battery_list
+        self.distance_matrix: List[List[int]] = [[calculate_distance(house.cell, battery.cell)
+                                                  for battery in battery_list]
+                                                 for house in house_list]
+
+        flow_matrix = self.calculate_flow()
+
+        # every path has a cable on the house and the battery cell
+        self.lower_bound = sum(flow * self.distance_matrix[house_index][battery_index] /
+                               house_list[house_index].max_output
+                               for house_index, flow_list in enumerate(flow_matrix)
+                               for battery_index, flow in enumerate(flow_list)) + len(house_list)
+
+        # every house goes to the battery with the most of its flow, the few
+        # split houses can overload a battery which gets repaired afterwards
+        battery_index_list: List[int] = []
+        load_list = [0.0] * len(battery_list)
+        for house_index, flow_list in enumerate(flow_matrix):
+            battery_index = max(range(len(battery_list)), key=lambda index: flow_list[index])
+            battery_index_list.append(battery_index)
+            load_list[battery_index] += house_list[house_index].max_output
+
+        self.repair_capacity(battery_index_list, load_list)
+        self.improve_assignment(battery_index_list, load_list)
+
+        return battery_index_list
+
+    def calculate_flow(self) -> List[List[float]]:
+        """ Sends the output of every house to the batteries with successive
+        shortest paths. Sending a unit of output from a house to a battery
+        costs the distance divided by the output of the house, so a whole
+        house costs its distance.
+
+        Returns: a matrix with the flow of every house to every battery. """
+
+        house_list = self.grid.house_list
+        battery_list = self.grid.battery_list
+        house_count = len(house_list)
+        battery_count = len(battery_list)
+
+        # nodes: source, houses, batteries, sink
+        source = 0
+        sink = house_count + battery_count + 1
+        node_count = sink + 1
+
+        # every edge is a list of [to node, residual capacity, cost, reverse edge index]
+        edge_list: List[List[List]] = [[] for _ in range(node_count)]
+
+        def add_edge(start: int, end: int, capacity: float, cost: float) -> None:
+            edge_list[start].append([end, capacity, cost, len(edge_list[end])])
+            edge_list[end].append([start, 0.0, -cost, len(edge_list[start]) - 1])
+
+        for house_index, house in enumerate(house_list):
+            add_edge(source, house_index + 1, house.max_output, 0.0)
+            for battery_index in range(battery_count):
+                add_edge(house_index + 1, house_count + 1 + battery_index, float("inf"),
+                         self.distance_matrix[house_index][battery_index] / house.max_output)
+
+        for battery_index, battery in enumerate(battery_list):
+            add_edge(house_count + 1 + battery_index, sink, battery.max_capacity, 0.0)
+
+        remaining_output = sum(house.max_output for house in house_list)
+        potential_list = [0.0] * node_count
+
+        while remaining_output > EPSILON:
+            # dijkstra with potentials so the reduced costs are not negative
+            distance_list = [float("inf")] * node_count
+            previous_list: List[Optional[Tuple[int, int]]] = [None] * node_count
+            distance_list[source] = 0.0
+            queue = [(0.0, source)]
+
+            while queue:
+                distance, node = heapq.heappop(queue)
+                if distance > distance_list[node] + EPSILON:
+                    continue
+
+                for edge_index, (end, capacity, cost, _) in enumerate(edge_list[node]):
+                    if capacity <= EPSILON:
+                        continue
+
+                    new_distance = distance + cost + potential_list[node] - potential_list[end]
+                    if new_distance < distance_list[end] - EPSILON:
+                        distance_list[end] = new_distance
+                        previous_list[end] = (node, edge_index)
+                        heapq.heappush(queue, (new_distance, end))
+
+            if distance_list[sink] == float("inf"):
+                raise Exception("The batteries don't have enough capacity for all houses.")
+
+            for node in range(node_count):
+                if distance_list[node] < float("inf"):
+                    potential_list[node] += distance_list[node]
+
+            # find the bottleneck of the path and send the flow
+            flow = remaining_output
+            node = sink
+            while node != source:
+                previous_node, edge_index = previous_list[node]
+                flow = min(flow, edge_list[previous_node][edge_index][1])
+                node = previous_node
+
+            node = sink
+            while node != source:
+                previous_node, edge_index = previous_list[node]
+                edge = edge_list[previous_node][edge_index]
+                edge[1] -= flow
+                edge_list[node][edge[3]][1] += flow
+                node = previous_node
+
+            remaining_output -= flow
+
+        # the flow of a house to a battery is the residual capacity of the reverse edge
+        flow_matrix = [[0.0] * battery_count for _ in range(house_count)]
+        for house_index in range(house_count):
+            for end, _, _, reverse_index in edge_list[house_index + 1]:
+                if end > house_count and end != sink:
+                    flow_matrix[house_index][end - house_count - 1] = edge_list[end][reverse_index][1]
+
+        return flow_matrix
+
+    def repair_capacity(self, battery_index_list: List[int], load_list: List[float]) -> None:
+        """ Moves houses away from batteries with too much load. Every step
+        does the relocate or swap move with the least extra distance that
+        lowers the total overload.
+
+        - battery_index_list as a list with the battery index of every house.
+        - load_list as a list with the load of every battery. """
+
+        house_list = self.grid.house_list
+        battery_list = self.grid.battery_list
+        capacity_list = [battery.max_capacity for battery in battery_list]
+
+        def get_overload(battery_index: int, load: float) -> float:
+            return max(0.0, load - capacity_list[battery_index])
+
+        while any(load > capacity + EPSILON for load, capacity in zip(load_list, capacity_list)):
+            best_move = None
+
+            for house_index, battery_index in enumerate(battery_index_list):
+                if load_list[battery_index] <= capacity_list[battery_index] + EPSILON:
+                    continue
+
+                output = house_list[house_index].max_output
+                for new_battery_index in range(len(battery_list)):
+                    if new_battery_index == battery_index:
+                        continue
+
+                    # move the house, or swap it with a smaller house
+                    option_list = [(None, 0.0)] + [(other_house_index, house_list[other_house_index].max_output)
+                                                   for other_house_index, other_battery_index
+                                                   in enumerate(battery_index_list)
+                                                   if other_battery_index == new_battery_index and
+                                                   house_list[other_house_index].max_output < output]
+
+                    for other_house_index, other_output in option_list:
+                        difference = output - other_output
+                        reduction = (get_overload(battery_index, load_list[battery_index]) +
+                                     get_overload(new_battery_index, load_list[new_battery_index]) -
+                                     get_overload(battery_index, load_list[battery_index] - difference) -
+                                     get_overload(new_battery_index, load_list[new_battery_index] + difference))
+                        if reduction <= EPSILON:
+                            continue
+
+                        cost = (self.distance_matrix[house_index][new_battery_index] -
+                                self.distance_matrix[house_index][battery_index])
+                        if other_house_index is not None:
+                            cost += (self.distance_matrix[other_house_index][battery_index] -
+                                     self.distance_matrix[other_house_index][new_battery_index])
+
+                        key = (cost, -reduction)
+                        if best_move is None or key < best_move[0]:
+                            best_move = (key, house_index, other_house_index, new_battery_index)
+
+            if best_move is None:
+                raise Exception("Could not find a valid battery for every house.")
+
+            _, house_index, other_house_index, new_battery_index = best_move
+            battery_index = battery_index_list[house_index]
+            difference = house_list[house_index].max_output
+            battery_index_list[house_index] = new_battery_index
+            if other_house_index is not None:
+                battery_index_list[other_house_index] = battery_index
+                difference -= house_list[other_house_index].max_output
+
+            load_list[battery_index] -= difference
+            load_list[new_battery_index] += difference
+
+    def improve_assignment(self, battery_index_list: List[int], load_list: List[float]) -> None:
+        """ Improves the assignment with relocate and swap moves until no move
+        lowers the total distance anymore.
+
+        - battery_index_list as a list with the battery index of every house.
+        - load_list as a list with the load of every battery. """
+
+        house_list = self.grid.house_list
+        battery_list = self.grid.battery_list
+        improved = True
+
+        while improved:
+            improved = False
+
+            for house_index, battery_index in enumerate(battery_index_list):
+                distance_list = self.distance_matrix[house_index]
+                output = house_list[house_index].max_output
+
+                for new_battery_index, new_battery in enumerate(battery_list):
+                    if (distance_list[new_battery_index] < distance_list[battery_index] and
+                        load_list[new_battery_index] + output <= new_battery.max_capacity):
+                        battery_index_list[house_index] = new_battery_index
+                        load_list[battery_index] -= output
+                        load_list[new_battery_index] += output
+                        battery_index = new_battery_index
+                        improved = True
+
+            for house_index in range(len(house_list)):
+                for other_house_index in range(house_index + 1, len(house_list)):
+                    battery_index = battery_index_list[house_index]
+                    other_battery_index = battery_index_list[other_house_index]
+                    if battery_index == other_battery_index:
+                        continue
+
+                    delta = (self.distance_matrix[house_index][other_battery_index] +
+                             self.distance_matrix[other_house_index][battery_index] -
+                             self.distance_matrix[house_index][battery_index] -
+                             self.distance_matrix[other_house_index][other_battery_index])
+                    difference = (house_list[house_index].max_output -
+                                  house_list[other_house_index].max_output)
+
+                    if (delta < 0 and
+                        load_list[other_battery_index] + difference <=
+                        battery_list[other_battery_index].max_capacity and
+                        load_list[battery_index] - difference <=
+                        battery_list[battery_index].max_capacity):
+                        battery_index_list[house_index] = other_battery_index
+                        battery_index_list[other_house_index] = battery_index
+                        load_list[battery_index] -= difference
+                        load_list[other_battery_index] += difference
+                        improved = True
+
+    def draw_path(self, battery: Battery, house: House) -> None:
+        """ Method that draws a path between the house and battery.
+
+        - battery as a battery object for the battery connection
+        - house as the house connection for the house connection. """
+
+        connect_house(self.grid, house, battery)
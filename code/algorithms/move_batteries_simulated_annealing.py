@@ -1,8 +1,16 @@
+from __future__ import annotations
+
 import random
-from copy import deepcopy
+import multiprocessing
+from collections import OrderedDict
+from typing import List, Tuple, Dict, Optional
+from copy import copy, deepcopy
 from code.classes.grid import Grid
 from code.classes.cell import Cell
+from code.classes.battery import Battery
+from code.classes.cable_router import route_network
 from code.algorithms.greedy_shared import GreedyShared
+from code.algorithms.capacitated_k_medians import CapacitatedKMedians
 
 
 class MoveBatteriesSimulatedAnnealing():
@@ -16,54 +24,218 @@ class MoveBatteriesSimulatedAnnealing():
 
         self.grid = grid
         self.initial_temperature = 100
-        self.max_iterations = 500
+        self.max_iterations = 5000
+
+        # a part of the moves goes to a uniform random cell, the rest is drawn
+        # around the houses of the battery with a spread (in cells) that
+        # shrinks with the temperature
+        self.random_proposal_rate = 0.1
+        self.proposal_spread = 5
+
+        # starts the annealing from the capacitated k-medians layout
+        self.warm_start = True
+
+        # the start, best and last layout are scored with the best of this
+        # amount of greedy shared runs, the evaluator routes differently
+        self.rescore_runs = 5
+
+        # the amount of battery layouts the evaluator remembers (0 disables
+        # the cache). The default runs rarely propose a layout twice (about
+        # 0.1% hits), so the cache only pays off when the chain revisits
+        # layouts, like long cold runs with a small proposal_spread
+        self.cache_size = 0
+
+        # parallel tempering settings (replicas > 1 runs every replica at its
+        # own temperature in a separate process instead of a single chain)
+        self.replicas = 1
+        self.min_temperature = 1
+        self.swap_interval = 100
 
         # used for linear cooling
         self.cooling_rate = self.initial_temperature / self.max_iterations
 
     def calculate_solution(self) -> Grid:
         """ Executes the Simulated Annealing algorithm to get a better
-        distribution of batteries on the grid.
-        
-        Returns: a new grid Object with the batteries at their
-        new locations. """
+        distribution of batteries on the grid. The moves are scored with a
+        LayoutEvaluator that only reroutes the battery networks that change.
 
-        current_best_state = deepcopy(self.grid)
-        self.fill_grid(current_best_state)
+        Returns: the grid with the batteries at their new locations. """
 
-        current_temperature = self.initial_temperature
-        iterations = 1
+        # a solution on the grid (from a JSON output file) is the start layout
+        if any(house.battery is None for house in self.grid.house_list):
+            if self.warm_start:
+                CapacitatedKMedians(self.grid).calculate_solution()
 
-        while current_temperature > 0 and iterations <= self.max_iterations:
+            self.fill_grid(self.grid)
+        evaluator = LayoutEvaluator(self.grid, self.cache_size)
+        self.grid.clean_grid()
+        start_position_list = copy(evaluator.battery_position_list)
 
-            child_state: Grid = deepcopy(current_best_state)
-            child_state.clean_grid()
+        if self.replicas > 1:
+            candidate_list = [start_position_list, self.calculate_tempering_solution(evaluator)]
+        else:
+            # the same exponential cooling as 0.99 ** iterations over 500 iterations
+            cooling_factor = 0.99 ** (500 / self.max_iterations)
 
-            battery = random.choice(child_state.battery_list)
-            battery.cell.battery = None
-            cell = self.get_random_empty_cell(child_state)
-            cell.battery = battery
-            battery.cell = cell
-            self.fill_grid(child_state)
+            current_temperature = self.initial_temperature
+            iterations = 1
+            best_cost = evaluator.total_cost
+            best_position_list = copy(start_position_list)
 
-            cost_difference = (self.calculate_cost(current_best_state) - 
-                               self.calculate_cost(child_state))
+            while current_temperature > 0 and iterations <= self.max_iterations:
 
-            if (random.random() < self.acceptance_probability(cost_difference,
-                                                                   current_temperature)):
-                print(iterations, cost_difference, self.calculate_cost(child_state))
-                current_best_state = child_state
+                cost_difference = self.anneal_step(evaluator, current_temperature)
 
-            iterations += 1
-            current_temperature = self.initial_temperature * 0.99 ** iterations
+                if cost_difference is not None:
+                    print(iterations, cost_difference, evaluator.total_cost)
 
-        self.grid = current_best_state
-        self.grid.clean_grid()
+                    if evaluator.total_cost < best_cost:
+                        best_cost = evaluator.total_cost
+                        best_position_list = copy(evaluator.battery_position_list)
+
+                iterations += 1
+                current_temperature = self.initial_temperature * cooling_factor ** iterations
+
+            candidate_list = [start_position_list, best_position_list,
+                              copy(evaluator.battery_position_list)]
+
+            if self.cache_size > 0:
+                total_evaluations = evaluator.cache_hits + evaluator.cache_misses
+                print(f"Cache hit rate: {evaluator.get_cache_hit_rate():.1%} " +
+                      f"({evaluator.cache_hits} of {total_evaluations} evaluations)")
+
+        self.set_positions(self.get_best_layout(candidate_list))
 
         return self.grid
 
+    def get_best_layout(self, candidate_list: List[List[Tuple[int, int]]]
+                        ) -> List[Tuple[int, int]]:
+        """ Scores battery layouts with the greedy shared algorithm. The
+        evaluator routes the networks in its own order, so its best layout
+        doesn't have to be the best one for the greedy construction. Every
+        layout gets the least cables of rescore_runs greedy runs, the grid is
+        left without cables.
+
+        - candidate_list as a list of layouts, a layout as a list with the
+        position of every battery.
+
+        Returns: the layout with the least greedy shared cables. """
+
+        cost_list = []
+        for position_list in candidate_list:
+            self.set_positions(position_list)
+
+            total_cables = None
+            for _ in range(self.rescore_runs):
+                self.fill_grid(self.grid)
+                run_cables = self.calculate_cost(self.grid)
+                self.grid.clean_grid()
+
+                if total_cables is None or run_cables < total_cables:
+                    total_cables = run_cables
+            cost_list.append(total_cables)
+
+        best_index = cost_list.index(min(cost_list))
+        print(f"Greedy shared cables of the candidate layouts: {cost_list}, " +
+              f"layout {best_index + 1} is used.")
+
+        return candidate_list[best_index]
+
+    def set_positions(self, position_list: List[Tuple[int, int]]) -> None:
+        """ Moves every battery to its position in a list.
+
+        - position_list as a list with the position of every battery. """
+
+        for battery in self.grid.battery_list:
+            battery.cell.battery = None
+        for battery, position in zip(self.grid.battery_list, position_list):
+            self.move_battery(battery, self.grid.get_cell_by_index(position[0], position[1]))
+
+    def calculate_tempering_solution(self, evaluator: LayoutEvaluator) -> List[Tuple[int, int]]:
+        """ Executes parallel tempering: every replica anneals at its own fixed
+        temperature (from min_temperature up to initial_temperature) in a
+        worker process. Every swap_interval iterations neighbouring replicas
+        try to swap their layouts, so good layouts move to the cold replicas
+        and the hot replicas keep escaping local minima.
+
+        - evaluator as the LayoutEvaluator with the starting solution.
+
+        Returns: a list with the positions of the batteries of the best
+        layout that any replica found. """
+
+        temperature_list = [self.min_temperature *
+                            (self.initial_temperature / self.min_temperature) **
+                            (index / (self.replicas - 1))
+                            for index in range(self.replicas)]
+        evaluator_list = [deepcopy(evaluator) for _ in range(self.replicas)]
+
+        best_cost = evaluator.total_cost
+        best_position_list = copy(evaluator.battery_position_list)
+        iterations = 0
+
+        with multiprocessing.Pool(self.replicas) as pool:
+            while iterations < self.max_iterations:
+                # every replica gets its own seed, forked processes share the random state
+                arguments = [(self, replica_evaluator, temperature, self.swap_interval,
+                              random.randrange(2 ** 32))
+                             for replica_evaluator, temperature
+                             in zip(evaluator_list, temperature_list)]
+                result_list = pool.starmap(run_replica, arguments)
+                iterations += self.swap_interval
+
+                evaluator_list = [result[0] for result in result_list]
+                for _, replica_best_cost, replica_best_position_list in result_list:
+                    if replica_best_cost < best_cost:
+                        best_cost = replica_best_cost
+                        best_position_list = replica_best_position_list
+
+                # try to swap the layouts of neighbouring temperatures
+                for index in range(self.replicas - 1):
+                    cost_difference = (evaluator_list[index].total_cost -
+                                       evaluator_list[index + 1].total_cost)
+                    temperature_difference = (1 / temperature_list[index] -
+                                              1 / temperature_list[index + 1])
+                    if random.random() < 2 ** (cost_difference * temperature_difference):
+                        evaluator_list[index], evaluator_list[index + 1] = (
+                            evaluator_list[index + 1], evaluator_list[index])
+
+                print(iterations, best_cost, [replica_evaluator.total_cost
+                                              for replica_evaluator in evaluator_list])
+
+        if self.cache_size > 0:
+            cache_hits = sum(replica_evaluator.cache_hits for replica_evaluator in evaluator_list)
+            cache_misses = sum(replica_evaluator.cache_misses
+                               for replica_evaluator in evaluator_list)
+            print(f"Cache hit rate: {cache_hits / max(1, cache_hits + cache_misses):.1%} " +
+                  f"({cache_hits} of {cache_hits + cache_misses} evaluations)")
+
+        return best_position_list
+
+    def anneal_step(self, evaluator: LayoutEvaluator, temperature: float) -> Optional[int]:
+        """ Proposes a move of a random battery and applies it to the
+        evaluator when it gets accepted.
+
+        - evaluator as the LayoutEvaluator with the current solution.
+        - temperature as a float for the current temperature.
+
+        Returns: the cost difference as an int when the move got accepted,
+        else None. """
+
+        battery_index = random.randrange(len(evaluator.battery_position_list))
+        position = self.get_proposal_position(evaluator, battery_index, temperature)
+
+        cost_delta, change = evaluator.evaluate_move(battery_index, position)
+        cost_difference = -cost_delta
+
+        if (random.random() < self.acceptance_probability(cost_difference,
+                                                               temperature)):
+            evaluator.apply_change(change)
+            return cost_difference
+
+        return None
+
     def acceptance_probability(self, cost_difference: float, temperature: float) -> float:
-        """ Get the current acceptance probability of the algorithm. 
+        """ Get the current acceptance probability of the algorithm.
 
         - cost_diffrence as a float.
         - temprature as a float.
@@ -72,26 +244,80 @@ class MoveBatteriesSimulatedAnnealing():
 
         return 2 ** (cost_difference / temperature)
 
-    def get_random_empty_cell(self, grid: Grid) -> Cell:
-        """ Get a random cell from the grid without a battery or a house.
+    def get_random_empty_position(self, evaluator: LayoutEvaluator) -> Tuple[int, int]:
+        """ Get a random position on the grid without a battery or a house.
+
+        - evaluator as the LayoutEvaluator with the current solution.
+
+        Return: a tuple of the x and y index. """
 
-        - grid as Grid object.
+        while True:
+            position = (random.randrange(evaluator.grid_size),
+                        random.randrange(evaluator.grid_size))
+
+            if evaluator.is_empty(position):
+                return position
+
+    def get_proposal_position(self, evaluator: LayoutEvaluator,
+                              battery_index: int, temperature: float) -> Tuple[int, int]:
+        """ Get an empty position to move a battery to. The position is drawn
+        from the cost surface of the battery (the sum of the distances to its
+        houses): lower cells get a higher chance. Because the surface is the
+        sum of an x and y surface, the x and y index can be drawn separately.
+        Some of the positions are drawn uniformly to keep exploring the grid.
+
+        - evaluator as the LayoutEvaluator with the current solution.
+        - battery_index as the index of the battery that moves.
+        - temperature as a float for the current temperature.
+
+        Return: a tuple of the x and y index. """
 
-        Return: a Cell object from the grid. """
+        if random.random() < self.random_proposal_rate:
+            return self.get_random_empty_position(evaluator)
+
+        x_surface, y_surface = evaluator.surface_list[battery_index]
+        total_houses = max(1, len(evaluator.battery_house_list[battery_index]))
+        spread = 1 + self.proposal_spread * min(1, temperature / self.initial_temperature)
+
+        weight_list_x = self.get_surface_weight_list(x_surface, total_houses * spread)
+        weight_list_y = self.get_surface_weight_list(y_surface, total_houses * spread)
+        index_list = range(evaluator.grid_size)
 
         while True:
-            x_index = random.randrange(len(self.grid.grid))
-            y_index = random.randrange(len(self.grid.grid))
+            position = (random.choices(index_list, weight_list_x)[0],
+                        random.choices(index_list, weight_list_y)[0])
+
+            if evaluator.is_empty(position):
+                return position
+
+    def get_surface_weight_list(self, surface: List[int],
+                                scale: float) -> List[float]:
+        """ Get the chance weights of a cost surface, every scale extra cost
+        halves the chance.
 
-            cell = grid.grid[x_index][y_index]
+        - surface as a list of ints with the cost of every index.
+        - scale as a float.
 
-            if cell.battery is None and cell.house is None:
-                return cell
+        Returns: a list of floats with the weight of every index. """
+
+        min_cost = min(surface)
+
+        return [2 ** (-(cost - min_cost) / scale) for cost in surface]
+
+    def move_battery(self, battery: Battery, cell: Cell) -> None:
+        """ Moves a battery to another cell of the grid.
+
+        - battery as a Battery object.
+        - cell as the Cell object the battery moves to. """
+
+        battery.cell.battery = None
+        cell.battery = battery
+        battery.cell = cell
 
     def fill_grid(self, grid: Grid) -> None:
         """ Fills the grid with connections between houses and batteries using
-        the greedy algorithm. 
-        
+        the greedy algorithm.
+
         - grid as Grid object. """
 
         algorithm = GreedyShared(grid)
@@ -99,9 +325,351 @@ class MoveBatteriesSimulatedAnnealing():
 
     def calculate_cost(self, gird: Grid) -> int:
         """ Gets the amount of cables on the grid.
-         
+
           - grid as Grid object.
-           
+
         Returns: an int of the amount of cables. """
-        
+
         return len(gird.cable_list)
+
+    def __getstate__(self) -> Dict:
+        """ Gets the state of the algorithm to send it to the worker processes
+        of the parallel tempering. The grid is left out, the replicas only
+        need the LayoutEvaluator.
+
+        Returns: the state as a dict. """
+
+        state = copy(self.__dict__)
+        state.pop("grid", None)
+
+        return state
+
+
+def run_replica(annealing: MoveBatteriesSimulatedAnnealing,
+                evaluator: LayoutEvaluator, temperature: float, iterations: int,
+                seed: int) -> Tuple[LayoutEvaluator, int, List[Tuple[int, int]]]:
+    """ Anneals a replica of the parallel tempering at a fixed temperature.
+    Runs in a worker process.
+
+    - annealing as the MoveBatteriesSimulatedAnnealing algorithm.
+    - evaluator as the LayoutEvaluator of the replica.
+    - temperature as a float.
+    - iterations as an int.
+    - seed as an int for the random generator of the process.
+
+    Returns: a tuple with the evaluator, the best cost and the positions of
+    the batteries of the best layout of the replica. """
+
+    random.seed(seed)
+    best_cost = evaluator.total_cost
+    best_position_list = copy(evaluator.battery_position_list)
+
+    for _ in range(iterations):
+        annealing.anneal_step(evaluator, temperature)
+
+        if evaluator.total_cost < best_cost:
+            best_cost = evaluator.total_cost
+            best_position_list = copy(evaluator.battery_position_list)
+
+    return evaluator, best_cost, best_position_list
+
+
+class LayoutEvaluator():
+    """ Class that holds a compact solution of a grid: the houses of every
+    battery and the amount of cables of every battery network. Used to score
+    the move of a battery without rebuilding the whole solution. """
+
+    def __init__(self, grid: Grid, cache_size=0) -> None:
+        """ Initializes the evaluator with the solution on a grid.
+
+        - grid as a Grid object where every house is connected to a
+        battery.
+
+        Optional parameters:
+        - cache_size as an int for the maximum amount of battery layouts that
+        are remembered (Default = 0, which disables the cache). """
+
+        self.house_position_list: List[Tuple[int, int]] = [house.cell.get_index() for house in grid.house_list]
+        self.house_output_list: List[float] = [house.max_output for house in grid.house_list]
+        self.battery_position_list: List[Tuple[int, int]] = [battery.cell.get_index() for battery in grid.battery_list]
+        self.battery_capacity_list: List[float] = [battery.max_capacity for battery in grid.battery_list]
+        self.grid_size = len(grid.grid)
+        self.house_position_set = set(self.house_position_list)
+
+        battery_index_dict: Dict[Battery, int] = {battery: index for index, battery
+                                                  in enumerate(grid.battery_list)}
+
+        self.battery_house_list: List[List[int]] = [[] for _ in grid.battery_list]
+        self.load_list: List[float] = [0.0] * len(grid.battery_list)
+        for house_index, house in enumerate(grid.house_list):
+            battery_index = battery_index_dict[house.battery]
+            self.battery_house_list[battery_index].append(house_index)
+            self.load_list[battery_index] += house.max_output
+
+        # the sum of the x and y distances of the houses of a battery to every
+        # x and y index, together the cost surface of the battery
+        self.surface_list: List[Tuple[List[int], List[int]]] = []
+        for house_index_list in self.battery_house_list:
+            surface = ([0] * self.grid_size, [0] * self.grid_size)
+            for house_index in house_index_list:
+                self.update_surface(surface, house_index, 1)
+            self.surface_list.append(surface)
+
+        self.network_cost_list: List[int] = [self.route_network(position, house_index_list)
+                                             for position, house_index_list
+                                             in zip(self.battery_position_list,
+                                                    self.battery_house_list)]
+        self.total_cost = sum(self.network_cost_list)
+
+        # least recently used cache of scored battery layouts
+        self.cache_size = cache_size
+        self.cache: OrderedDict[Tuple, Tuple[int, Dict[Tuple[int, int], Tuple[List[int], int, float]]]] = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.store_layout(self.battery_position_list, self.battery_house_list,
+                          self.network_cost_list, self.load_list, self.total_cost)
+
+    def route_network(self, battery_position: Tuple[int, int],
+                      house_index_list: List[int]) -> int:
+        """ Routes the houses of a battery from the closest to the furthest
+        house with route_network, every path goes horizontally first.
+
+        - battery_position as a tuple of the x and y index of the battery.
+        - house_index_list as a list of the indices of the houses.
+
+        Returns: the amount of cables of the network as an int. """
+
+        house_position_list = [self.house_position_list[house_index] for house_index
+                               in sorted(house_index_list,
+                                         key=lambda index: self.get_distance(index,
+                                                                             battery_position))]
+
+        return route_network(battery_position, house_position_list, choose_orientation=False)[0]
+
+    def evaluate_move(self, battery_index: int, position: Tuple[int, int]
+                      ) -> Tuple[int, Tuple[int, Tuple[int, int], Dict[int, List[int]],
+                                            Dict[int, int], List[float]]]:
+        """ Scores the move of a battery to a new position. A layout that is
+        in the cache gets the solution from the cache, else the move is
+        calculated with calculate_move() and stored in the cache.
+
+        - battery_index as the index of the battery that moves.
+        - position as a tuple of the x and y index of the new position.
+
+        Returns: a tuple with the difference in cables and the change that
+        can be applied with apply_change(). """
+
+        # without a cache the key and the stored solution are never needed
+        if self.cache_size < 1:
+            return self.calculate_move(battery_index, position)
+
+        position_list = copy(self.battery_position_list)
+        position_list[battery_index] = position
+        key = self.get_layout_key(position_list)
+
+        if key in self.cache:
+            self.cache_hits += 1
+            self.cache.move_to_end(key)
+            total_cost, solution_dict = self.cache[key]
+
+            house_list_dict: Dict[int, List[int]] = {}
+            network_cost_dict: Dict[int, int] = {}
+            load_list: List[float] = []
+            for index, battery_position in enumerate(position_list):
+                house_index_list, network_cost, load = solution_dict[battery_position]
+                house_list_dict[index] = house_index_list
+                network_cost_dict[index] = network_cost
+                load_list.append(load)
+
+            return total_cost - self.total_cost, (battery_index, position, house_list_dict,
+                                                  network_cost_dict, load_list)
+
+        self.cache_misses += 1
+        cost_delta, change = self.calculate_move(battery_index, position)
+
+        _, _, house_list_dict, network_cost_dict, load_list = change
+        self.store_layout(position_list,
+                          [house_list_dict.get(index, house_index_list) for index, house_index_list
+                           in enumerate(self.battery_house_list)],
+                          [network_cost_dict.get(index, network_cost) for index, network_cost
+                           in enumerate(self.network_cost_list)],
+                          load_list, self.total_cost + cost_delta)
+
+        return cost_delta, change
+
+    def calculate_move(self, battery_index: int, position: Tuple[int, int]
+                       ) -> Tuple[int, Tuple[int, Tuple[int, int], Dict[int, List[int]],
+                                             Dict[int, int], List[float]]]:
+        """ Calculates the move of a battery to a new position. Houses of the
+        battery that are closer to another battery with enough capacity move
+        to that battery, after that houses of other batteries that are closer
+        to the new position move to the battery while it has enough capacity.
+        Only the networks of the batteries that changed get rerouted.
+
+        - battery_index as the index of the battery that moves.
+        - position as a tuple of the x and y index of the new position.
+
+        Returns: a tuple with the difference in cables and the change that
+        can be applied with apply_change(). """
+
+        position_list = copy(self.battery_position_list)
+        position_list[battery_index] = position
+        load_list = copy(self.load_list)
+        house_list_dict: Dict[int, List[int]] = {battery_index: copy(self.battery_house_list[battery_index])}
+
+        # houses of the moved battery leave first to free capacity
+        for house_index in copy(house_list_dict[battery_index]):
+            output = self.house_output_list[house_index]
+            shortest_distance = self.get_distance(house_index, position)
+            new_battery_index = None
+
+            for other_index, other_position in enumerate(position_list):
+                distance = self.get_distance(house_index, other_position)
+                if (other_index != battery_index and distance < shortest_distance and
+                    load_list[other_index] + output <= self.battery_capacity_list[other_index]):
+                    shortest_distance = distance
+                    new_battery_index = other_index
+
+            if new_battery_index is not None:
+                if new_battery_index not in house_list_dict:
+                    house_list_dict[new_battery_index] = copy(self.battery_house_list[new_battery_index])
+                house_list_dict[battery_index].remove(house_index)
+                house_list_dict[new_battery_index].append(house_index)
+                load_list[battery_index] -= output
+                load_list[new_battery_index] += output
+
+        # houses of other batteries that are closer to the new position
+        candidate_list: List[Tuple[int, int, int]] = []
+        for other_index, house_index_list in enumerate(self.battery_house_list):
+            if other_index == battery_index:
+                continue
+            for house_index in house_list_dict.get(other_index, house_index_list):
+                gain = (self.get_distance(house_index, position_list[other_index]) -
+                        self.get_distance(house_index, position))
+                if gain > 0:
+                    candidate_list.append((gain, house_index, other_index))
+
+        candidate_list.sort(reverse=True)
+        for _, house_index, other_index in candidate_list:
+            output = self.house_output_list[house_index]
+            if load_list[battery_index] + output <= self.battery_capacity_list[battery_index]:
+                if other_index not in house_list_dict:
+                    house_list_dict[other_index] = copy(self.battery_house_list[other_index])
+                house_list_dict[other_index].remove(house_index)
+                house_list_dict[battery_index].append(house_index)
+                load_list[other_index] -= output
+                load_list[battery_index] += output
+
+        network_cost_dict = {index: self.route_network(position_list[index], house_index_list)
+                             for index, house_index_list in house_list_dict.items()}
+        cost_delta = sum(network_cost - self.network_cost_list[index]
+                         for index, network_cost in network_cost_dict.items())
+
+        return cost_delta, (battery_index, position, house_list_dict,
+                            network_cost_dict, load_list)
+
+    def apply_change(self, change: Tuple[int, Tuple[int, int], Dict[int, List[int]],
+                                         Dict[int, int], List[float]]) -> None:
+        """ Applies a change that was made by evaluate_move().
+
+        - change as the tuple that evaluate_move() returned. """
+
+        battery_index, position, house_list_dict, network_cost_dict, load_list = change
+
+        self.battery_position_list[battery_index] = position
+        self.load_list = load_list
+        for index, house_index_list in house_list_dict.items():
+            old_house_index_set = set(self.battery_house_list[index])
+            new_house_index_set = set(house_index_list)
+            for house_index in old_house_index_set - new_house_index_set:
+                self.update_surface(self.surface_list[index], house_index, -1)
+            for house_index in new_house_index_set - old_house_index_set:
+                self.update_surface(self.surface_list[index], house_index, 1)
+
+            self.battery_house_list[index] = house_index_list
+            self.network_cost_list[index] = network_cost_dict[index]
+
+        self.total_cost = sum(self.network_cost_list)
+
+    def update_surface(self, surface: Tuple[List[int], List[int]],
+                       house_index: int, sign: int) -> None:
+        """ Adds (sign = 1) or removes (sign = -1) the distances of a house
+        to a cost surface.
+
+        - surface as a tuple of the x and y surface.
+        - house_index as the index of the house.
+        - sign as an int. """
+
+        house_x, house_y = self.house_position_list[house_index]
+        x_surface, y_surface = surface
+
+        for index in range(self.grid_size):
+            x_surface[index] += sign * abs(index - house_x)
+            y_surface[index] += sign * abs(index - house_y)
+
+    def get_layout_key(self, position_list: List[Tuple[int, int]]) -> Tuple:
+        """ Gets the fingerprint of a battery layout. Batteries with the same
+        capacity are interchangeable, so the positions and capacities are
+        sorted.
+
+        - position_list as a list of the positions of the batteries.
+
+        Returns: a tuple that is the same for the same layout. """
+
+        return tuple(sorted(zip(position_list, self.battery_capacity_list)))
+
+    def store_layout(self, position_list: List[Tuple[int, int]],
+                     house_list: List[List[int]], network_cost_list: List[int],
+                     load_list: List[float], total_cost: int) -> None:
+        """ Stores the solution of a battery layout in the cache by the
+        position of the batteries. Removes the least recently used layout
+        when the cache is full.
+
+        - position_list as a list of the positions of the batteries.
+        - house_list as a list with the house indices of every battery.
+        - network_cost_list as a list with the cables of every battery.
+        - load_list as a list with the load of every battery.
+        - total_cost as an int. """
+
+        solution_dict = {position: (house_index_list, network_cost, load)
+                         for position, house_index_list, network_cost, load
+                         in zip(position_list, house_list, network_cost_list, load_list)}
+        key = self.get_layout_key(position_list)
+        self.cache[key] = (total_cost, solution_dict)
+        self.cache.move_to_end(key)
+
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def get_cache_hit_rate(self) -> float:
+        """ Gets the part of the evaluations that came from the cache.
+
+        Returns: the hit rate as a float between 0 and 1. """
+
+        total_evaluations = self.cache_hits + self.cache_misses
+        if total_evaluations == 0:
+            return 0.0
+
+        return self.cache_hits / total_evaluations
+
+    def is_empty(self, position: Tuple[int, int]) -> bool:
+        """ Checks if a position has no battery and no house.
+
+        - position as a tuple of the x and y index.
+
+        Returns: True if the position is empty, else False. """
+
+        return (position not in self.house_position_set and
+                position not in self.battery_position_list)
+
+    def get_distance(self, house_index: int, position: Tuple[int, int]) -> int:
+        """ Calculates the distance between a house and a position.
+
+        - house_index as the index of the house.
+        - position as a tuple of the x and y index.
+
+        Returns: the distance in grid cells as an int. """
+
+        house_position = self.house_position_list[house_index]
+
+        return abs(house_position[0] - position[0]) + abs(house_position[1] - position[1])
@@ -0,0 +1,224 @@
+import time
+import random
+from array import array
+from typing import List, Tuple, Set, Optional
+from code.algorithms.algorithm import Algorithm
+from code.classes.grid import Grid
+from code.classes.cell import Cell
+from code.classes.battery import Battery
+from code.classes.house import House
+from code.classes.cable_router import connect_house, get_closest_position, extend_network
+from code.classes.steiner_tree import optimise_networks
+
+
+class MultiStart(Algorithm):
+    """ Class that runs many randomized greedy shared constructions and keeps
+    the best ones. The constructions share one GreedyConstructor, so the
+    distances and the network lists of the district are only made once and
+    a start only has to route its houses. The best elite_size solutions are
+    kept in an elite set, at the end every elite solution is drawn with
+    Steiner tree networks and the best one stays on the grid. """
+
+    def __init__(self, grid: Grid) -> None:
+        """ Initializes the multi start algorithm.
+
+        - grid as Grid object. """
+
+        self.grid: Grid = grid
+        self.starts = 1000
+        self.elite_size = 5
+        self.time_budget: Optional[float] = None
+
+        # the elite solutions as a sorted list of the amount of cables, the
+        # battery index of every house and the connections in drawing order
+        self.elite_list: List[Tuple[int, array, List[Tuple[int, Tuple[int, int]]]]] = []
+
+    def calculate_solution(self) -> None:
+        """ Executes the multi start algorithm to create a grid with valid
+        battery and house connections. Paths can be shared with other houses
+        of the same battery. """
+
+        constructor = GreedyConstructor(self.grid)
+        start_time = time.time()
+        failed_starts = 0
+
+        for start in range(self.starts):
+            solution = constructor.construct()
+            if solution is None:
+                failed_starts += 1
+            else:
+                self.add_elite(*solution)
+
+            if self.time_budget is not None and time.time() - start_time >= self.time_budget:
+                break
+
+        print(f"Multi start: {start + 1} starts ({failed_starts} without room) in " +
+              f"{time.time() - start_time:.1f} seconds, elite " +
+              f"{[total_cables for total_cables, _, _ in self.elite_list]}")
+
+        # the steiner trees can change the order of the elite solutions
+        best_elite: Optional[Tuple[int, int]] = None
+        for elite_index, (_, battery_array, connection_list) in enumerate(self.elite_list):
+            self.draw_solution(battery_array, connection_list)
+            total_cables = len(self.grid.cable_list)
+            if best_elite is None or total_cables < best_elite[0]:
+                best_elite = (total_cables, elite_index)
+
+        if best_elite is None:
+            raise Exception("No start found room for all houses.")
+
+        if best_elite[1] != len(self.elite_list) - 1:
+            _, battery_array, connection_list = self.elite_list[best_elite[1]]
+            self.draw_solution(battery_array, connection_list)
+
+        print(f"Best elite solution with Steiner trees: {best_elite[0]} cables.")
+
+    def add_elite(self, total_cables: int, battery_array: array,
+                  connection_list: List[Tuple[int, Tuple[int, int]]]) -> None:
+        """ Adds a solution to the elite set when it is better than the worst
+        elite solution. A solution with the same battery assignment as an
+        elite solution only replaces that solution when it is better.
+
+        - total_cables as an int.
+        - battery_array as an array with the battery index of every house.
+        - connection_list as a list of the house index and the end position of
+        every path in drawing order. """
+
+        if len(self.elite_list) >= self.elite_size and total_cables >= self.elite_list[-1][0]:
+            return
+
+        for elite_index, (elite_cables, elite_battery_array, _) in enumerate(self.elite_list):
+            if elite_battery_array == battery_array:
+                if total_cables >= elite_cables:
+                    return
+                del self.elite_list[elite_index]
+                break
+
+        self.elite_list.append((total_cables, battery_array, connection_list))
+        self.elite_list.sort(key=lambda elite: elite[0])
+        del self.elite_list[self.elite_size:]
+
+    def draw_solution(self, battery_array: array,
+                      connection_list: List[Tuple[int, Tuple[int, int]]]) -> None:
+        """ Draws a solution on a clean grid and routes the networks as
+        Steiner trees when that saves cables.
+
+        - battery_array as an array with the battery index of every house.
+        - connection_list as a list of the house index and the end position of
+        every path in drawing order. """
+
+        self.grid.clean_grid()
+
+        for house_index, end_position in connection_list:
+            house = self.grid.house_list[house_index]
+            battery = self.grid.battery_list[battery_array[house_index]]
+
+            battery.capacity -= house.max_output
+            battery.house_list.append(house)
+            house.battery = battery
+            self.grid.allocated_house_list.append(house)
+
+            end_cell = self.grid.get_cell_by_index(end_position[0], end_position[1])
+            self.draw_path(house.cell, end_cell, battery, house)
+
+        self.grid.non_allocated_house_list = []
+        optimise_networks(self.grid)
+
+    def draw_path(self, start_cell: Cell, end_cell: Cell, battery: Battery,
+                  house: House) -> None:
+        """ Method that draws a path between a start cell and end cell.
+        Can connect to other cables and stores the rest of the cable between
+        the connection and the battery in the house shared_cable_list.
+
+        - start_cell as a Cell object as start of the cable
+        - end_cell as a Cell object as end of the cable
+        - battery as a battery object for the battery connection
+        - house as the house connection for the house connection. """
+
+        connect_house(self.grid, house, battery, end_cell)
+
+
+class GreedyConstructor():
+    """ Class that builds randomized greedy shared solutions without
+    creating cables. The district lists are made once and every network is
+    a list and a set of positions that are emptied for the next
+    construction, so a construction only has to route its houses. The
+    constructor only holds lists, so it can be sent to worker processes. """
+
+    def __init__(self, grid: Grid) -> None:
+        """ Precomputes the district data of a grid.
+
+        - grid as Grid object. """
+
+        self.house_position_list: List[Tuple[int, int]] = [house.cell.get_index()
+                                                           for house in grid.house_list]
+        self.house_output_list: List[float] = [house.max_output for house in grid.house_list]
+        self.battery_position_list: List[Tuple[int, int]] = [battery.cell.get_index()
+                                                             for battery in grid.battery_list]
+        self.battery_capacity_list: List[float] = [battery.max_capacity
+                                                   for battery in grid.battery_list]
+
+        # the networks are reused by every construction
+        self.network_list: List[Tuple[List[Tuple[int, int]], Set[Tuple[int, int]]]] = [
+            ([position], {position}) for position in self.battery_position_list]
+
+    def reset(self) -> None:
+        """ Resets the networks to the batteries. """
+
+        for (position_list, position_set), position in zip(self.network_list,
+                                                           self.battery_position_list):
+            del position_list[1:]
+            position_set.clear()
+            position_set.add(position)
+
+    def construct(self) -> Optional[Tuple[int, array, List[Tuple[int, Tuple[int, int]]]]]:
+        """ Connects the houses in a random order to the closest network of a
+        battery with room. On a tie a battery wins from a cable, just like
+        the greedy shared algorithm.
+
+        Returns: a tuple of the amount of cables, an array with the battery
+        index of every house and a list of the house index and the end
+        position of every path in drawing order, or None when a house didn't
+        fit anywhere. """
+
+        self.reset()
+
+        order_list = list(range(len(self.house_position_list)))
+        random.shuffle(order_list)
+
+        capacity_list = list(self.battery_capacity_list)
+        battery_array = array("b", [-1] * len(order_list))
+        connection_list: List[Tuple[int, Tuple[int, int]]] = []
+        total_cables = 0
+
+        for house_index in order_list:
+            house_position = self.house_position_list[house_index]
+            output = self.house_output_list[house_index]
+            best_connection: Optional[Tuple[Tuple[int, bool], int, Tuple[int, int]]] = None
+
+            for battery_index, capacity in enumerate(capacity_list):
+                if capacity < output:
+                    continue
+
+                # on a tie a battery wins from a cable of another battery
+                network = self.network_list[battery_index]
+                distance, end_position = get_closest_position(house_position, network[0])
+                key = (distance, end_position != network[0][0])
+
+                if best_connection is None or key < best_connection[0]:
+                    best_connection = (key, battery_index, end_position)
+
+            if best_connection is None:
+                return None
+
+            (distance, _), battery_index, end_position = best_connection
+            capacity_list[battery_index] -= output
+            battery_array[house_index] = battery_index
+            connection_list.append((house_index, end_position))
+
+            # a path has a cable on the start and end cell
+            total_cables += distance + 1
+
+            extend_network(self.network_list[battery_index], house_position, end_position)
+
+        return total_cables, battery_array, connection_list
@@ -0,0 +1,204 @@
+import heapq
+from typing import List, Tuple, Set
+from code.algorithms.algorithm import Algorithm
+from code.algorithms.min_cost_flow import MinCostFlow
+from code.classes.grid import Grid
+from code.classes.cell import Cell
+from code.classes.battery import Battery
+from code.classes.house import House
+from code.classes.cable_router import CableRouter, connect_house
+from code.classes.steiner_tree import optimise_networks
+
+
+class PrimNetwork(Algorithm):
+    """ Class that grows the network of every battery like Prim's algorithm.
+    Every step connects the unconnected house that is closest to the network
+    of a battery with enough room. The distances are kept in a heap that
+    only gets new entries for the houses that got closer to a network that
+    just grew. Every unconnected house has a reserved battery (from the min
+    cost flow assignment) so the last houses can't get stuck. The algorithm
+    is deterministic and needs one cycle. """
+
+    def __init__(self, grid: Grid) -> None:
+        """ Initializes the prim network algorithm.
+
+        - grid as Grid object. """
+
+        self.grid: Grid = grid
+
+    def calculate_solution(self) -> None:
+        """ Executes the prim network algorithm to create a grid with valid
+        battery and house connections. Paths can be shared with other houses
+        of the same battery. """
+
+        house_list = self.grid.house_list
+        battery_list = self.grid.battery_list
+        router = CableRouter(self.grid)
+
+        # the current distance of every house to the network of every battery
+        self.distance_matrix: List[List[int]] = []
+        distance_matrix = self.distance_matrix
+        queue: List[Tuple[int, bool, int, int]] = []
+        for house_index, house in enumerate(house_list):
+            distance_list = []
+            for battery_index, battery in enumerate(battery_list):
+                distance, _ = router.get_connection(house.cell, battery)
+                distance_list.append(distance)
+                queue.append((distance, False, house_index, battery_index))
+            distance_matrix.append(distance_list)
+        heapq.heapify(queue)
+
+        # every unconnected house keeps a battery with room for it, so the
+        # last houses always fit somewhere
+        self.reserved_list: List[int] = MinCostFlow(self.grid).get_assignment()
+        self.room_list: List[float] = [battery.capacity for battery in battery_list]
+        for house_index, battery_index in enumerate(self.reserved_list):
+            self.room_list[battery_index] -= house_list[house_index].max_output
+
+        self.unconnected_set: Set[int] = set(range(len(house_list)))
+        skipped_list: List[Tuple[int, bool, int, int]] = []
+
+        while self.unconnected_set:
+            if not queue:
+                # the skipped entries get another chance, the reserved
+                # battery of every house always has room
+                queue = skipped_list
+                skipped_list = []
+                heapq.heapify(queue)
+
+            entry = heapq.heappop(queue)
+            distance, _, house_index, battery_index = entry
+
+            # skip entries of connected houses and older distances
+            if (house_index not in self.unconnected_set or
+                distance != distance_matrix[house_index][battery_index]):
+                continue
+
+            if not self.make_room(house_index, battery_index):
+                skipped_list.append(entry)
+                continue
+
+            house = house_list[house_index]
+            battery = battery_list[battery_index]
+            _, end_cell = router.get_connection(house.cell, battery)
+            self.unconnected_set.remove(house_index)
+            self.connect(house, battery, end_cell)
+            router.add_cells(battery, [cable.cell for cable in house.cable_list])
+
+            # only the distances to the network that grew can change
+            for other_index in self.unconnected_set:
+                other_distance, end_cell = router.get_connection(house_list[other_index].cell,
+                                                                 battery)
+                if other_distance < distance_matrix[other_index][battery_index]:
+                    distance_matrix[other_index][battery_index] = other_distance
+                    heapq.heappush(queue, (other_distance, end_cell is not battery.cell,
+                                           other_index, battery_index))
+
+        self.grid.non_allocated_house_list = []
+
+        print(f"Prim network: {len(self.grid.cable_list)} cables.")
+
+        saved_cables = optimise_networks(self.grid)
+        print(f"Steiner trees saved {saved_cables} cable(s).")
+
+    def make_room(self, house_index: int, battery_index: int) -> bool:
+        """ Checks if a battery can take a house while the other unconnected
+        houses keep a valid battery. The valid batteries of the unconnected
+        houses are kept in self.reserved_list. When the house is reserved
+        for another battery, one other house of the battery gets relocated or
+        swapped to make room (the move with the least extra distance).
+
+        - house_index as an int.
+        - battery_index as an int.
+
+        Returns: True if the house can be connected to the battery, the
+        reservations are then updated. """
+
+        reserved_list = self.reserved_list
+        room_list = self.room_list
+        house_list = self.grid.house_list
+        old_battery_index = reserved_list[house_index]
+
+        if old_battery_index == battery_index:
+            return True
+
+        output = house_list[house_index].max_output
+        room_list[old_battery_index] += output
+        room_list[battery_index] -= output
+        reserved_list[house_index] = battery_index
+        if room_list[battery_index] >= 0:
+            return True
+
+        # move another house of the battery, or swap it with a smaller house
+        shortage = -room_list[battery_index]
+        best_move = None
+        for other_index in self.unconnected_set:
+            if other_index == house_index or reserved_list[other_index] != battery_index:
+                continue
+
+            other_output = house_list[other_index].max_output
+            if other_output < shortage:
+                continue
+
+            for new_battery_index in range(len(room_list)):
+                if new_battery_index == battery_index:
+                    continue
+
+                option_list = [(None, 0.0)] + [(swap_index, house_list[swap_index].max_output)
+                                               for swap_index in self.unconnected_set
+                                               if reserved_list[swap_index] == new_battery_index and
+                                               swap_index != house_index]
+                for swap_index, swap_output in option_list:
+                    difference = other_output - swap_output
+                    if difference < shortage or room_list[new_battery_index] < difference:
+                        continue
+
+                    cost = (self.distance_matrix[other_index][new_battery_index] -
+                            self.distance_matrix[other_index][battery_index])
+                    if swap_index is not None:
+                        cost += (self.distance_matrix[swap_index][battery_index] -
+                                 self.distance_matrix[swap_index][new_battery_index])
+
+                    if best_move is None or cost < best_move[0]:
+                        best_move = (cost, other_index, new_battery_index, swap_index, difference)
+
+        if best_move is None:
+            room_list[old_battery_index] -= output
+            room_list[battery_index] += output
+            reserved_list[house_index] = old_battery_index
+            return False
+
+        _, other_index, new_battery_index, swap_index, difference = best_move
+        reserved_list[other_index] = new_battery_index
+        if swap_index is not None:
+            reserved_list[swap_index] = battery_index
+        room_list[battery_index] += difference
+        room_list[new_battery_index] -= difference
+
+        return True
+
+    def connect(self, house: House, battery: Battery, end_cell: Cell) -> None:
+        """ Connects a house to a battery and draws the path to the end cell.
+
+        - house as a House object.
+        - battery as a Battery object.
+        - end_cell as a Cell object of the network of the battery. """
+
+        battery.capacity -= house.max_output
+        battery.house_list.append(house)
+        house.battery = battery
+        self.grid.allocated_house_list.append(house)
+        self.draw_path(house.cell, end_cell, battery, house)
+
+    def draw_path(self, start_cell: Cell, end_cell: Cell, battery: Battery,
+                  house: House) -> None:
+        """ Method that draws a path between a start cell and end cell.
+        Can connect to other cables and stores the rest of the cable between
+        the connection and the battery in the house shared_cable_list.
+
+        - start_cell as a Cell object as start of the cable
+        - end_cell as a Cell object as end of the cable
+        - battery as a battery object for the battery connection
+        - house as the house connection for the house connection. """
+
+        connect_house(self.grid, house, battery, end_cell)
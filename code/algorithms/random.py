@@ -5,7 +5,7 @@ from code.algorithms.algorithm import Algorithm
 from code.classes.grid import Grid
 from code.classes.battery import Battery
 from code.classes.house import House
-from code.classes.cable import Cable
+from code.classes.cable_router import connect_house
 
 class Random(Algorithm):
     """ Class that generates a random solution
@@ -62,33 +62,4 @@ class Random(Algorithm):
         - battery as a battery object for the battery connection
         - house as the house connection for the house connection. """
 
-        if battery is None:
-            Exception("House misses a battery connection.")
-
-        house_index = house.cell.get_index()
-        battery_index = battery.cell.get_index()
-
-        delta = (battery_index[0] - house_index[0],
-                 battery_index[1] - house_index[1])
-        incerement_x = 1 if delta[0] > 0 else -1
-        incerement_y = 1 if delta[1] > 0 else -1
-
-        for x in range(house_index[0], battery_index[0] + incerement_x,
-                       incerement_x):
-            cell = self.grid.grid[x][house_index[1]]
-            cable = Cable(cell, battery, house)
-            cell.cable_list.append(cable)
-            house.cable_list.append(cable)
-            self.grid.cable_list.append(cable)
-
-        for y in range(house_index[1] + incerement_y, battery_index[1] +
-                       incerement_y, incerement_y):
-            cell = self.grid.grid[battery_index[0]][y]
-            cable = Cable(cell, battery, house)
-            cell.cable_list.append(cable)
-            house.cable_list.append(cable)
-            self.grid.cable_list.append(cable)
-
-        if (battery_index[0] != house.cable_list[-1].cell.x_index or
-            battery_index[1] != house.cable_list[-1].cell.y_index):
-            Exception("Cables are not connected to the battery") 
+        connect_house(self.grid, house, battery)
@@ -4,7 +4,7 @@ if TYPE_CHECKING:
     from code.classes.cell import Cell
 
 import pygame
-from typing import List, Dict
+from typing import List, Dict, Optional
 from copy import copy
 from code.classes.house import House
 from code.classes.cable import Cable
@@ -14,15 +14,17 @@ class Battery():
     """ Class that holds the logic for the batteries on the grid. """
 
 
-    def __init__(self, cell: Cell, capacity: float) -> None:
+    def __init__(self, cell: Cell, capacity: float, price: Optional[float] = None) -> None:
         """ Initializes a battery object. 
         
         - Needs a cell as a Cell object
-        - Needs a capacity as a float. """
+        - Needs a capacity as a float.
+        - price as a float, None uses the battery cost of the program. """
 
         self.cell = cell
         self.max_capacity = capacity
         self.capacity = capacity
+        self.price = price
 
         self.house_list: List[House] = []
         self.cable_list: List[Cable] = []
@@ -50,7 +52,7 @@ class Battery():
         deepcopies for efficiency). """
 
         new_cell = copy(self.cell)
-        new_battery = Battery(new_cell, self.max_capacity)
+        new_battery = Battery(new_cell, self.max_capacity, self.price)
         new_battery.capacity = self.capacity
         new_battery.house_list = copy(self.house_list)
         new_battery.cable_list = copy(self.cable_list)
@@ -10,6 +10,9 @@ from code.classes.house import House
 class Cable():
     """ Class that holds the logic for the cables on the grid. """
 
+    # a grid holds many cables, slots make creating them cheaper
+    __slots__ = ("cell", "battery", "house")
+
     def __init__(self, cell: Cell, battery: Battery, house: House) -> None:
         """ Initializes a cable object.
 
@@ -0,0 +1,403 @@
+from __future__ import annotations
+from collections import deque
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional, Set
+if TYPE_CHECKING:
+    from code.classes.grid import Grid
+    from code.classes.cell import Cell
+    from code.classes.battery import Battery
+    from code.classes.house import House
+
+from code.classes.cable import Cable
+
+
+class CableRouter():
+    """ Class that finds the cheapest connection between a cell and the
+    network (battery and cables) of every battery. Cells of the network cost
+    nothing and every other cell costs one cable, so for every battery a 0-1
+    BFS keeps the amount of new cables from every grid cell to the network
+    and the network cell where that route ends. Adding cables only updates
+    the cells that got closer to the network, so a connection can be looked
+    up for every house while a solution is being built. """
+
+    def __init__(self, grid: Grid) -> None:
+        """ Initializes the router with the batteries and the cables that are
+        already on the grid.
+
+        - grid as Grid object. """
+
+        self.grid: Grid = grid
+        self.grid_size: int = grid.grid_size
+
+        # the neighbours of every cell by flat index (x * grid_size + y)
+        self.neighbour_list: List[Tuple[int, ...]] = []
+        for x_index in range(self.grid_size):
+            for y_index in range(self.grid_size):
+                index = x_index * self.grid_size + y_index
+                neighbour_list = []
+                if x_index > 0:
+                    neighbour_list.append(index - self.grid_size)
+                if x_index < self.grid_size - 1:
+                    neighbour_list.append(index + self.grid_size)
+                if y_index > 0:
+                    neighbour_list.append(index - 1)
+                if y_index < self.grid_size - 1:
+                    neighbour_list.append(index + 1)
+                self.neighbour_list.append(tuple(neighbour_list))
+
+        # the distance of every cell to a battery without cables
+        self.battery_distance_dict: Dict[Battery, List[int]] = {}
+        for battery in grid.battery_list:
+            battery_x, battery_y = battery.cell.get_index()
+            self.battery_distance_dict[battery] = [abs(x_index - battery_x) + abs(y_index - battery_y)
+                                                   for x_index in range(self.grid_size)
+                                                   for y_index in range(self.grid_size)]
+
+        self.reset()
+
+    def reset(self) -> None:
+        """ Resets the networks to the batteries and the cables that are on
+        the grid. """
+
+        self.distance_dict: Dict[Battery, List[int]] = {}
+        self.source_dict: Dict[Battery, List[int]] = {}
+
+        for battery in self.grid.battery_list:
+            battery_x, battery_y = battery.cell.get_index()
+            self.distance_dict[battery] = list(self.battery_distance_dict[battery])
+            self.source_dict[battery] = [battery_x * self.grid_size + battery_y] * (self.grid_size ** 2)
+
+            # the battery goes first so it wins a tie with a cable
+            self.add_cells(battery, [cable.cell for cable in battery.cable_list])
+
+    def add_cells(self, battery: Battery, cell_list: List[Cell]) -> None:
+        """ Adds cells to the network of a battery and updates the cells that
+        are closer to these cells than to the rest of the network. A cell only
+        changes when it gets strictly closer, so older parts of the network win
+        a tie.
+
+        - battery as a Battery object.
+        - cell_list as a list of Cell objects with a cable of the battery. """
+
+        distance_list = self.distance_dict[battery]
+        source_list = self.source_dict[battery]
+        neighbour_list = self.neighbour_list
+        queue = deque()
+
+        # cells of the network have no cost and go in the front of the queue
+        for cell in cell_list:
+            index = cell.x_index * self.grid_size + cell.y_index
+            if distance_list[index] != 0:
+                distance_list[index] = 0
+                source_list[index] = index
+                queue.appendleft(index)
+
+        while queue:
+            index = queue.popleft()
+            distance = distance_list[index] + 1
+            source = source_list[index]
+
+            for neighbour in neighbour_list[index]:
+                if distance < distance_list[neighbour]:
+                    distance_list[neighbour] = distance
+                    source_list[neighbour] = source
+                    queue.append(neighbour)
+
+    def get_connection(self, cell: Cell, battery: Battery) -> Tuple[int, Cell]:
+        """ Gets the cheapest connection between a cell and the network of a
+        battery. The route is the path of draw_path towards the returned
+        cell, no other cell of the network is closer.
+
+        - cell as a Cell object.
+        - battery as a Battery object.
+
+        Returns: a tuple of the amount of new cells between the cell and the
+        network and the cell of the network to connect to. """
+
+        index = cell.x_index * self.grid_size + cell.y_index
+        source = self.source_dict[battery][index]
+        x_index, y_index = divmod(source, self.grid_size)
+
+        if (x_index, y_index) == battery.cell.get_index():
+            return self.distance_dict[battery][index], battery.cell
+
+        return self.distance_dict[battery][index], self.grid.get_cell_by_index(x_index, y_index)
+
+
+def get_path(start_position: Tuple[int, int], end_position: Tuple[int, int],
+             vertical_first: bool=False) -> List[Tuple[int, int]]:
+    """ Gets the cells of an L-shaped path between two positions, the start
+    and end position included.
+
+    - start_position as a tuple of the x and y index.
+    - end_position as a tuple of the x and y index.
+
+    Optional parameters:
+    - vertical_first as a bool, goes towards the y position of the end first
+    (Default = False).
+
+    Returns: a list with the positions of the path. """
+
+    start_x, start_y = start_position
+    end_x, end_y = end_position
+
+    incerement_x = 1 if end_x - start_x > 0 else -1
+    incerement_y = 1 if end_y - start_y > 0 else -1
+
+    if vertical_first:
+        return ([(start_x, y) for y in range(start_y, end_y + incerement_y, incerement_y)] +
+                [(x, end_y) for x in range(start_x + incerement_x, end_x + incerement_x, incerement_x)])
+
+    return ([(x, start_y) for x in range(start_x, end_x + incerement_x, incerement_x)] +
+            [(end_x, y) for y in range(start_y + incerement_y, end_y + incerement_y, incerement_y)])
+
+
+def get_closest_position(house_position: Tuple[int, int], position_list: List[Tuple[int, int]]
+                         ) -> Tuple[int, Tuple[int, int]]:
+    """ Gets the closest position of a network to a house. The first
+    position (the battery) is used unless a later position is strictly
+    closer.
+
+    - house_position as a tuple of the x and y index.
+    - position_list as a list of the positions of the network, the battery
+    first.
+
+    Returns: a tuple of the distance and the position. """
+
+    house_x, house_y = house_position
+
+    end_position = position_list[0]
+    shortest_distance = abs(end_position[0] - house_x) + abs(end_position[1] - house_y)
+    for position in position_list:
+        distance = abs(position[0] - house_x) + abs(position[1] - house_y)
+        if distance < shortest_distance:
+            shortest_distance = distance
+            end_position = position
+
+    return shortest_distance, end_position
+
+
+def extend_network(network: Tuple[List[Tuple[int, int]], Set[Tuple[int, int]]],
+                   start_position: Tuple[int, int], end_position: Tuple[int, int]) -> None:
+    """ Adds the new positions of the path between a house and the end of its
+    cable to a network, the same cells as get_path.
+
+    - network as a tuple of a list of positions and a set of the same
+    positions.
+    - start_position as a tuple of the x and y index of the house.
+    - end_position as a tuple of the x and y index. """
+
+    position_list, position_set = network
+    for position in get_path(start_position, end_position):
+        if position not in position_set:
+            position_set.add(position)
+            position_list.append(position)
+
+
+def route_network(battery_position: Tuple[int, int], house_position_list: List[Tuple[int, int]],
+                  choose_orientation: bool=True
+                  ) -> Tuple[int, List[Tuple[Tuple[int, int], bool]]]:
+    """ Routes the houses of a battery in their order to the closest cell of
+    the network. A path to the closest cell never crosses the network, so
+    both orientations of the L-shape need the same cables. The orientation
+    only changes how close the network gets to the next houses, so the
+    orientation is chosen that brings the houses that still have to be
+    connected closest to the network.
+
+    - battery_position as a tuple of the x and y index.
+    - house_position_list as a list of house positions in connection order.
+
+    Optional parameters:
+    - choose_orientation as a bool, when False every path goes horizontally
+    first (Default = True).
+
+    Returns: a tuple of the amount of cables and a list with the end position
+    and orientation of every connection. """
+
+    total_cables = 0
+    connection_list: List[Tuple[Tuple[int, int], bool]] = []
+
+    # without a choice of orientation a scan of the network is enough
+    if not choose_orientation:
+        network = ([battery_position], {battery_position})
+        for house_position in house_position_list:
+            distance, end_position = get_closest_position(house_position, network[0])
+
+            # a path has a cable on the start and end cell
+            total_cables += distance + 1
+            connection_list.append((end_position, False))
+            extend_network(network, house_position, end_position)
+
+        return total_cables, connection_list
+
+    position_set = {battery_position}
+
+    # distance of every house to the network so far and the closest cell
+    distance_list = [abs(x - battery_position[0]) + abs(y - battery_position[1])
+                     for x, y in house_position_list]
+    end_position_list = [battery_position] * len(house_position_list)
+
+    for index, (house_x, house_y) in enumerate(house_position_list):
+        end_position = end_position_list[index]
+
+        # a path has a cable on the start and end cell
+        total_cables += distance_list[index] + 1
+
+        new_position_list = [position for position in get_path((house_x, house_y), end_position)
+                             if position not in position_set]
+        vertical_first = False
+
+        if choose_orientation and index + 1 < len(house_position_list):
+            other_position_list = [position for position
+                                   in get_path((house_x, house_y), end_position, True)
+                                   if position not in position_set]
+
+            score_list = []
+            for path_position_list in (new_position_list, other_position_list):
+                score = 0
+                for (x, y), distance in zip(house_position_list[index + 1:],
+                                            distance_list[index + 1:]):
+                    for position in path_position_list:
+                        distance = min(distance, abs(position[0] - x) + abs(position[1] - y))
+                    score += distance
+                score_list.append(score)
+
+            if score_list[1] < score_list[0]:
+                new_position_list = other_position_list
+                vertical_first = True
+
+        connection_list.append((end_position, vertical_first))
+
+        position_set.update(new_position_list)
+
+        # the next houses only have to check the new cells
+        for other_index in range(index + 1, len(house_position_list)):
+            x, y = house_position_list[other_index]
+            for position in new_position_list:
+                distance = abs(position[0] - x) + abs(position[1] - y)
+                if distance < distance_list[other_index]:
+                    distance_list[other_index] = distance
+                    end_position_list[other_index] = position
+
+    return total_cables, connection_list
+
+
+def calculate_distance(start_cell: Cell, end_cell: Cell) -> int:
+    """ Calculates the distance between two cells.
+    Distance is in cells.
+
+    - start_cell as Cell object.
+    - end_cell as Cell object.
+
+    Returns: the distance between the two cells in grid cells
+    as an int. """
+
+    return abs(start_cell.x_index - end_cell.x_index) + abs(start_cell.y_index - end_cell.y_index)
+
+
+def get_closest_cell(cell: Cell, battery: Battery) -> Tuple[int, Cell]:
+    """ Gets the closest cell of the network of a battery by scanning its
+    cables. The battery is used unless a cable is strictly closer.
+
+    - cell as a Cell object.
+    - battery as a Battery object.
+
+    Returns: a tuple of the distance and the cell of the network. """
+
+    best_cell = battery.cell
+    shortest_distance = calculate_distance(cell, battery.cell)
+    for cable in battery.cable_list:
+        distance = calculate_distance(cell, cable.cell)
+        if distance < shortest_distance:
+            shortest_distance = distance
+            best_cell = cable.cell
+
+    return shortest_distance, best_cell
+
+
+def connect_house(grid: Grid, house: House, battery: Battery, end_cell: Optional[Cell]=None,
+                  vertical_first: bool=False) -> None:
+    """ Lays the cables between a house and its battery, used by every
+    algorithm. Without an end cell the house gets connected directly to the
+    battery. Otherwise the path ends at the end cell, which has to be the
+    battery or a cable of the battery, and the rest of the cable between the
+    connection and the battery gets stored in the house shared_cable_list.
+    Raises an exception when the connection isn't valid.
+
+    - grid as Grid object.
+    - house as House object.
+    - battery as Battery object.
+
+    Optional parameters:
+    - end_cell as a Cell object as end of the cable (Default = None).
+    - vertical_first as a bool, draws the path towards the y position of the
+    end cell first (Default = False). """
+
+    if house.battery is None or battery is None:
+        raise Exception("House misses a battery connection.")
+
+    battery_position = battery.cell.get_index()
+    end_position = battery_position if end_cell is None else end_cell.get_index()
+
+    # a shared connection continues over the cable of another house
+    if end_position != battery_position:
+        house.shared_cable_list = get_shared_cable(end_cell, battery)
+
+    add_cables(grid, get_path(house.cell.get_index(), end_position, vertical_first),
+               battery, house)
+
+
+def add_cables(grid: Grid, position_list: List[Tuple[int, int]], battery: Battery,
+               house: House) -> None:
+    """ Creates the cables of a path at once and adds them to the cells, the
+    house, the battery and the grid.
+
+    - grid as Grid object.
+    - position_list as a list of the positions of the path.
+    - battery as Battery object.
+    - house as House object. """
+
+    cable_list = [Cable(grid.grid[x][y], battery, house) for x, y in position_list]
+
+    for cable in cable_list:
+        cable.cell.cable_list.append(cable)
+
+    house.cable_list.extend(cable_list)
+    battery.cable_list.extend(cable_list)
+    grid.cable_list.extend(cable_list)
+
+
+def get_shared_cable(connected_cable_cell: Cell, battery: Battery) -> List[Cable]:
+    """ Gets the rest of the cable between the shared connection and the
+    battery. Needs a cell of the connected cable location and the battery
+    to connect to. Batteries are compared on their position, so this also
+    works on deepcopied grids.
+
+    - connected_cable_cell as a Cell object
+    - battery as a Battery object
+
+    Returns: a list of Cable objects that are shared with
+    another house. """
+
+    battery_position = battery.cell.get_index()
+
+    for cable in connected_cable_cell.cable_list:
+        if cable.battery is battery or cable.battery.cell.get_index() == battery_position:
+            cable_index = cable.house.cable_list.index(cable)
+            return cable.house.cable_list[cable_index + 1:]
+
+    raise Exception("Could not find a valid connection")
+
+
+def remove_network(grid: Grid, battery: Battery) -> None:
+    """ Removes all cables of a battery from the cells and the grid, the
+    houses keep their battery.
+
+    - grid as Grid object.
+    - battery as Battery object. """
+
+    cable_set = set(battery.cable_list)
+    for cable in battery.cable_list:
+        cable.cell.cable_list = [other_cable for other_cable in cable.cell.cable_list
+                                 if other_cable not in cable_set]
+    grid.cable_list = [cable for cable in grid.cable_list if cable not in cable_set]
+    battery.cable_list = []
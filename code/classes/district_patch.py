@@ -0,0 +1,273 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional, Set
+if TYPE_CHECKING:
+    from code.classes.grid import Grid
+    from code.classes.battery import Battery
+    from code.classes.cell import Cell
+
+from code.classes.house import House
+from code.classes.cable_router import connect_house, calculate_distance, get_closest_cell
+from code.classes.solution_loader import get_position
+from code.classes.steiner_tree import rebuild_network
+from code.algorithms.min_cost_flow import MinCostFlow
+
+
+class DistrictPatch():
+    """ Class that updates a finished solution when houses of the district
+    are added, removed or change their output. A new house gets connected to
+    the closest network of a battery with room, the networks of the
+    batteries that lose a house are rebuilt as Steiner trees. When a battery
+    has too little capacity, houses are relocated to or swapped with other
+    batteries (the moves with the least extra distance) and only the
+    networks of the batteries that changed are rebuilt. When these moves get
+    stuck, the houses are reassigned with min cost flow. """
+
+    def __init__(self, grid: Grid) -> None:
+        """ Initializes the patch for a grid with a solution.
+
+        - grid as Grid object. """
+
+        self.grid = grid
+
+        # the batteries of which the network has to be rebuilt
+        self.changed_battery_set: Set[Battery] = set()
+
+        # the distance of a house to the network of a battery during a repair
+        self.distance_dict: Dict[Tuple[House, Battery], int] = {}
+
+    def apply_diff(self, diff: Dict) -> None:
+        """ Applies a district diff and repairs the solution. The diff has
+        the lists "removed" (locations), "added" and "changed" (dicts with a
+        location and an output), the locations in the "x,y" format of the
+        output file.
+
+        - diff as a dict. """
+
+        for location in diff.get("removed", []):
+            self.remove_house(get_position(location))
+
+        for house_diff in diff.get("changed", []):
+            self.change_output(get_position(house_diff["location"]), float(house_diff["output"]))
+
+        for house_diff in diff.get("added", []):
+            self.add_house(get_position(house_diff["location"]), float(house_diff["output"]))
+
+        self.repair()
+
+    def remove_house(self, position: Tuple[int, int]) -> None:
+        """ Removes a house from the district and its battery. When other
+        houses continue over its path, the network of the battery gets
+        rebuilt in the repair, otherwise only its path is removed.
+
+        - position as a tuple of the x and y index. """
+
+        house = self.get_house(position)
+        battery = house.battery
+        if battery is not None:
+            battery.house_list.remove(house)
+            battery.capacity += house.max_output
+
+            # without houses that continue over its path, only the path goes
+            if any(cable.house is house for other_house in battery.house_list
+                   for cable in other_house.shared_cable_list):
+                self.changed_battery_set.add(battery)
+            else:
+                self.remove_cables(house)
+
+        self.grid.house_list.remove(house)
+        if house in self.grid.allocated_house_list:
+            self.grid.allocated_house_list.remove(house)
+        if house in self.grid.non_allocated_house_list:
+            self.grid.non_allocated_house_list.remove(house)
+        house.cell.house = None
+
+    def change_output(self, position: Tuple[int, int], output: float) -> None:
+        """ Changes the output of a house, the battery can get overloaded
+        until the repair.
+
+        - position as a tuple of the x and y index.
+        - output as a float. """
+
+        house = self.get_house(position)
+        if house.battery is not None:
+            house.battery.capacity += house.max_output - output
+        house.max_output = output
+
+    def add_house(self, position: Tuple[int, int], output: float) -> None:
+        """ Adds a house to the district and connects it to the closest
+        network of a battery with room. When no battery has room, the house
+        goes to the closest battery and gets connected in the repair.
+
+        - position as a tuple of the x and y index.
+        - output as a float. """
+
+        cell = self.grid.get_cell_by_index(position[0], position[1])
+        if cell.house is not None or cell.battery is not None:
+            raise Exception(f"The cell {position} already has a house or a battery.")
+
+        house = House(cell, output)
+        cell.house = house
+        self.grid.house_list.append(house)
+        self.grid.allocated_house_list.append(house)
+
+        best_connection: Optional[Tuple[int, Battery, Cell]] = None
+        for battery in self.grid.battery_list:
+            if battery.capacity >= output:
+                distance, end_cell = get_closest_cell(cell, battery)
+                if best_connection is None or distance < best_connection[0]:
+                    best_connection = (distance, battery, end_cell)
+
+        if best_connection is None:
+            battery = min(self.grid.battery_list,
+                          key=lambda battery: calculate_distance(cell, battery.cell))
+            self.assign(house, battery)
+            self.changed_battery_set.add(battery)
+            return
+
+        _, battery, end_cell = best_connection
+        self.assign(house, battery)
+        connect_house(self.grid, house, battery, end_cell)
+
+    def repair(self) -> None:
+        """ Moves houses away from the overloaded batteries and rebuilds the
+        networks of the batteries that changed. """
+
+        for battery in self.grid.battery_list:
+            while battery.capacity < 0:
+                if not self.make_room(battery):
+                    break
+
+        # the relocations and swaps got stuck, so every house gets reassigned
+        if any(battery.capacity < 0 for battery in self.grid.battery_list):
+            self.reassign()
+
+        for battery in self.changed_battery_set:
+            rebuild_network(self.grid, battery)
+
+        self.changed_battery_set = set()
+        self.distance_dict = {}
+
+    def make_room(self, battery: Battery) -> bool:
+        """ Relocates a house of an overloaded battery to another battery, or
+        swaps it with a smaller house of another battery. The move with the
+        least extra cables that brings the battery closest to its capacity
+        is used.
+
+        - battery as an overloaded Battery object.
+
+        Returns: True if a house was moved, else False. """
+
+        shortage = -battery.capacity
+        best_move: Optional[Tuple[Tuple[bool, int], House, Battery, Optional[House]]] = None
+
+        for house in battery.house_list:
+            for other_battery in self.grid.battery_list:
+                if other_battery is battery:
+                    continue
+
+                option_list: List[Optional[House]] = [None] + other_battery.house_list
+                for swap_house in option_list:
+                    swap_output = 0.0 if swap_house is None else swap_house.max_output
+                    difference = house.max_output - swap_output
+                    if difference <= 0 or other_battery.capacity < difference:
+                        continue
+
+                    cost = self.get_move_cost(house, other_battery)
+                    if swap_house is not None:
+                        cost += self.get_move_cost(swap_house, battery)
+
+                    # a move that solves the shortage goes first
+                    key = (difference < shortage, cost)
+                    if best_move is None or key < best_move[0]:
+                        best_move = (key, house, other_battery, swap_house)
+
+        if best_move is None:
+            return False
+
+        _, house, other_battery, swap_house = best_move
+        self.move(house, other_battery)
+        if swap_house is not None:
+            self.move(swap_house, battery)
+
+        return True
+
+    def get_move_cost(self, house: House, battery: Battery) -> int:
+        """ Estimates the extra cables when a house moves to another battery:
+        the distance to the network of the new battery minus the cables of
+        its current path. The networks don't change while houses are moved,
+        so the distances are cached until the repair is done.
+
+        - house as a House object.
+        - battery as the new Battery object.
+
+        Returns: the estimated extra cables as an int. """
+
+        key = (house, battery)
+        if key not in self.distance_dict:
+            self.distance_dict[key] = get_closest_cell(house.cell, battery)[0] + 1
+
+        return self.distance_dict[key] - len(house.cable_list)
+
+    def reassign(self) -> None:
+        """ Reassigns every house with the min cost flow assignment, only the
+        houses that get another battery are moved. """
+
+        battery_index_list = MinCostFlow(self.grid).get_assignment()
+        for house, battery_index in zip(self.grid.house_list, battery_index_list):
+            battery = self.grid.battery_list[battery_index]
+            if house.battery is not battery:
+                self.move(house, battery)
+
+    def move(self, house: House, battery: Battery) -> None:
+        """ Moves a house to another battery, both networks get rebuilt in the
+        repair.
+
+        - house as a House object with a battery.
+        - battery as the new Battery object. """
+
+        old_battery = house.battery
+        old_battery.house_list.remove(house)
+        old_battery.capacity += house.max_output
+        self.changed_battery_set.add(old_battery)
+
+        self.assign(house, battery)
+        self.changed_battery_set.add(battery)
+
+    def assign(self, house: House, battery: Battery) -> None:
+        """ Assigns a house to a battery without laying cables.
+
+        - house as a House object.
+        - battery as a Battery object. """
+
+        battery.capacity -= house.max_output
+        battery.house_list.append(house)
+        house.battery = battery
+
+    def remove_cables(self, house: House) -> None:
+        """ Removes the cables of the path of a house from the cells, its
+        battery and the grid.
+
+        - house as a House object with a battery. """
+
+        cable_set = set(house.cable_list)
+        for cable in house.cable_list:
+            cable.cell.cable_list.remove(cable)
+
+        house.battery.cable_list = [cable for cable in house.battery.cable_list
+                                    if cable not in cable_set]
+        self.grid.cable_list = [cable for cable in self.grid.cable_list if cable not in cable_set]
+        house.cable_list = []
+        house.shared_cable_list = []
+
+    def get_house(self, position: Tuple[int, int]) -> House:
+        """ Gets the house on a position.
+
+        - position as a tuple of the x and y index.
+
+        Returns: the House object. """
+
+        house = self.grid.get_cell_by_index(position[0], position[1]).house
+        if house is None:
+            raise Exception(f"The cell {position} has no house.")
+
+        return house
@@ -0,0 +1,110 @@
+from __future__ import annotations
+import heapq
+from typing import TYPE_CHECKING, List, Tuple, Set, Optional
+if TYPE_CHECKING:
+    from code.classes.grid import Grid
+
+
+def calculate_lower_bound(grid: Grid) -> int:
+    """ Calculates a lower bound on the amount of cables of a district with
+    the current battery positions. Every house path has one cable more than
+    its length, the rest of the cables of a battery form a Steiner tree on
+    the grid between the battery and its houses. Leaving out the capacities,
+    the trees of all batteries together are at least a Steiner tree between
+    the houses and any battery, which is bounded from below with the dual
+    ascent of Wong.
+
+    - grid as Grid object.
+
+    Returns: the lower bound in cables as an int. """
+
+    root_set = {battery.cell.get_index() for battery in grid.battery_list}
+    terminal_list = [house.cell.get_index() for house in grid.house_list
+                     if house.cell.get_index() not in root_set]
+
+    return len(grid.house_list) + calculate_dual_ascent(grid.grid_size, terminal_list, root_set)
+
+
+def calculate_dual_ascent(grid_size: int, terminal_list: List[Tuple[int, int]],
+                          root_set: Set[Tuple[int, int]]) -> int:
+    """ Calculates the dual ascent bound of the Steiner tree between the
+    terminals and the root cells. Every step takes the cells that reach a
+    terminal over saturated edges, and raises the cost of the edges that
+    enter these cells by one. A terminal is done when it reaches a root
+    cell. The terminal with the least entering edges goes first, which
+    makes the bound stronger.
+
+    - grid_size as an int.
+    - terminal_list as a list of positions.
+    - root_set as a set of positions.
+
+    Returns: the bound as an int, the length of every tree is at least this
+    bound. """
+
+    # the neighbours of every cell by flat index (x * grid_size + y)
+    neighbour_list: List[Tuple[int, ...]] = []
+    for x_index in range(grid_size):
+        for y_index in range(grid_size):
+            index = x_index * grid_size + y_index
+            neighbour_list.append(tuple(
+                neighbour for neighbour, valid in ((index - grid_size, x_index > 0),
+                                                   (index + grid_size, x_index < grid_size - 1),
+                                                   (index - 1, y_index > 0),
+                                                   (index + 1, y_index < grid_size - 1))
+                if valid))
+
+    # the cost left on the edge from every neighbour into a cell
+    slack_list = [[1] * len(neighbours) for neighbours in neighbour_list]
+    root_index_set = {x * grid_size + y for x, y in root_set}
+
+    def get_component(terminal: int) -> Tuple[Optional[Set[int]], int]:
+        component = {terminal}
+        stack = [terminal]
+        while stack:
+            index = stack.pop()
+            for neighbour, slack in zip(neighbour_list[index], slack_list[index]):
+                if slack == 0 and neighbour not in component:
+                    if neighbour in root_index_set:
+                        return None, 0
+                    component.add(neighbour)
+                    stack.append(neighbour)
+
+        return component, sum(neighbour not in component for index in component
+                              for neighbour in neighbour_list[index])
+
+    # the sizes of the cuts are updated lazily
+    queue = [(0, x * grid_size + y) for x, y in terminal_list]
+    bound = 0
+
+    while queue:
+        _, terminal = heapq.heappop(queue)
+        component, cut_size = get_component(terminal)
+        if component is None:
+            continue
+
+        if queue and cut_size > queue[0][0]:
+            heapq.heappush(queue, (cut_size, terminal))
+            continue
+
+        for index in component:
+            slack_list[index] = [slack - (neighbour not in component) for neighbour, slack
+                                 in zip(neighbour_list[index], slack_list[index])]
+        bound += 1
+        heapq.heappush(queue, (cut_size, terminal))
+
+    return bound
+
+
+def calculate_gap(total_cables: int, lower_bound: int) -> float:
+    """ Calculates the optimality gap of a solution.
+
+    - total_cables as an int.
+    - lower_bound as an int.
+
+    Returns: the gap as a float, the part of the cables of the solution
+    that could at most be saved. """
+
+    if total_cables <= 0:
+        return 0.0
+
+    return max(0.0, (total_cables - lower_bound) / total_cables)
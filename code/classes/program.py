@@ -2,7 +2,7 @@ import pygame
 import csv
 import json
 import time
-from typing import List
+from typing import List, Optional, Union
 from statistics import mean, median
 from code.classes.battery import Battery
 from code.classes.house import House
@@ -10,8 +10,13 @@ from code.classes.cable import Cable
 from code.classes.grid import Grid
 from code.classes.cell import Cell
 from code.classes.user_interface import UserInterface
+from code.classes.lower_bound import calculate_lower_bound, calculate_gap
+from code.classes.solution_loader import load_solution
+from code.classes.district_patch import DistrictPatch
 from code.algorithms.algorithm import Algorithm
 from code.algorithms.move_batteries_simulated_annealing import MoveBatteriesSimulatedAnnealing
+from code.algorithms.capacitated_k_medians import CapacitatedKMedians
+from code.algorithms.battery_placement import BatteryPlacement
 
 
 class Program():
@@ -64,6 +69,20 @@ class Program():
         self.house_cable_iter_list: List[Cable] = []
         self.highlight_cable_list: List[Cable] = []
         self.algorithm_list: List[Algorithm] = algorithm_list
+
+        # CapacitatedKMedians is a fast alternative that only places the batteries,
+        # BatteryPlacement also chooses the amount and the types of the batteries
+        self.battery_algorithm = MoveBatteriesSimulatedAnnealing
+
+        # runs the battery algorithm before the algorithm in console mode
+        self.place_batteries = False
+
+        # starts from the solution in this JSON output file instead of the
+        # neighbourhood csv files
+        self.solution_file: Optional[str] = None
+
+        # repairs the solution with the district diff in this JSON file
+        self.patch_file: Optional[str] = None
         self.neighhourhood_list: List[str] = neighhourhood_list
 
         # initialize console mode variable(s)
@@ -82,11 +101,17 @@ class Program():
         """ Starts the excecution of the program. """
 
         self.grid.make_grid()
-        self.import_neighbourhood()
+        if self.solution_file is not None:
+            self.import_solution()
+        else:
+            self.import_neighbourhood()
+
+        if self.patch_file is not None:
+            self.apply_patch()
 
         if self.visualisation_mode:
             self.run_visualisation_mode()
-        else:
+        elif self.patch_file is None:
             self.run_console_mode()
 
     def run_visualisation_mode(self) -> None:
@@ -148,6 +173,9 @@ class Program():
 
         cost_list: List[int] = []
 
+        if self.place_batteries:
+            self.grid = self.get_battery_algorithm().calculate_solution()
+
         # calculate a random solution
         start_time_program = time.time()
         for iteration in range(self.iterations):
@@ -156,12 +184,25 @@ class Program():
             print(self.calculate_total_cost())
 
             if iteration != self.iterations - 1:
-                self.grid.clean_grid()
+                if self.solution_file is not None:
+                    self.grid = Grid(self.screen_width, self.screen_height, self.grid_size,
+                                     self.vertical_margin, self.horizontal_margin)
+                    self.grid.make_grid()
+                    self.import_solution()
+                else:
+                    self.grid.clean_grid()
 
         end_time_program = time.time()
 
         print(f"Average: {round(mean(cost_list))}")
         print(f"Median: {round(median(cost_list))}")
+
+        # the gap of the best solution to the lower bound of the cables
+        battery_cost = self.calculate_battery_cost()
+        lower_bound = calculate_lower_bound(self.grid)
+        best_cables = (min(cost_list) - battery_cost) // self.cable_cost
+        print(f"Lower bound: {battery_cost + lower_bound * self.cable_cost} ({lower_bound} cables)")
+        print(f"Gap of the best solution: {calculate_gap(best_cables, lower_bound):.1%}")
         print(f"Total time for the program: {round(end_time_program - start_time_program, 3)} seconds for a total of {self.iterations} iteration(s)")
 
         # generate a csv file with the results
@@ -186,16 +227,30 @@ class Program():
             self.load_sprites()
 
     def execute_algoritm_battery_algorithm(self) -> None:
-        """ Executes the battery MoveBatteriesSimulatedAnnealing algorithm"""
+        """ Executes the battery algorithm (MoveBatteriesSimulatedAnnealing or
+        CapacitatedKMedians) that moves the batteries. """
 
         self.house_cable_iter_list = []
         self.highlight_cable_list = []
         self.grid.clean_grid_visualisation()
-        algorithm = MoveBatteriesSimulatedAnnealing(self.grid)
+        algorithm = self.get_battery_algorithm()
         self.grid = algorithm.calculate_solution()
         self.grid.assign_connections()
         self.load_sprites()
 
+    def get_battery_algorithm(self) -> Union[MoveBatteriesSimulatedAnnealing,
+                                             CapacitatedKMedians, BatteryPlacement]:
+        """ Makes the battery algorithm for the grid. BatteryPlacement
+        weighs the battery prices against the cables, so it gets the cable
+        cost of the program.
+
+        Returns: the battery algorithm object. """
+
+        if self.battery_algorithm is BatteryPlacement:
+            return BatteryPlacement(self.grid, self.cable_cost)
+
+        return self.battery_algorithm(self.grid)
+
     def load_sprites(self) -> None:
         """ Loads the sprites of the houses, batteries and cells for the
         visualisation mode. """
@@ -289,7 +344,14 @@ class Program():
     def calculate_total_cost(self) -> int:
         """ Calculate the total costs of the cables and batteries on the grid. """
 
-        return len(self.grid.battery_list) * self.battery_cost + len(self.grid.cable_list) * self.cable_cost
+        return self.calculate_battery_cost() + len(self.grid.cable_list) * self.cable_cost
+
+    def calculate_battery_cost(self) -> int:
+        """ Calculate the costs of the batteries on the grid. A battery
+        without a price of its own costs the battery cost of the program. """
+
+        return round(sum(self.battery_cost if battery.price is None else battery.price
+                         for battery in self.grid.battery_list))
 
     def copy_cable_list(self) -> List[Cable]:
         """ Copies a cable list and fills the cables with copied cells
@@ -338,6 +400,29 @@ class Program():
                 self.grid.house_list.append(house_object)
                 self.grid.non_allocated_house_list.append(house_object)
 
+    def import_solution(self) -> None:
+        """ Imports the solution of the JSON output file in solution_file
+        into the grid, the algorithms that improve a solution start from it. """
+
+        self.neighhourhood = str(load_solution(self.grid, self.solution_file))
+
+    def apply_patch(self) -> None:
+        """ Applies the district diff of the JSON file in patch_file to the
+        solution on the grid and writes the repaired solution in output.json. """
+
+        with open(self.patch_file) as file:
+            diff = json.load(file)
+
+        start_time = time.time()
+        DistrictPatch(self.grid).apply_diff(diff)
+        end_time = time.time()
+
+        print(f"Patched solution: {self.calculate_total_cost()} ({len(self.grid.cable_list)} cables) " +
+              f"in {round(end_time - start_time, 3)} seconds")
+
+        self.generate_output()
+        print("The patched solution replaced the solution in output.json.")
+
     def swap_neighbourhood(self) -> None:
         """ Changes the grid and loads a new neighbourhood. Clears all lists
         and loads them with the data of the new neighbourhoods. """
@@ -367,8 +452,11 @@ class Program():
                 house_output.append({"location:": f"{house.cell.x_index},{house.cell.y_index}",
                                      "output": house.max_output, "cables": cable_list_str})
         
-            output.append({"location": f"{battery.cell.x_index},{battery.cell.y_index}",
-                           "capacity": battery.max_capacity, "houses": house_output})
+            battery_output = {"location": f"{battery.cell.x_index},{battery.cell.y_index}",
+                              "capacity": battery.max_capacity, "houses": house_output}
+            if battery.price is not None:
+                battery_output["price"] = battery.price
+            output.append(battery_output)
 
             json_data = json.dumps(output)
 
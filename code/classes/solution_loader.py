@@ -0,0 +1,87 @@
+from __future__ import annotations
+import json
+from typing import TYPE_CHECKING, List, Tuple
+if TYPE_CHECKING:
+    from code.classes.grid import Grid
+
+from code.classes.battery import Battery
+from code.classes.house import House
+from code.classes.cable_router import add_cables, get_shared_cable
+
+
+def load_solution(grid: Grid, file_name: str="output.json") -> int:
+    """ Rebuilds a solution from a JSON output file (see
+    Program.generate_output) on an empty grid. The batteries and houses are
+    made from the file, the cables of every house are laid in an order in
+    which every path ends at the battery or at a cable that is already laid.
+
+    - grid as Grid object, made with make_grid() and without batteries and
+    houses.
+
+    Optional parameters:
+    - file_name as a str (Default = "output.json").
+
+    Returns: the district of the solution as an int. """
+
+    with open(file_name) as file:
+        output = json.load(file)
+
+    # the paths that still have to be laid
+    path_list: List[Tuple[House, Battery, List[Tuple[int, int]]]] = []
+
+    for battery_output in output[1:]:
+        x_index, y_index = get_position(battery_output["location"])
+        cell = grid.get_cell_by_index(x_index, y_index)
+        battery = Battery(cell, float(battery_output["capacity"]), battery_output.get("price"))
+        cell.battery = battery
+        grid.battery_list.append(battery)
+
+        for house_output in battery_output["houses"]:
+            # older output files have a colon in the key of the house location
+            location = house_output.get("location", house_output.get("location:"))
+            x_index, y_index = get_position(location)
+            cell = grid.get_cell_by_index(x_index, y_index)
+            house = House(cell, float(house_output["output"]))
+            cell.house = house
+            grid.house_list.append(house)
+
+            house.battery = battery
+            battery.house_list.append(house)
+            battery.capacity -= house.max_output
+            path_list.append((house, battery, [get_position(position)
+                                               for position in house_output["cables"]]))
+
+    while path_list:
+        remaining_path_list = []
+
+        for house, battery, path in path_list:
+            end_cell = grid.get_cell_by_index(path[-1][0], path[-1][1])
+
+            if end_cell is not battery.cell:
+                if not any(cable.battery is battery for cable in end_cell.cable_list):
+                    remaining_path_list.append((house, battery, path))
+                    continue
+                house.shared_cable_list = get_shared_cable(end_cell, battery)
+
+            add_cables(grid, path, battery, house)
+            grid.allocated_house_list.append(house)
+
+        if len(remaining_path_list) == len(path_list):
+            raise Exception("A path of the solution doesn't end at its battery or network.")
+        path_list = remaining_path_list
+
+    grid.non_allocated_house_list = []
+
+    return int(output[0]["district"])
+
+
+def get_position(location: str) -> Tuple[int, int]:
+    """ Gets a position from a location in the output file.
+
+    - location as a str of the x and y index separated by a comma.
+
+    Returns: the position as a tuple of the x and y index. """
+
+    x_index, y_index = location.split(",")
+
+    return int(x_index), int(y_index)
@@ -0,0 +1,259 @@
+from __future__ import annotations
+from collections import deque
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
+if TYPE_CHECKING:
+    from code.classes.grid import Grid
+    from code.classes.battery import Battery
+
+from code.classes.cable_router import get_path, add_cables, get_shared_cable, remove_network
+
+
+def get_spanning_tree(position_list: List[Tuple[int, int]]
+                      ) -> Tuple[int, List[Tuple[int, int]]]:
+    """ Gets the rectilinear minimum spanning tree of positions with Prim.
+
+    - position_list as a list of positions.
+
+    Returns: a tuple of the length of the tree and a list with the index
+    pairs of the edges. """
+
+    total_positions = len(position_list)
+    distance_list = [float("inf")] * total_positions
+    parent_list = [-1] * total_positions
+    used_list = [False] * total_positions
+    distance_list[0] = 0
+
+    length = 0
+    edge_list: List[Tuple[int, int]] = []
+
+    for _ in range(total_positions):
+        index = min((index for index in range(total_positions) if not used_list[index]),
+                    key=lambda index: distance_list[index])
+        used_list[index] = True
+        length += distance_list[index]
+        if parent_list[index] >= 0:
+            edge_list.append((parent_list[index], index))
+
+        x, y = position_list[index]
+        for other_index, (other_x, other_y) in enumerate(position_list):
+            if not used_list[other_index]:
+                distance = abs(other_x - x) + abs(other_y - y)
+                if distance < distance_list[other_index]:
+                    distance_list[other_index] = distance
+                    parent_list[other_index] = index
+
+    return length, edge_list
+
+
+def get_gain_list(position_list: List[Tuple[int, int]], length: int,
+                  edge_list: List[Tuple[int, int]],
+                  candidate_list: List[Tuple[int, int]]) -> List[Tuple[int, Tuple[int, int]]]:
+    """ Gets the candidates that make the spanning tree shorter. The tree
+    with a candidate is the spanning tree of the old tree edges and the edges
+    of the candidate, so every candidate only needs a small Kruskal.
+
+    - position_list as a list of positions.
+    - length as an int, the length of the spanning tree.
+    - edge_list as a list with the index pairs of the spanning tree.
+    - candidate_list as a list of candidate positions.
+
+    Returns: a list of tuples of the gain and the candidate position. """
+
+    total_positions = len(position_list)
+    tree_edge_list = [(abs(position_list[start][0] - position_list[end][0]) +
+                       abs(position_list[start][1] - position_list[end][1]), start, end)
+                      for start, end in edge_list]
+    gain_list: List[Tuple[int, Tuple[int, int]]] = []
+
+    for candidate_x, candidate_y in candidate_list:
+        candidate_edge_list = tree_edge_list + [(abs(x - candidate_x) + abs(y - candidate_y),
+                                                 total_positions, index)
+                                                for index, (x, y) in enumerate(position_list)]
+        candidate_edge_list.sort()
+
+        root_list = list(range(total_positions + 1))
+
+        def find(index: int) -> int:
+            while root_list[index] != index:
+                root_list[index] = root_list[root_list[index]]
+                index = root_list[index]
+            return index
+
+        candidate_length = 0
+        total_edges = 0
+        for distance, start, end in candidate_edge_list:
+            start_root = find(start)
+            end_root = find(end)
+            if start_root != end_root:
+                root_list[start_root] = end_root
+                candidate_length += distance
+                total_edges += 1
+                if total_edges == total_positions or candidate_length >= length:
+                    break
+
+        if candidate_length < length:
+            gain_list.append((length - candidate_length, (candidate_x, candidate_y)))
+
+    return gain_list
+
+
+def get_steiner_points(terminal_list: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """ Adds Steiner points to the terminals with batched iterated 1-Steiner.
+    Every round the gain of every point of the Hanan grid (the crossings of
+    the x and y positions of the points) is calculated, and the points are
+    added from the best gain down when they still shorten the tree. Steiner
+    points that end up with two or less neighbours in the tree are removed.
+
+    - terminal_list as a list of positions.
+
+    Returns: a list of the terminals followed by the Steiner points. """
+
+    terminal_set = set(terminal_list)
+    position_list = list(terminal_list)
+
+    while True:
+        length, edge_list = get_spanning_tree(position_list)
+
+        position_set = set(position_list)
+        x_list = sorted({x for x, _ in position_list})
+        y_list = sorted({y for _, y in position_list})
+        candidate_list = [(x, y) for x in x_list for y in y_list if (x, y) not in position_set]
+
+        gain_list = get_gain_list(position_list, length, edge_list, candidate_list)
+        gain_list.sort(reverse=True)
+
+        improved = False
+        for _, candidate in gain_list:
+            candidate_length, _ = get_spanning_tree(position_list + [candidate])
+            if candidate_length < length:
+                position_list.append(candidate)
+                length = candidate_length
+                improved = True
+
+        # a steiner point with two or less neighbours doesn't save cable
+        _, edge_list = get_spanning_tree(position_list)
+        degree_list = [0] * len(position_list)
+        for start, end in edge_list:
+            degree_list[start] += 1
+            degree_list[end] += 1
+        position_list = [position for position, degree in zip(position_list, degree_list)
+                         if position in terminal_set or degree > 2]
+
+        if not improved:
+            return position_list
+
+
+def route_steiner_network(battery_position: Tuple[int, int],
+                          house_position_list: List[Tuple[int, int]]
+                          ) -> Tuple[int, List[Tuple[int, List[Tuple[int, int]]]]]:
+    """ Routes the network of a battery as a rectilinear Steiner tree. The
+    edges of the spanning tree of the terminals and Steiner points are laid
+    as L-shaped paths that overlap the cells laid before as much as possible.
+    The path of every house then follows the shortest way through these
+    cells towards the battery until it reaches a cell of a house that is
+    closer to the battery.
+
+    - battery_position as a tuple of the x and y index.
+    - house_position_list as a list of house positions.
+
+    Returns: a tuple of the amount of cables and a list with the house index
+    and the positions of the path (from the house to the end of the path) in
+    the order the paths have to be drawn. """
+
+    position_list = get_steiner_points([battery_position] + house_position_list)
+    _, edge_list = get_spanning_tree(position_list)
+
+    position_set = {battery_position}
+    for start, end in edge_list:
+        path_list = [get_path(position_list[start], position_list[end], vertical_first)
+                     for vertical_first in (False, True)]
+        position_set.update(max(path_list, key=lambda path: sum(position in position_set
+                                                                for position in path)))
+
+    # breadth first search from the battery over the cells of the tree
+    parent_dict: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {battery_position: None}
+    depth_dict: Dict[Tuple[int, int], int] = {battery_position: 0}
+    queue = deque([battery_position])
+    while queue:
+        x, y = queue.popleft()
+        for neighbour in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if neighbour in position_set and neighbour not in parent_dict:
+                parent_dict[neighbour] = (x, y)
+                depth_dict[neighbour] = depth_dict[(x, y)] + 1
+                queue.append(neighbour)
+
+    # the houses closest to the battery lay their path first
+    connected_set = {battery_position}
+    connection_list: List[Tuple[int, List[Tuple[int, int]]]] = []
+    for index in sorted(range(len(house_position_list)),
+                        key=lambda index: depth_dict[house_position_list[index]]):
+        position = house_position_list[index]
+        path = [position]
+        while position not in connected_set:
+            connected_set.add(position)
+            position = parent_dict[position]
+            path.append(position)
+        connection_list.append((index, path))
+
+    return sum(len(path) for _, path in connection_list), connection_list
+
+
+def optimise_networks(grid: Grid) -> int:
+    """ Routes the network of every battery of a finished solution again as
+    a rectilinear Steiner tree. A network only gets replaced when the tree
+    needs less cables.
+
+    - grid as Grid object.
+
+    Returns: the amount of cables saved as an int. """
+
+    saved_cables = 0
+
+    for battery in grid.battery_list:
+        total_cables, connection_list = route_steiner_network(
+            battery.cell.get_index(), [house.cell.get_index() for house in battery.house_list])
+
+        if total_cables >= len(battery.cable_list):
+            continue
+
+        saved_cables += len(battery.cable_list) - total_cables
+        draw_network(grid, battery, connection_list)
+
+    return saved_cables
+
+
+def rebuild_network(grid: Grid, battery: Battery) -> None:
+    """ Replaces the network of a battery by a rectilinear Steiner tree
+    between the battery and the houses in its house list, also when the
+    houses of the battery changed.
+
+    - grid as Grid object.
+    - battery as Battery object. """
+
+    _, connection_list = route_steiner_network(
+        battery.cell.get_index(), [house.cell.get_index() for house in battery.house_list])
+    draw_network(grid, battery, connection_list)
+
+
+def draw_network(grid: Grid, battery: Battery,
+                 connection_list: List[Tuple[int, List[Tuple[int, int]]]]) -> None:
+    """ Removes the network of a battery and draws the paths of its houses.
+
+    - grid as Grid object.
+    - battery as Battery object.
+    - connection_list as a list with the index of the house in the house
+    list of the battery and the positions of its path, in drawing order. """
+
+    battery_position = battery.cell.get_index()
+    remove_network(grid, battery)
+
+    for house_index, path in connection_list:
+        house = battery.house_list[house_index]
+        house.cable_list = []
+        house.shared_cable_list = []
+
+        if path[-1] != battery_position:
+            end_cell = grid.get_cell_by_index(path[-1][0], path[-1][1])
+            house.shared_cable_list = get_shared_cable(end_cell, battery)
+
+        add_cables(grid, path, battery, house)
@@ -6,9 +6,16 @@ from code.algorithms.random import Random
 from code.algorithms.greedy import Greedy
 from code.algorithms.greediest import Greediest
 from code.algorithms.greedy_shared import GreedyShared
+from code.algorithms.prim_network import PrimNetwork
+from code.algorithms.multi_start import MultiStart
+from code.algorithms.min_cost_flow import MinCostFlow
 from code.algorithms.greedy_beam_search import GreedyBeamSearch
 from code.algorithms.evolution import Evolution
 from code.algorithms.move_batteries_simulated_annealing import MoveBatteriesSimulatedAnnealing
+from code.algorithms.local_search import LocalSearch
+from code.algorithms.large_neighbourhood_search import LargeNeighbourhoodSearch
+from code.algorithms.branch_and_bound import BranchAndBound
+from code.algorithms.battery_placement import BatteryPlacement
 
 
 # visualisation mode settings
@@ -16,8 +23,9 @@ SCREEN_WIDTH = 1020
 SCREEN_HEIGHT = 1020
 VERTICAL_MARGIN = 50
 HORIZONTAL_MARGIN = 500
-ALGORITHM_LIST: List[Algorithm] = [Random, Greedy, Greediest, GreedyShared,
-                                   GreedyBeamSearch, Evolution]
+ALGORITHM_LIST: List[Algorithm] = [Random, Greedy, Greediest, MinCostFlow, GreedyShared,
+                                   PrimNetwork, MultiStart, GreedyBeamSearch, Evolution,
+                                   LocalSearch, LargeNeighbourhoodSearch, BranchAndBound]
 NEIGHBOURHOOD_LIST: List[str] = ["1", "2", "3"]
 
 # console mode settings
@@ -40,6 +48,26 @@ def main() -> None:
                       SCREEN_WIDTH, SCREEN_HEIGHT, VERTICAL_MARGIN,
                       HORIZONTAL_MARGIN, GRID_SIZE, NEIGHBOURHOOD_LIST,
                       BATTERY_COST, CABLE_COST, ALGORITHM_LIST)
+
+    # chooses the amount, types and positions of the batteries first
+    if sys.argv and "--placement" in sys.argv:
+        program.battery_algorithm = BatteryPlacement
+        program.place_batteries = True
+
+    # starts from the solution of the last run
+    if sys.argv and "--warm-start" in sys.argv:
+        program.solution_file = "output.json"
+
+    # repairs the solution of the last run with a district diff
+    if sys.argv and "--patch" in sys.argv:
+        file_index = sys.argv.index("--patch") + 1
+        if file_index >= len(sys.argv) or sys.argv[file_index].startswith("--"):
+            print("Usage: python3 smart_grid.py --console --patch <diff.json>")
+            return
+
+        program.solution_file = "output.json"
+        program.patch_file = sys.argv[file_index]
+
     program.run()
 
 if __name__ == "__main__":